@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response
 from flask_cors import CORS
 import os
 import json
@@ -7,11 +7,26 @@ import numpy as np
 from werkzeug.utils import secure_filename
 import base64
 import io
+import threading
 from datetime import datetime
+from contextlib import contextmanager
 
+from config import Config
 from utils.data_processor import DataProcessor
-from ml.models import ModelTrainer
+from utils.correlation import strong_pairs, dict_to_matrix
+from utils.chunked_upload import (ChunkedUploadManager, UploadNotFoundError, UploadOffsetError, UploadTooLargeError,
+                                  hash_file)
+from utils.upload_store import UploadStore, derived_key
+from utils.clean_cache import CleanResultCache
+from utils.profile_store import ProfileStore, PROFILE_VERSION
+from utils.stats_engine import HISTOGRAM_BINNINGS
+from utils.column_store import SchemaConflictError
+from ml.models import ModelTrainer, ALL_MODEL_TYPES, INCREMENTAL_MODEL_TYPES
+from ml.jobs import TrainingJobQueue, QueueFullError, JobNotFoundError, JobCancelledError, CANCELLED
+from ml.resources import ResourceScheduler
+from ml.search import candidate_grid, halving_rounds
 from ml.predictor import ModelPredictor
+from ml.model_cache import ModelCache
 
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
@@ -20,6 +35,7 @@ CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
 UPLOAD_FOLDER = 'uploads'
 MODELS_FOLDER = 'models'
 ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'xls'}
+ANALYSIS_MODES = ('exact', 'approx')
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MODELS_FOLDER'] = MODELS_FOLDER
@@ -30,13 +46,124 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(MODELS_FOLDER, exist_ok=True)
 
 # Initialize processors
-data_processor = DataProcessor()
-model_trainer = ModelTrainer()
-model_predictor = ModelPredictor()
+data_processor = DataProcessor(
+    cache_max_bytes=Config.DATA_CACHE_MAX_BYTES,
+    compact_dtypes=Config.COMPACT_DTYPES,
+    category_max_ratio=Config.CATEGORY_MAX_RATIO
+)
+model_cache = ModelCache(MODELS_FOLDER, Config.MODEL_CACHE_MAX_BYTES)
+model_trainer = ModelTrainer(MODELS_FOLDER, train_workers=Config.TRAIN_WORKERS,
+                             model_timeout=Config.TRAIN_MODEL_TIMEOUT, feature_dtype=Config.TRAIN_FEATURE_DTYPE,
+                             scalable_row_threshold=Config.SCALABLE_ROW_THRESHOLD, chunk_rows=Config.TRAIN_CHUNK_ROWS,
+                             model_cache=model_cache)
+training_jobs = TrainingJobQueue(workers=Config.TRAINING_JOB_WORKERS, max_queued=Config.TRAINING_QUEUE_MAX,
+                                 history=Config.TRAINING_JOB_HISTORY)
+training_resources = ResourceScheduler(max_cpus=Config.TRAINING_MAX_CPUS,
+                                       max_memory_bytes=Config.TRAINING_MAX_MEMORY_BYTES)
+model_predictor = ModelPredictor(MODELS_FOLDER, model_cache=model_cache)
+if Config.MODEL_CACHE_PREWARM and __name__ != '__mp_main__':
+    # Loaded in the background so startup is not held up by unpickling (not when the training
+    # workers' fork server imports this module as __mp_main__)
+    threading.Thread(target=model_cache.warm, args=(Config.MODEL_CACHE_PREWARM,), daemon=True).start()
+chunked_uploads = ChunkedUploadManager(UPLOAD_FOLDER, max_upload_bytes=Config.CHUNKED_UPLOAD_MAX_BYTES)
+upload_store = UploadStore(UPLOAD_FOLDER)
+clean_cache = CleanResultCache(os.path.join(upload_store.blob_folder, 'clean'), Config.CLEAN_CACHE_MAX_BYTES)
+profile_store = ProfileStore(os.path.join(upload_store.blob_folder, 'profiles'), Config.PROFILE_CACHE_MAX_BYTES)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def dataset_path(filename):
+    """Path of the content-addressed blob currently published under filename"""
+    return upload_store.resolve(filename)
+
+def data_info_key(digest):
+    """Cache key of the get_data_info result for a blob (it depends on dtype compaction)"""
+    return derived_key(digest, 'data_info', {'compact': data_processor.compact})
+
+def dataset_digest(filename, filepath):
+    """Content hash of the dataset published under filename"""
+    digest = upload_store.digest_for(filename)
+    if digest is None:
+        # Files stored before the blob store existed are hashed on demand
+        digest = hash_file(filepath).hexdigest()
+    return digest
+
+def clean_result_key(filename, filepath, cleaning_options, streaming=False):
+    """Cache key of a cleaning result: source content plus normalized options"""
+    digest = dataset_digest(filename, filepath)
+    options = data_processor.normalize_cleaning_options(cleaning_options)
+    return derived_key(digest, 'clean', {'options': options, 'compact': data_processor.compact,
+                                         'streaming': streaming})
+
+def dataset_profile(filename, mode='exact', columns=None):
+    """Analysis profile of a dataset, computed on first use and persisted by content hash.
+    
+    In 'approx' mode a stored exact profile is still preferred; otherwise
+    the profile is estimated from a row sample and not persisted. With
+    columns, a miss computes only those columns' distributions (reading
+    only those columns) and returns them without persisting anything.
+    Returns (profile, mode actually served).
+    """
+    filepath = dataset_path(filename)
+    key = derived_key(dataset_digest(filename, filepath), 'profile',
+                      {'compact': data_processor.compact, 'version': PROFILE_VERSION,
+                       'bins': Config.DISTRIBUTION_BINS, 'top_k': Config.DISTRIBUTION_TOP_K})
+    profile = profile_store.get(key)
+    if profile is None and mode == 'approx':
+        profile = data_processor.build_approx_profile(filepath, Config.APPROX_SAMPLE_ROWS,
+                                                      confidence=Config.APPROX_CONFIDENCE,
+                                                      bins=Config.DISTRIBUTION_BINS, top_k=Config.DISTRIBUTION_TOP_K)
+        if profile is not None:
+            return profile, 'approx'
+    if profile is None and columns is not None:
+        distributions = data_processor.build_distributions(filepath, columns, bins=Config.DISTRIBUTION_BINS,
+                                                           top_k=Config.DISTRIBUTION_TOP_K)
+        return {'distributions': distributions}, 'exact'
+    if profile is None:
+        df = data_processor.load_data(filepath)
+        profile = profile_store.put(key, data_processor.build_profile(df, bins=Config.DISTRIBUTION_BINS,
+                                                                      top_k=Config.DISTRIBUTION_TOP_K))
+    return profile, 'exact'
+
+def bounded_distribution(distribution, binning, top_k):
+    """A profile distribution with one histogram and at most top_k categorical values"""
+    distribution = dict(distribution)
+    histograms = distribution.pop('histograms', None)
+    if histograms is not None:
+        distribution['histogram'] = histograms[binning]
+    elif top_k < len(distribution['value_counts']):
+        kept = list(distribution['value_counts'])[:top_k]
+        dropped = sum(list(distribution['value_counts'].values())[top_k:])
+        distribution['value_counts'] = {value: distribution['value_counts'][value] for value in kept}
+        distribution['other_count'] += dropped
+        if 'error_bounds' in distribution:
+            value_bounds = distribution['error_bounds']['value_counts']
+            distribution['error_bounds'] = dict(distribution['error_bounds'],
+                                                value_counts={value: value_bounds[value] for value in kept})
+    return distribution
+
+def use_streaming_clean(filepath, cleaning_options):
+    """Clean out of core when asked to, or by default when the dataset is large"""
+    if cleaning_options.get('streaming') is not None:
+        return bool(cleaning_options['streaming'])
+    if os.path.isdir(filepath):
+        nbytes = sum(entry.stat().st_size for entry in os.scandir(filepath))
+    else:
+        nbytes = os.path.getsize(filepath)
+    return nbytes >= Config.CLEAN_STREAMING_MIN_BYTES
+
+def cleaning_error_response(e):
+    """User-facing error for an exception raised while cleaning"""
+    app.logger.exception("Cleaning failed")
+    error_msg = str(e)
+    # Make error message more user-friendly
+    if 'division by zero' in error_msg.lower():
+        error_msg = 'Cannot calculate statistics: dataset may be too small or have invalid values'
+    elif 'nan' in error_msg.lower():
+        error_msg = 'Invalid data values detected. Please check your dataset.'
+    return jsonify({'error': f'Error during cleaning: {error_msg}'}), 500
+
 # ==================== DATA UPLOAD & PREPROCESSING ====================
 
 @app.route('/api/upload', methods=['POST'])
@@ -52,17 +179,28 @@ def upload_file():
         
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
+            digest, filepath, is_new = upload_store.ingest_stream(file.stream, filename)
             
-            # Load and process data
-            df = data_processor.load_data(filepath)
-            data_info = data_processor.get_data_info(df)
+            # Identical content was uploaded before: reuse its analysis instead of parsing again
+            data_info = None if is_new else upload_store.load_info(data_info_key(digest))
+            if data_info is None:
+                # Load and process data; the sidecar keeps the parsed dtypes and compaction happens on load
+                df = data_processor.load_data(filepath, compact=False)
+                if data_processor.compact:
+                    data_info = data_processor.get_data_info(data_processor.compact_dtypes(df))
+                else:
+                    data_info = data_processor.get_data_info(df)
+                upload_store.save_info(data_info_key(digest), data_info)
+                
+                # Convert once to the columnar sidecar so later requests skip parsing
+                data_processor.build_sidecar(filepath, df)
             
             return jsonify({
                 'success': True,
                 'message': 'File uploaded successfully',
                 'filename': filename,
+                'dataset_id': digest,
+                'deduplicated': not is_new,
                 'data_info': data_info
             }), 200
         else:
@@ -70,6 +208,104 @@ def upload_file():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/upload/chunked/init', methods=['POST'])
+def init_chunked_upload():
+    """Start a resumable chunked upload for files larger than one request"""
+    try:
+        data = request.json or {}
+        filename = data.get('filename')
+        total_size = data.get('total_size')
+        
+        if not filename or not allowed_file(filename):
+            return jsonify({'error': 'Valid CSV/Excel filename required'}), 400
+        
+        state = chunked_uploads.init(secure_filename(filename), total_size=total_size)
+        return jsonify({
+            'success': True,
+            'upload_id': state['upload_id'],
+            'received': state['received'],
+            'max_chunk_size': app.config['MAX_CONTENT_LENGTH']
+        }), 200
+    except UploadTooLargeError as e:
+        return jsonify({'error': str(e)}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/upload/chunked/<upload_id>', methods=['GET'])
+def chunked_upload_status(upload_id):
+    """Get the number of bytes received so far (used to resume)"""
+    try:
+        state = chunked_uploads.status(upload_id)
+        return jsonify({'success': True, **state}), 200
+    except UploadNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+
+@app.route('/api/upload/chunked/<upload_id>', methods=['PUT'])
+def append_upload_chunk(upload_id):
+    """Append a raw chunk; the offset query parameter must equal the bytes received so far"""
+    try:
+        offset = int(request.args.get('offset', request.headers.get('X-Upload-Offset', 0)))
+        state = chunked_uploads.append(upload_id, offset, request.stream)
+        return jsonify({'success': True, 'received': state['received']}), 200
+    except UploadOffsetError as e:
+        return jsonify({'error': str(e), 'expected_offset': e.expected_offset}), 409
+    except UploadNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except UploadTooLargeError as e:
+        return jsonify({'error': str(e)}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/upload/chunked/<upload_id>/finalize', methods=['POST'])
+def finalize_chunked_upload(upload_id):
+    """Assemble the upload, verify its hash and convert it to the columnar sidecar"""
+    try:
+        data = request.get_json(silent=True) or {}
+        tmp_path = upload_store.tmp_path()
+        state, content_hash = chunked_uploads.finalize(upload_id, tmp_path)
+        filename = state['filename']
+        expected_hash = data.get('sha256')
+        if expected_hash and expected_hash.lower() != content_hash:
+            os.remove(tmp_path)
+            return jsonify({'error': 'Content hash mismatch', 'sha256': content_hash}), 422
+        
+        digest, filepath, is_new = upload_store.ingest_file(tmp_path, filename, content_hash)
+        data_info = None if is_new else upload_store.load_info(data_info_key(digest))
+        if data_info is None:
+            # Convert chunk by chunk and describe the data from the sidecar, never the whole frame
+            if data_processor.build_sidecar_chunked(filepath, chunk_rows=Config.SIDECAR_CHUNK_ROWS):
+                data_info = data_processor.get_store_info(data_processor.open_store(filepath))
+            else:
+                data_info = data_processor.get_data_info(data_processor.load_data(filepath))
+            upload_store.save_info(data_info_key(digest), data_info)
+        
+        return jsonify({
+            'success': True,
+            'message': 'File uploaded successfully',
+            'filename': filename,
+            'dataset_id': digest,
+            'deduplicated': not is_new,
+            'sha256': content_hash,
+            'size': state['received'],
+            'data_info': data_info
+        }), 200
+    except UploadNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/upload/chunked/<upload_id>', methods=['DELETE'])
+def abort_chunked_upload(upload_id):
+    """Discard an unfinished chunked upload"""
+    chunked_uploads.abort(upload_id)
+    return jsonify({'success': True}), 200
+
 @app.route('/api/data/preview', methods=['POST'])
 def preview_data():
     """Preview uploaded data"""
@@ -80,18 +316,18 @@ def preview_data():
         if not filename:
             return jsonify({'error': 'Filename required'}), 400
         
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        df = data_processor.load_data(filepath)
+        filepath = dataset_path(filename)
+        df, total_rows = data_processor.load_preview(filepath, nrows=10)
         
         # Return preview (first 10 rows)
-        preview = df.head(10).to_dict('records')
+        preview = df.to_dict('records')
         columns = list(df.columns)
         
         return jsonify({
             'success': True,
             'preview': preview,
             'columns': columns,
-            'shape': {'rows': len(df), 'cols': len(columns)}
+            'shape': {'rows': total_rows, 'cols': len(columns)}
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -107,59 +343,84 @@ def clean_data():
         if not filename:
             return jsonify({'error': 'Filename required'}), 400
         
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        filepath = dataset_path(filename)
         
         # Check if file exists
         if not os.path.exists(filepath):
             return jsonify({'error': f'File not found: {filename}. Please upload the file first.'}), 404
         
-        try:
-            df = data_processor.load_data(filepath)
-        except Exception as e:
-            return jsonify({'error': f'Error loading file: {str(e)}'}), 400
-        
-        # Check if dataframe is empty
-        if df.empty:
-            return jsonify({'error': 'The uploaded file is empty'}), 400
-        
-        # Apply cleaning
-        try:
-            cleaned_df, cleaning_report = data_processor.clean_data(df, cleaning_options)
-        except Exception as e:
-            import traceback
-            error_trace = traceback.format_exc()
-            print(f"Cleaning error details: {error_trace}")  # Log full traceback
-            error_msg = str(e)
-            # Make error message more user-friendly
-            if 'division by zero' in error_msg.lower():
-                error_msg = 'Cannot calculate statistics: dataset may be too small or have invalid values'
-            elif 'nan' in error_msg.lower():
-                error_msg = 'Invalid data values detected. Please check your dataset.'
-            return jsonify({'error': f'Error during cleaning: {error_msg}'}), 500
-        
-        # Check if cleaned dataframe is empty
-        if cleaned_df.empty:
-            return jsonify({'error': 'After cleaning, the dataset is empty. Please adjust cleaning options.'}), 400
-        
-        # Save cleaned data
+        # Identical content cleaned with equivalent options is served from the cache
         cleaned_filename = f"cleaned_{filename}"
-        cleaned_filepath = os.path.join(app.config['UPLOAD_FOLDER'], cleaned_filename)
-        
-        try:
-            cleaned_df.to_csv(cleaned_filepath, index=False)
-        except Exception as e:
-            return jsonify({'error': f'Error saving cleaned file: {str(e)}'}), 500
-        
+        streaming = use_streaming_clean(filepath, cleaning_options)
+        key = clean_result_key(filename, filepath, cleaning_options, streaming)
+        entry = clean_cache.get(key)
+        
+        if entry is None and streaming:
+            # Large datasets are cleaned chunk by chunk straight into the cache
+            staging_path = clean_cache.staging_path()
+            try:
+                cleaning_report = data_processor.clean_data_streaming(
+                    filepath, staging_path, cleaning_options, chunk_rows=Config.CLEAN_CHUNK_ROWS)
+                entry = clean_cache.commit(key, staging_path, cleaning_report)
+            except SchemaConflictError as e:
+                app.logger.warning("Cleaning %s in memory, chunks disagree on column types: %s", filename, e)
+            except Exception as e:
+                return cleaning_error_response(e)
+        
+        if entry is None:
+            try:
+                df = data_processor.load_data(filepath)
+            except Exception as e:
+                return jsonify({'error': f'Error loading file: {str(e)}'}), 400
+            
+            # Check if dataframe is empty
+            if df.empty:
+                return jsonify({'error': 'The uploaded file is empty'}), 400
+            
+            # Apply cleaning
+            try:
+                cleaned_df, cleaning_report = data_processor.clean_data(df, cleaning_options)
+            except Exception as e:
+                return cleaning_error_response(e)
+            
+            # Check if cleaned dataframe is empty
+            if cleaned_df.empty:
+                return jsonify({'error': 'After cleaning, the dataset is empty. Please adjust cleaning options.'}), 400
+            
+            # Save cleaned data as a binary column store in the cleaning cache
+            try:
+                entry = clean_cache.put(key, cleaned_df, cleaning_report)
+            except (TypeError, ValueError) as e:
+                # Columns the column store cannot encode: publish a CSV blob instead, uncached
+                app.logger.warning("Could not cache cleaned data for %s: %s", filename, e)
+                entry = None
+            except Exception as e:
+                return jsonify({'error': f'Error saving cleaned file: {str(e)}'}), 500
+            
+            if entry is None:
+                try:
+                    tmp_path = upload_store.tmp_path()
+                    cleaned_df.to_csv(tmp_path, index=False)
+                    upload_store.ingest_file(tmp_path, cleaned_filename, hash_file(tmp_path).hexdigest(), extension='csv')
+                except Exception as e:
+                    return jsonify({'error': f'Error saving cleaned file: {str(e)}'}), 500
+                entry = {'report': cleaning_report}
+        
+        if 'path' in entry:
+            upload_store.link(cleaned_filename, os.path.relpath(entry['path'], upload_store.blob_folder))
+            # Results some filename still points at stay; the rest are evicted least recently used first
+            clean_cache.evict(pinned=upload_store.linked_paths())
+        
+        cleaning_report = entry['report']
+        rows, cols = cleaning_report['cleaned_shape']
         return jsonify({
             'success': True,
             'cleaned_filename': cleaned_filename,
             'cleaning_report': cleaning_report,
-            'shape': {'rows': len(cleaned_df), 'cols': len(cleaned_df.columns)}
+            'shape': {'rows': rows, 'cols': cols}
         }), 200
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Cleaning error: {error_details}")  # Log for debugging
+        app.logger.exception("Cleaning failed")
         return jsonify({'error': f'Cleaning failed: {str(e)}'}), 500
 
 @app.route('/api/data/analysis', methods=['POST'])
@@ -172,48 +433,217 @@ def analyze_data():
         if not filename:
             return jsonify({'error': 'Filename required'}), 400
         
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        df = data_processor.load_data(filepath)
+        mode = data.get('mode', 'exact')
+        if mode not in ANALYSIS_MODES:
+            return jsonify({'error': f"mode must be one of {', '.join(ANALYSIS_MODES)}"}), 400
         
-        analysis = data_processor.analyze_data(df)
+        # Served from the dataset's persisted profile; only the first call parses and analyzes
+        profile, mode = dataset_profile(filename, mode)
         
         return jsonify({
             'success': True,
-            'analysis': analysis
+            'mode': mode,
+            'analysis': profile['analysis']
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # ==================== MODEL TRAINING ====================
 
+TRAINING_KINDS = ('train', 'train-multiple', 'search', 'update')
+
+def search_request(data):
+    """The search settings of a search request body, with its candidate grid"""
+    model_type = data.get('model_type', 'random_forest')
+    param_grid = data.get('param_grid')
+    max_candidates = data.get('max_candidates')
+    cv_folds = int(data.get('cv_folds', Config.SEARCH_CV_FOLDS))
+    factor = int(data.get('factor', Config.SEARCH_HALVING_FACTOR))
+    random_state = int(data.get('random_state', 42))
+    
+    if cv_folds < 2:
+        raise ValueError('cv_folds must be at least 2')
+    if factor < 2:
+        raise ValueError('factor must be at least 2')
+    if max_candidates is not None and int(max_candidates) < 1:
+        raise ValueError('max_candidates must be at least 1')
+    if param_grid is not None and not isinstance(param_grid, dict):
+        raise ValueError('param_grid must map parameter names to lists of values')
+    try:
+        candidates = candidate_grid(model_type, param_grid,
+                                    int(max_candidates) if max_candidates is not None else None, random_state)
+    except TypeError as e:
+        raise ValueError(f'Invalid param_grid: {e}')
+    if not candidates:
+        raise ValueError('param_grid has no candidates')
+    
+    return {
+        'model_type': model_type,
+        'param_grid': param_grid,
+        'max_candidates': int(max_candidates) if max_candidates is not None else None,
+        'cv_folds': cv_folds,
+        'factor': factor,
+        'test_size': float(data.get('test_size', 0.2)),
+        'random_state': random_state,
+        'rounds': halving_rounds(len(candidates), factor)
+    }
+
+def training_request(kind, data):
+    """Parse a training request body into (filename, target, features, spec).
+    
+    spec is the list of model configs for train and train-multiple, the
+    search settings for search, and the saved model's id, type and the
+    update config for update (whose target and features are the model's).
+    """
+    if kind == 'update':
+        filename = data.get('filename')
+        model_id = data.get('model_id')
+        if not filename or not model_id:
+            raise ValueError('Filename and model_id required')
+        model_type = model_trainer.get_model_info(model_id).get('model_type')
+        if model_type not in INCREMENTAL_MODEL_TYPES:
+            raise ValueError(f"{model_type} models cannot be trained incrementally "
+                             f"(supported: {', '.join(INCREMENTAL_MODEL_TYPES)})")
+        return filename, None, None, {'model_id': model_id, 'model_type': model_type,
+                                      'model_config': data.get('model_config', {})}
+    
+    filename = data.get('filename')
+    target_column = data.get('target_column')
+    feature_selection = data.get('feature_selection', [])
+    
+    if not filename or not target_column:
+        raise ValueError('Filename and target_column required')
+    
+    if kind == 'search':
+        return filename, target_column, feature_selection, search_request(data)
+    if kind == 'train':
+        model_configs = [data.get('model_config', {})]
+    else:
+        models_to_train = data.get('models', ['all'])
+        if models_to_train == ['all']:
+            models_to_train = ALL_MODEL_TYPES
+        model_configs = [{'model_type': model_type} for model_type in models_to_train]
+    return filename, target_column, feature_selection, model_configs
+
+def job_parallelism(parallel):
+    """(cpus, workers, threads) for a job that could run parallel fits at once.
+    
+    The job's cores (TRAINING_JOB_MAX_CPUS, or an equal share per job
+    worker) go to as many worker processes as it has fits, and the rest
+    become BLAS/OpenMP threads and n_jobs within each worker.
+    """
+    cpus = Config.TRAINING_JOB_MAX_CPUS or training_resources.max_cpus // Config.TRAINING_JOB_WORKERS
+    cpus = max(1, min(cpus, training_resources.max_cpus))
+    workers = max(1, min(parallel, cpus))
+    return cpus, workers, max(1, cpus // workers)
+
+@contextmanager
+def job_resources(job, cpus, memory_bytes):
+    """Hold a reservation of the host training budget while a job trains.
+    
+    The job waits (admission control) until its cores and estimated
+    memory fit beside the running jobs; yields None if it was cancelled
+    while waiting.
+    """
+    job.update_resources(dict(training_resources.grant(cpus, memory_bytes).to_dict(), state='waiting'))
+    with training_resources.reserve(cpus, memory_bytes, cancel=job.cancel_event) as reservation:
+        if reservation is not None:
+            job.update_resources(dict(reservation.to_dict(), state='admitted'))
+        yield reservation
+
+def submit_training_job(kind, filename, target_column, feature_selection, spec):
+    """Queue a training job; it loads the dataset, waits for its resource budget and trains in worker processes"""
+    filepath = dataset_path(filename)
+    
+    if kind == 'search':
+        settings = dict(spec)
+        rounds = settings.pop('rounds')
+        model_type = settings['model_type']
+        
+        def work(job):
+            df = data_processor.load_data(filepath)
+            # Folds are the unit of parallelism: one thread each
+            cpus, workers, _ = job_parallelism(training_resources.max_cpus)
+            memory = model_trainer.estimate_memory(df, target_column, feature_selection,
+                                                   [model_type] * workers, concurrent=workers)
+            with job_resources(job, cpus, memory) as reservation:
+                if reservation is None:
+                    return None
+                return model_trainer.search_hyperparameters(
+                    df, target_column, feature_selection, **settings,
+                    on_start=job.model_started, on_result=job.model_finished, cancel=job.cancel_event,
+                    workers=workers, threads=1
+                )
+        
+        # One progress entry per halving round, then the final fit of the best candidate
+        steps = [{'model_type': model_type, 'stage': f'round {i + 1}'} for i in range(rounds)]
+        steps.append({'model_type': model_type, 'stage': 'final fit'})
+        return training_jobs.submit(kind, steps, work)
+    
+    if kind == 'update':
+        def work(job):
+            df = data_processor.load_data(filepath)
+            cpus, _, threads = job_parallelism(1)
+            memory = model_trainer.estimate_memory(df, None, None, [spec['model_type']])
+            with job_resources(job, cpus, memory) as reservation:
+                if reservation is None:
+                    return None
+                # A worker process, like the other job kinds: thread caps are process-wide
+                return model_trainer.update_in_process(
+                    spec['model_id'], df, spec['model_config'],
+                    on_start=job.model_started, on_result=job.model_finished, cancel=job.cancel_event,
+                    threads=threads
+                )
+        
+        return training_jobs.submit(kind, [spec['model_type']], work)
+    
+    model_types = [config.get('model_type', 'random_forest') for config in spec]
+    
+    def work(job):
+        df = data_processor.load_data(filepath)
+        cpus, workers, threads = job_parallelism(len(spec))
+        memory = model_trainer.estimate_memory(df, target_column, feature_selection, model_types, concurrent=workers)
+        with job_resources(job, cpus, memory) as reservation:
+            if reservation is None:
+                return None
+            results = model_trainer.train_models(
+                df, target_column, feature_selection, spec,
+                on_start=job.model_started, on_result=job.model_finished, cancel=job.cancel_event,
+                workers=workers, threads=threads
+            )
+        return results[0] if kind == 'train' else ModelTrainer.compare_results(results)
+    
+    return training_jobs.submit(kind, model_types, work)
+
+def run_training_job(kind, data):
+    """Run a training request through the job queue and wait for it (the synchronous endpoints)"""
+    job = submit_training_job(kind, *training_request(kind, data))
+    job.wait()
+    if job.error is not None:
+        raise RuntimeError(job.error)
+    if job.status == CANCELLED or job.result is None:
+        # Cancelled through /api/jobs/<job_id>/cancel, while queued, waiting for resources or training
+        raise JobCancelledError(f"Job {job.id} was cancelled")
+    return job.result
+
 @app.route('/api/models/train', methods=['POST'])
 def train_model():
     """Train ML model with customizable parameters"""
     try:
-        data = request.json
-        filename = data.get('filename')
-        model_config = data.get('model_config', {})
-        feature_selection = data.get('feature_selection', [])
-        target_column = data.get('target_column')
-        
-        if not filename or not target_column:
-            return jsonify({'error': 'Filename and target_column required'}), 400
-        
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        df = data_processor.load_data(filepath)
-        
-        # Train model
-        result = model_trainer.train_model(
-            df=df,
-            target_column=target_column,
-            feature_selection=feature_selection,
-            model_config=model_config
-        )
+        result = run_training_job('train', request.json)
+        if 'error' in result:
+            return jsonify({'error': result['error']}), 500
         
         return jsonify({
             'success': True,
             'result': result
         }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    except JobCancelledError as e:
+        return jsonify({'error': str(e), 'cancelled': True}), 409
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -221,46 +651,136 @@ def train_model():
 def train_multiple_models():
     """Train multiple models and compare"""
     try:
-        data = request.json
-        filename = data.get('filename')
-        target_column = data.get('target_column')
-        feature_selection = data.get('feature_selection', [])
-        models_to_train = data.get('models', ['all'])
+        results = run_training_job('train-multiple', request.json)
         
-        if not filename or not target_column:
-            return jsonify({'error': 'Filename and target_column required'}), 400
+        return jsonify({
+            'success': True,
+            'results': results
+        }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    except JobCancelledError as e:
+        return jsonify({'error': str(e), 'cancelled': True}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/models/search', methods=['POST'])
+def search_hyperparameters():
+    """Cross-validated hyperparameter search for one model type; saves the best model"""
+    try:
+        result = run_training_job('search', request.json)
         
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        df = data_processor.load_data(filepath)
+        return jsonify({
+            'success': True,
+            'result': result
+        }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    except JobCancelledError as e:
+        return jsonify({'error': str(e), 'cancelled': True}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/models/<model_id>/update', methods=['POST'])
+def update_model(model_id):
+    """Continue training a saved model on newly arrived rows"""
+    try:
+        result = run_training_job('update', dict(request.json, model_id=model_id))
+        if 'error' in result:
+            return jsonify({'error': result['error']}), 400
         
-        # Train multiple models
-        results = model_trainer.train_multiple_models(
-            df=df,
-            target_column=target_column,
-            feature_selection=feature_selection,
-            models_to_train=models_to_train
-        )
-        
-        # Ensure results is properly structured
-        if isinstance(results, dict) and 'results' in results:
-            # Results already has the correct structure
-            return jsonify({
-                'success': True,
-                'results': results
-            }), 200
-        else:
-            # Wrap results in expected structure
-            return jsonify({
-                'success': True,
-                'results': {
-                    'results': results.get('results', []) if isinstance(results, dict) else [],
-                    'best_model': results.get('best_model') if isinstance(results, dict) else None,
-                    'comparison': results.get('comparison', {}) if isinstance(results, dict) else {}
-                }
-            }), 200
+        return jsonify({
+            'success': True,
+            'result': result
+        }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    except JobCancelledError as e:
+        return jsonify({'error': str(e), 'cancelled': True}), 409
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# ==================== TRAINING JOBS ====================
+
+@app.route('/api/jobs/<kind>', methods=['POST'])
+def submit_job(kind):
+    """Queue a train, train-multiple, search or update request and return its job id immediately"""
+    try:
+        if kind not in TRAINING_KINDS:
+            return jsonify({'error': f'Unknown job type: {kind}'}), 404
+        
+        job = submit_training_job(kind, *training_request(kind, request.json))
+        return jsonify({
+            'success': True,
+            'job_id': job.id,
+            'status': job.status
+        }), 202
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 429
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """List queued, running and recently finished training jobs"""
+    return jsonify({
+        'success': True,
+        'jobs': training_jobs.list(),
+        'queue': training_jobs.stats(),
+        'resources': training_resources.stats()
+    }), 200
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Status, per-model progress and the results finished so far"""
+    try:
+        return jsonify({'success': True, 'job': training_jobs.get(job_id).to_dict()}), 200
+    except JobNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+
+@app.route('/api/jobs/<job_id>/stream', methods=['GET'])
+def job_stream(job_id):
+    """Server-sent events: one 'model' event per finished model, then a 'done' event with the job"""
+    try:
+        job = training_jobs.get(job_id)
+    except JobNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    
+    def events():
+        for kind, index, result in job.follow():
+            if kind == 'waiting':
+                yield ": keep-alive\n\n"
+            elif kind == 'model':
+                payload = {'index': index, 'model_type': job.models[index]['model_type'], 'result': result}
+                if 'stage' in job.models[index]:
+                    payload['stage'] = job.models[index]['stage']
+                yield f"event: model\ndata: {json.dumps(payload, default=str)}\n\n"
+            else:
+                yield f"event: done\ndata: {json.dumps(job.to_dict(), default=str)}\n\n"
+    
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued or running job; models still training are stopped"""
+    try:
+        cancelled = training_jobs.cancel(job_id)
+        return jsonify({
+            'success': True,
+            'cancelled': cancelled,
+            'status': training_jobs.get(job_id).status
+        }), 200
+    except JobNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+
 @app.route('/api/models/<model_id>/info', methods=['GET'])
 def get_model_info(model_id):
     """Get information about a trained model"""
@@ -318,7 +838,7 @@ def predict_batch():
         if not model_id or not filename:
             return jsonify({'error': 'model_id and filename required'}), 400
         
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        filepath = dataset_path(filename)
         df = data_processor.load_data(filepath)
         
         predictions = model_predictor.predict_batch(model_id, df)
@@ -356,21 +876,31 @@ def visualize_correlation():
         if not filename:
             return jsonify({'error': 'Filename required'}), 400
         
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        df = data_processor.load_data(filepath)
-        
-        # Generate correlation matrix
-        numerical_cols = df.select_dtypes(include=[np.number]).columns
+        # The correlation matrix comes from the dataset's persisted profile
+        analysis = dataset_profile(filename)[0]['analysis']
+        numerical_cols = analysis['basic_info']['numerical_columns']
         if len(numerical_cols) < 2:
             return jsonify({'error': 'Need at least 2 numerical columns'}), 400
         
-        corr_matrix = df[numerical_cols].corr().to_dict()
+        threshold = data.get('threshold')
+        top_k = data.get('top_k')
+        if top_k is not None and int(top_k) < 1:
+            return jsonify({'error': 'top_k must be at least 1'}), 400
         
-        return jsonify({
+        result = {
             'success': True,
-            'correlation_matrix': corr_matrix,
-            'columns': list(numerical_cols)
-        }), 200
+            'columns': numerical_cols
+        }
+        # With a threshold or top_k only the selected pairs are sent, unless the matrix is asked for too
+        if threshold is not None or top_k is not None:
+            corr_matrix = dict_to_matrix(analysis['correlations'], numerical_cols)
+            result['pairs'] = strong_pairs(corr_matrix, numerical_cols,
+                                           threshold=None if threshold is None else float(threshold),
+                                           top_k=None if top_k is None else int(top_k))
+        if data.get('include_matrix', threshold is None and top_k is None):
+            result['correlation_matrix'] = analysis['correlations']
+        
+        return jsonify(result), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -380,39 +910,51 @@ def visualize_distribution():
     try:
         data = request.json
         filename = data.get('filename')
-        columns = data.get('columns', [])
+        columns = data.get('columns')
+        binning = data.get('binning', 'fixed')
+        top_k = int(data.get('top_k', Config.DISTRIBUTION_TOP_K))
         
         if not filename:
             return jsonify({'error': 'Filename required'}), 400
-        
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        df = data_processor.load_data(filepath)
-        
-        distributions = {}
-        for col in columns:
-            if col in df.columns:
-                if df[col].dtype in ['int64', 'float64']:
-                    distributions[col] = {
-                        'mean': float(df[col].mean()),
-                        'median': float(df[col].median()),
-                        'std': float(df[col].std()),
-                        'min': float(df[col].min()),
-                        'max': float(df[col].max()),
-                        'q25': float(df[col].quantile(0.25)),
-                        'q75': float(df[col].quantile(0.75))
-                    }
-                else:
-                    distributions[col] = {
-                        'value_counts': df[col].value_counts().to_dict()
-                    }
+        if binning not in HISTOGRAM_BINNINGS:
+            return jsonify({'error': f"binning must be one of {', '.join(HISTOGRAM_BINNINGS)}"}), 400
+        if top_k < 1:
+            return jsonify({'error': 'top_k must be at least 1'}), 400
+        
+        mode = data.get('mode', 'exact')
+        if mode not in ANALYSIS_MODES:
+            return jsonify({'error': f"mode must be one of {', '.join(ANALYSIS_MODES)}"}), 400
+        
+        # Distributions come from the dataset's persisted profile; before it exists only the requested
+        # columns are read. Numeric columns come as histograms and categorical ones as top-k counts,
+        # so the size is bounded
+        profile, mode = dataset_profile(filename, mode, columns)
+        if columns is None:
+            columns = list(profile['distributions'])
+        distributions = {col: bounded_distribution(profile['distributions'][col], binning, top_k)
+                         for col in columns if col in profile['distributions']}
         
         return jsonify({
             'success': True,
+            'mode': mode,
             'distributions': distributions
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# ==================== CACHE ====================
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Get parsed-data, cleaned-data, analysis-profile and saved-model cache statistics"""
+    return jsonify({
+        'success': True,
+        'data_cache': data_processor.cache_stats(),
+        'clean_cache': clean_cache.stats(),
+        'profile_cache': profile_store.stats(),
+        'model_cache': model_cache.stats()
+    }), 200
+
 # ==================== HEALTH CHECK ====================
 
 @app.route('/api/health', methods=['GET'])
@@ -9,12 +9,70 @@ class Config:
     
     # File upload settings
     UPLOAD_FOLDER = 'uploads'
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
+    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB per request (single upload or one chunk)
+    CHUNKED_UPLOAD_MAX_BYTES = int(os.environ.get('CHUNKED_UPLOAD_MAX_BYTES', 20 * 1024 ** 3))  # 20GB
+    SIDECAR_CHUNK_ROWS = 100000  # rows per chunk when converting large CSVs to the columnar sidecar
     ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'xls'}
     
+    # Parsed dataset cache (bytes of DataFrames kept in memory per worker)
+    DATA_CACHE_MAX_BYTES = int(os.environ.get('DATA_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+    
+    # Lossless dtype compaction on load (categoricals for low-cardinality strings, narrow numerics)
+    COMPACT_DTYPES = os.environ.get('COMPACT_DTYPES', 'False').lower() == 'true'
+    CATEGORY_MAX_RATIO = float(os.environ.get('CATEGORY_MAX_RATIO', 0.5))  # unique values / rows
+    
+    # Cleaned dataset cache (disk quota for memoized /api/data/clean results)
+    CLEAN_CACHE_MAX_BYTES = int(os.environ.get('CLEAN_CACHE_MAX_BYTES', 2 * 1024 ** 3))  # 2GB
+    
+    # Out-of-core cleaning: datasets at least this large are cleaned chunk by chunk
+    CLEAN_STREAMING_MIN_BYTES = int(os.environ.get('CLEAN_STREAMING_MIN_BYTES', 256 * 1024 * 1024))
+    CLEAN_CHUNK_ROWS = 100000
+    
+    # Persisted analysis profiles (parsed profiles kept in memory per worker)
+    PROFILE_CACHE_MAX_BYTES = int(os.environ.get('PROFILE_CACHE_MAX_BYTES', 128 * 1024 * 1024))
+    
+    # Saved models kept unpickled in memory for predictions (per worker); PREWARM loads the newest N at startup
+    MODEL_CACHE_MAX_BYTES = int(os.environ.get('MODEL_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    MODEL_CACHE_PREWARM = int(os.environ.get('MODEL_CACHE_PREWARM', 0))
+    
+    # Approximate analysis ("mode": "approx"): uniform row sample size and interval confidence
+    APPROX_SAMPLE_ROWS = int(os.environ.get('APPROX_SAMPLE_ROWS', 100000))
+    APPROX_CONFIDENCE = 0.95
+    
+    # Distribution output: histogram bins per numeric column, most frequent values kept per categorical column
+    DISTRIBUTION_BINS = int(os.environ.get('DISTRIBUTION_BINS', 20))
+    DISTRIBUTION_TOP_K = int(os.environ.get('DISTRIBUTION_TOP_K', 50))
+    
     # Model settings
     MODELS_FOLDER = 'models'
     
+    # Parallel training: worker processes per job (unset: one per CPU) and seconds allowed per model
+    TRAIN_WORKERS = int(os.environ['TRAIN_WORKERS']) if os.environ.get('TRAIN_WORKERS') else None
+    TRAIN_MODEL_TIMEOUT = float(os.environ.get('TRAIN_MODEL_TIMEOUT', 600))
+    
+    # Feature matrix precision for training; float32 halves its memory (tree models train in float32 anyway)
+    TRAIN_FEATURE_DTYPE = os.environ.get('TRAIN_FEATURE_DTYPE', 'float64')
+    
+    # Large datasets: above this many rows svm, gradient_boosting and knn train as their scalable variants
+    # (0 disables); SGD-based models take partial_fit steps of this many rows
+    SCALABLE_ROW_THRESHOLD = int(os.environ.get('SCALABLE_ROW_THRESHOLD', 200000))
+    TRAIN_CHUNK_ROWS = int(os.environ.get('TRAIN_CHUNK_ROWS', 100000))
+    
+    # Training job queue: jobs run at once, jobs allowed to wait (more are rejected), finished jobs remembered
+    TRAINING_JOB_WORKERS = int(os.environ.get('TRAINING_JOB_WORKERS', 2))
+    TRAINING_QUEUE_MAX = int(os.environ.get('TRAINING_QUEUE_MAX', 16))
+    TRAINING_JOB_HISTORY = 100
+    
+    # Host-wide training budget shared by running jobs (unset CPUs: all of them); jobs wait until theirs fits.
+    # Each job uses at most TRAINING_JOB_MAX_CPUS cores (unset: an equal share per job worker)
+    TRAINING_MAX_CPUS = int(os.environ['TRAINING_MAX_CPUS']) if os.environ.get('TRAINING_MAX_CPUS') else None
+    TRAINING_MAX_MEMORY_BYTES = int(os.environ.get('TRAINING_MAX_MEMORY_BYTES', 4 * 1024 * 1024 * 1024))
+    TRAINING_JOB_MAX_CPUS = int(os.environ['TRAINING_JOB_MAX_CPUS']) if os.environ.get('TRAINING_JOB_MAX_CPUS') else None
+    
+    # Hyperparameter search: cross-validation folds and the share of candidates kept per halving round (1/factor)
+    SEARCH_CV_FOLDS = int(os.environ.get('SEARCH_CV_FOLDS', 5))
+    SEARCH_HALVING_FACTOR = 3
+    
     # CORS settings
     CORS_ORIGINS = ['http://localhost:3000', 'http://localhost:5173', 'http://127.0.0.1:3000']
     
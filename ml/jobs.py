@@ -0,0 +1,252 @@
+import time
+import uuid
+import queue
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+class QueueFullError(Exception):
+    """The job queue is at capacity; the client should retry later"""
+
+
+class JobCancelledError(Exception):
+    """The job was cancelled, so it has no result to return"""
+
+
+class JobNotFoundError(LookupError):
+    """No job exists with the given id (or it has been pruned from the history)"""
+
+
+class TrainingJob:
+    """One queued training request and its per-model progress.
+    
+    The work function receives the job and reports through model_started
+    and model_finished; whatever it returns becomes the job's result.
+    Every state change wakes waiters, so clients can poll, block until the
+    job ends or follow each finished model as it arrives.
+    """
+    
+    def __init__(self, kind, model_types, work):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        # Entries are model types, or dicts describing a step (e.g. one round of a hyperparameter search)
+        self.models = [dict(item, status='pending') if isinstance(item, dict)
+                       else {'model_type': item, 'status': 'pending'} for item in model_types]
+        self.finished_order = []  # model indices in the order they finished
+        self.resources = None  # the job's CPU/memory reservation, once it asks for one
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self._work = work
+        self._condition = threading.Condition()
+        self._started = {}
+    
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+    
+    def update_resources(self, resources):
+        with self._condition:
+            self.resources = resources
+            self._condition.notify_all()
+    
+    def model_started(self, index):
+        with self._condition:
+            self.models[index]['status'] = RUNNING
+            self._started[index] = time.monotonic()
+            self._condition.notify_all()
+    
+    def model_finished(self, index, result):
+        with self._condition:
+            model = self.models[index]
+            if result.get('cancelled'):
+                model['status'] = CANCELLED
+            else:
+                model['status'] = FAILED if 'error' in result else COMPLETED
+            if index in self._started:
+                model['seconds'] = time.monotonic() - self._started.pop(index)
+            model['result'] = result
+            self.finished_order.append(index)
+            self._condition.notify_all()
+    
+    def run(self):
+        with self._condition:
+            if self.finished:
+                # Cancelled while it was still queued
+                return
+            self.status = RUNNING
+            self.started_at = datetime.now().isoformat()
+            self._condition.notify_all()
+        try:
+            result = self._work(self)
+        except Exception as e:
+            with self._condition:
+                self.error = str(e)
+                self._finish(FAILED)
+            return
+        with self._condition:
+            self.result = result
+            self._finish(CANCELLED if self.cancel_event.is_set() else COMPLETED)
+    
+    def cancel(self):
+        """Ask the job to stop; a queued job is cancelled before it starts"""
+        with self._condition:
+            if self.finished:
+                return False
+            self.cancel_event.set()
+            if self.status == QUEUED:
+                self._finish(CANCELLED)
+            return True
+    
+    def wait(self, timeout=None):
+        """Block until the job has finished (or timeout seconds passed); returns whether it finished"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self.finished, timeout)
+    
+    def follow(self, poll_seconds=15):
+        """Yield ('model', index, result) for each model as it finishes, then ('done', status, None).
+        
+        Models that finished before following started are yielded first.
+        While nothing happens ('waiting', None, None) is yielded every
+        poll_seconds, which lets a streaming response send a keep-alive.
+        """
+        sent = 0
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: len(self.finished_order) > sent or self.finished, poll_seconds)
+                new = self.finished_order[sent:]
+                finished = self.finished
+                status = self.status
+            if not new and not finished:
+                yield ('waiting', None, None)
+            for index in new:
+                yield ('model', index, self.models[index]['result'])
+            sent += len(new)
+            if finished and sent == len(self.finished_order):
+                yield ('done', status, None)
+                return
+    
+    def to_dict(self, include_results=True):
+        with self._condition:
+            completed = len(self.finished_order)
+            models = []
+            for index, model in enumerate(self.models):
+                entry = {key: value for key, value in model.items() if key != 'result' or include_results}
+                if index in self._started:
+                    entry['seconds'] = time.monotonic() - self._started[index]
+                models.append(entry)
+            info = {
+                'job_id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'progress': {
+                    'completed': completed,
+                    'total': len(self.models),
+                    'fraction': completed / len(self.models) if self.models else 1.0
+                },
+                'models': models,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at
+            }
+            if self.resources is not None:
+                info['resources'] = dict(self.resources)
+            if self.error is not None:
+                info['error'] = self.error
+            if include_results and self.result is not None:
+                info['result'] = self.result
+            return info
+    
+    def _finish(self, status):
+        # Caller holds the condition
+        self.status = status
+        self.finished_at = datetime.now().isoformat()
+        self._condition.notify_all()
+
+
+class TrainingJobQueue:
+    """Bounded queue of training jobs run by a fixed number of worker threads.
+    
+    At most max_queued jobs wait for a worker; submitting more raises
+    QueueFullError instead of piling up work (backpressure). Finished jobs
+    are kept for status queries until history of them have accumulated,
+    then dropped oldest first.
+    """
+    
+    def __init__(self, workers=2, max_queued=16, history=100):
+        self.workers = workers
+        self.history = history
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+    
+    def submit(self, kind, model_types, work):
+        """Queue work(job) and return the job; raises QueueFullError when the queue is full"""
+        job = TrainingJob(kind, model_types, work)
+        self._start_workers()
+        with self._lock:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError(f"Training queue is full ({self._queue.maxsize} jobs waiting); retry later")
+            self._jobs[job.id] = job
+            self._prune()
+        return job
+    
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFoundError(f"Job {job_id} not found")
+        return job
+    
+    def cancel(self, job_id):
+        return self.get(job_id).cancel()
+    
+    def list(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.to_dict(include_results=False) for job in reversed(jobs)]
+    
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {state: 0 for state in (QUEUED, RUNNING) + FINISHED_STATES}
+        for job in jobs:
+            counts[job.status] += 1
+        return {'workers': self.workers, 'max_queued': self._queue.maxsize, 'jobs': counts}
+    
+    def _start_workers(self):
+        # Threads start lazily so importing the app (e.g. in a forked training worker) spawns nothing
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._worker, name=f"training-job-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+    
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            try:
+                job.run()
+            finally:
+                self._queue.task_done()
+    
+    def _prune(self):
+        # Caller holds the lock; only finished jobs are ever dropped
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
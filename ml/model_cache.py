@@ -0,0 +1,92 @@
+import os
+import time
+import pickle
+import threading
+
+from utils.cache import LRUCache
+
+DEFAULT_MODEL_CACHE_MAX_BYTES = 256 * 1024 * 1024  # 256MB of unpickled models
+
+
+class ModelCache:
+    """Unpickled saved models kept in memory, shared by prediction and model inspection.
+    
+    Entries are keyed by model id and the pickle's modification time, so
+    a model file that is rewritten is loaded again rather than served
+    stale. The pickle's size stands in for the model's size in memory
+    when the byte budget is enforced (least recently used first out).
+    Cached model data is shared between requests and must not be
+    modified; callers that change a model load their own copy with
+    load_fresh.
+    """
+    
+    def __init__(self, models_folder='models', max_bytes=DEFAULT_MODEL_CACHE_MAX_BYTES):
+        self.models_folder = models_folder
+        self.cache = LRUCache(max_bytes, sizeof=lambda entry: entry['bytes'])
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.load_seconds = 0.0
+    
+    def get(self, model_id):
+        """The saved model's data (the dict that was pickled); raises ValueError if there is no such model"""
+        path, stat = self._stat(model_id)
+        key = (model_id, stat.st_mtime_ns)
+        entry = self.cache.get(key)
+        if entry is not None:
+            return entry['data']
+    
+        data = self._load(path)
+        # Older versions of a rewritten model can never be hit again
+        self.cache.discard_where(lambda cached: cached[0] == model_id and cached != key)
+        self.cache.put(key, {'data': data, 'bytes': stat.st_size})
+        return data
+    
+    def load_fresh(self, model_id):
+        """A private copy of the saved model, read from disk and not cached"""
+        path, _ = self._stat(model_id)
+        return self._load(path)
+    
+    def warm(self, limit=None):
+        """Load the most recently saved models (at most limit) until the cache budget is full; returns how many"""
+        if not os.path.exists(self.models_folder):
+            return 0
+        files = [entry for entry in os.scandir(self.models_folder) if entry.name.endswith('.pkl')]
+        files.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        loaded = 0
+        budget = self.cache.max_bytes
+        for entry in files[:limit]:
+            size = entry.stat().st_size
+            if size > budget:
+                break
+            try:
+                self.get(entry.name[:-4])
+            except Exception:
+                continue
+            budget -= size
+            loaded += 1
+        return loaded
+    
+    def stats(self):
+        """LRU hit/miss counters and memory usage plus the time spent unpickling models"""
+        stats = self.cache.stats()
+        with self._lock:
+            stats['loads'] = self.loads
+            stats['load_seconds'] = self.load_seconds
+            stats['avg_load_seconds'] = self.load_seconds / self.loads if self.loads else 0.0
+        return stats
+    
+    def _stat(self, model_id):
+        path = os.path.join(self.models_folder, f"{model_id}.pkl")
+        try:
+            return path, os.stat(path)
+        except FileNotFoundError:
+            raise ValueError(f"Model {model_id} not found")
+    
+    def _load(self, path):
+        start = time.perf_counter()
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        with self._lock:
+            self.loads += 1
+            self.load_seconds += time.perf_counter() - start
+        return data
@@ -1,14 +1,15 @@
 import os
+import uuid
 import pickle
 import json
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.tree import DecisionTreeClassifier
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.svm import SVC
 from sklearn.naive_bayes import GaussianNB
@@ -16,122 +17,265 @@ from sklearn.metrics import (
     accuracy_score, classification_report, confusion_matrix,
     precision_score, recall_score, f1_score, roc_auc_score
 )
+from functools import partial
 import warnings
 warnings.filterwarnings('ignore')
 
+from utils.dtypes import is_categorical_dtype, is_numeric_feature_dtype
+from utils.encoding import CategoryEncoder, as_category_encoder, feature_matrix, UNSEEN_CODE, ENCODED_SUFFIX
+from ml.parallel import run_in_processes, default_workers, CANCELLED_MESSAGE
+from ml.model_cache import ModelCache
+from ml.search import SuccessiveHalvingSearch, candidate_grid, DEFAULT_FOLDS, DEFAULT_FACTOR
+
+ALL_MODEL_TYPES = ['logistic_regression', 'decision_tree', 'random_forest',
+                   'knn', 'svm', 'gradient_boosting', 'naive_bayes', 'sgd',
+                   'hist_gradient_boosting', 'linear_svm']
+# Models trained on standardized features
+SCALED_MODEL_TYPES = ['logistic_regression', 'knn', 'svm', 'sgd', 'linear_svm', 'knn_sampled']
+# Linear models trained with partial_fit over row chunks, so training never needs the whole matrix scaled
+CHUNKED_MODEL_TYPES = ['sgd', 'linear_svm']
+# Scaled models that standardize only the rows they touch
+ROW_SCALED_MODEL_TYPES = CHUNKED_MODEL_TYPES + ['knn_sampled']
+# Models update_model can continue training on new rows
+INCREMENTAL_MODEL_TYPES = ['random_forest', 'gradient_boosting', 'naive_bayes', 'sgd', 'linear_svm']
+# Stand-ins whose training time grows about linearly with rows, used for large datasets
+SCALABLE_VARIANTS = {
+    'svm': 'linear_svm',
+    'gradient_boosting': 'hist_gradient_boosting',
+    'knn': 'knn_sampled'
+}
+KNN_SAMPLE_ROWS = 50000
+DEFAULT_CHUNK_ROWS = 100000
+# Rough working memory of one fit, as a multiple of the training matrix, on top of FIT_OVERHEAD_BYTES
+# (trees keep a float32 copy plus per-tree sample indices, SVC adds its kernel cache, SGD sees one chunk)
+MODEL_MEMORY_FACTORS = {
+    'logistic_regression': 1.0,
+    'decision_tree': 1.0,
+    'random_forest': 2.0,
+    'knn': 1.0,
+    'svm': 2.0,
+    'gradient_boosting': 1.5,
+    'naive_bayes': 0.25,
+    'sgd': 0.25,
+    'linear_svm': 0.25,
+    'hist_gradient_boosting': 0.5,
+    'knn_sampled': 0.25
+}
+FIT_OVERHEAD_BYTES = 64 * 1024 * 1024
+SVM_CACHE_BYTES = 200 * 1024 * 1024
+
+class PreparedSplit:
+    """A dataset encoded, split and scaled once, shared by every model in a comparison.
+    
+    X is one contiguous feature matrix holding the training rows first and
+    the test rows after them (train_index and test_index are their
+    positions in the original frame), so X_train and X_test are views
+    rather than copies. The StandardScaler is fitted on the training rows.
+    scale picks how the standardized matrix for scaled models is made:
+    'copy' builds it up front, 'in_place' standardizes X itself when no
+    model needs the raw values, and None builds it only if a model asks
+    for it. A split pickled to a worker process carries X once; the
+    views and any scaled copy are rebuilt on the other side.
+    """
+    
+    def __init__(self, X, y, feature_columns, target_column, train_index, test_index, label_encoders=None,
+                 scale=None):
+        self.X = X
+        self.y = y
+        self.feature_columns = feature_columns
+        self.target_column = target_column
+        # Fitted on this dataset alone: one per encoded feature column, plus the target's if it was encoded
+        self.label_encoders = label_encoders if label_encoders is not None else {}
+        self.train_index = train_index
+        self.test_index = test_index
+        self.n_train = len(train_index)
+        self._views()
+        self.scaler = StandardScaler()
+        self.scaler.fit(self.X_train)
+        self._scaled = None
+        if scale == 'in_place':
+            self._scaled = self._standardize(X, out=X)
+        elif scale == 'copy':
+            self._scaled = self._standardize(X)
+    
+    def _views(self):
+        # Frames over row-slice views keep the feature names, so fitted models and scalers know their columns
+        self.X_train = pd.DataFrame(self.X[:self.n_train], columns=self.feature_columns, copy=False)
+        self.X_test = pd.DataFrame(self.X[self.n_train:], columns=self.feature_columns, copy=False)
+        self.y_train = self.y[:self.n_train]
+        self.y_test = self.y[self.n_train:]
+    
+    def __getstate__(self):
+        # Views would be pickled as copies of their rows; a scaled copy is cheaper to rebuild than to send
+        state = self.__dict__.copy()
+        for name in ('X_train', 'X_test', 'y_train', 'y_test'):
+            del state[name]
+        state['_scaled_in_place'] = self._scaled is self.X
+        state['_scaled'] = None
+        return state
+    
+    def __setstate__(self, state):
+        scaled_in_place = state.pop('_scaled_in_place')
+        self.__dict__.update(state)
+        self._views()
+        if scaled_in_place:
+            self._scaled = self.X
+    
+    def scaled_rows(self, rows):
+        """Standardized rows of X (a slice or positions), without building the whole scaled matrix"""
+        if self._scaled is not None:
+            return self._scaled[rows]
+        return self._standardize(self.X[rows])
+    
+    @property
+    def X_train_scaled(self):
+        return self._scaled_matrix()[:self.n_train]
+    
+    @property
+    def X_test_scaled(self):
+        return self._scaled_matrix()[self.n_train:]
+    
+    def _scaled_matrix(self):
+        if self._scaled is None:
+            self._scaled = self._standardize(self.X)
+        return self._scaled
+    
+    def _standardize(self, X, out=None):
+        # Same arithmetic as scaler.transform, without its intermediate copies
+        out = np.subtract(X, self.scaler.mean_.astype(X.dtype), out=out)
+        out /= self.scaler.scale_.astype(X.dtype)
+        return out
+
+
 class ModelTrainer:
-    def __init__(self, models_folder='models'):
+    def __init__(self, models_folder='models', train_workers=None, model_timeout=None, feature_dtype='float64',
+                 scalable_row_threshold=None, chunk_rows=DEFAULT_CHUNK_ROWS, model_cache=None):
+        """train_workers: processes used by train_multiple_models (None: one per CPU, 1: train serially);
+        model_timeout: seconds one model may train in a worker process before it is stopped;
+        feature_dtype: float64, or float32 to halve the feature matrix;
+        scalable_row_threshold: above this many rows svm, gradient_boosting and knn are replaced by
+        their SCALABLE_VARIANTS (None or 0: never); chunk_rows: rows per partial_fit step;
+        model_cache: ModelCache of saved models, shared with the ModelPredictor (None: a private one)"""
         self.models_folder = models_folder
+        self.feature_dtype = np.dtype(feature_dtype)
+        self.scalable_row_threshold = scalable_row_threshold
+        self.chunk_rows = chunk_rows
         os.makedirs(models_folder, exist_ok=True)
+        self.model_cache = model_cache or ModelCache(models_folder)
         self.models = {}
         self.scalers = {}
-        self.label_encoders = {}
         self.model_metadata = {}
+        self.train_workers = train_workers
+        self.model_timeout = model_timeout
     
-    def train_model(self, df, target_column, feature_selection=None, model_config=None):
-        """Train a single ML model"""
-        if model_config is None:
-            model_config = {}
-        
-        model_type = model_config.get('model_type', 'random_forest')
-        
+    def __getstate__(self):
+        # What a worker process needs to train and save a model: settings, not trained models or caches
+        state = self.__dict__.copy()
+        state.update(models={}, scalers={}, model_metadata={}, model_cache=None)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.model_cache = ModelCache(self.models_folder)
+    
+    def prepare_split(self, df, target_column, feature_selection=None, test_size=0.2, random_state=42, scale=None):
+        """Encode, split and scale a dataset once so several models can train on it (scale: see PreparedSplit)"""
         # Prepare data
         if feature_selection is None or len(feature_selection) == 0:
             # Auto-select features (exclude target and non-numeric)
             feature_cols = [col for col in df.columns 
-                          if col != target_column and df[col].dtype in ['int64', 'float64']]
+                          if col != target_column and is_numeric_feature_dtype(df[col].dtype)]
         else:
-            feature_cols = feature_selection
+            feature_cols = list(feature_selection)
         
-        # Encode categorical features
-        df_encoded = df.copy()
-        categorical_features = [col for col in feature_cols if df[col].dtype == 'object']
+        y = df[target_column]
+        # Encoders are fitted afresh for every dataset, so codes depend on this data alone
+        label_encoders = {}
         
-        for col in categorical_features:
-            if col not in self.label_encoders:
-                le = LabelEncoder()
-                df_encoded[col + '_encoded'] = le.fit_transform(df[col].astype(str))
-                self.label_encoders[col] = le
-            else:
-                df_encoded[col + '_encoded'] = self.label_encoders[col].transform(df[col].astype(str))
-            
-            # Replace original with encoded in feature_cols
-            feature_cols = [c + '_encoded' if c == col else c for c in feature_cols]
-        
-        X = df_encoded[feature_cols]
-        y = df_encoded[target_column]
-        
-        # Encode target if categorical
-        if y.dtype == 'object':
-            if target_column not in self.label_encoders:
-                le_target = LabelEncoder()
-                y_encoded = le_target.fit_transform(y)
-                self.label_encoders[target_column] = le_target
-            else:
-                y_encoded = self.label_encoders[target_column].transform(y)
-            y = pd.Series(y_encoded)
-        
-        # Split data
-        test_size = model_config.get('test_size', 0.2)
-        random_state = model_config.get('random_state', 42)
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=test_size, random_state=random_state, stratify=y if len(y.unique()) > 1 else None
+        # Encode target if categorical (labels keep their type so predictions decode to the original values)
+        if is_categorical_dtype(y.dtype):
+            label_encoders[target_column] = CategoryEncoder(stringify=False)
+            y = label_encoders[target_column].fit_transform(y)
+        else:
+            y = y.to_numpy()
+        
+        # Split data (row positions only; the split is the same one train_test_split(X, y) would make)
+        train_index, test_index = train_test_split(
+            np.arange(len(df)), test_size=test_size, random_state=random_state,
+            stratify=y if len(pd.unique(y)) > 1 else None
         )
+        order = np.concatenate([train_index, test_index])
+        
+        # Build the feature matrix one selected column at a time, rows already in train-then-test order;
+        # the frame is never copied and categoricals are label-encoded on the way
+        X = np.empty((len(df), len(feature_cols)), dtype=self.feature_dtype, order='F')
+        for j, col in enumerate(feature_cols):
+            if is_categorical_dtype(df[col].dtype):
+                label_encoders[col] = CategoryEncoder()
+                X[:, j] = label_encoders[col].fit_transform(df[col])[order]
+                # Replace original with encoded in feature_cols
+                feature_cols[j] = col + ENCODED_SUFFIX
+            else:
+                np.take(df[col].to_numpy(dtype=self.feature_dtype, na_value=np.nan), order, out=X[:, j])
+        
+        return PreparedSplit(X, y[order], feature_cols, target_column, train_index, test_index,
+                             label_encoders=label_encoders, scale=scale)
+    
+    def train_model(self, df, target_column, feature_selection=None, model_config=None, prepared=None):
+        """Train a single ML model (prepared: a PreparedSplit of df to reuse instead of preprocessing again)"""
+        if model_config is None:
+            model_config = {}
+        
+        model_config = self.scalable_config(model_config, len(df) if prepared is None else len(prepared.y))
+        model_type = model_config.get('model_type', 'random_forest')
         
-        # Scale features
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
+        if prepared is None:
+            prepared = self.prepare_split(df, target_column, feature_selection,
+                                          test_size=model_config.get('test_size', 0.2),
+                                          random_state=model_config.get('random_state', 42),
+                                          scale='in_place' if model_type in SCALED_MODEL_TYPES else None)
+        feature_cols = prepared.feature_columns
+        X_train, X_test = prepared.X_train, prepared.X_test
+        y_train, y_test = prepared.y_train, prepared.y_test
+        scaler = prepared.scaler
         self.scalers[model_type] = scaler
         
         # Create and train model
         model = self._create_model(model_type, model_config)
         
         # Train
-        if model_type in ['logistic_regression', 'knn', 'svm']:
-            model.fit(X_train_scaled, y_train)
-            y_pred = model.predict(X_test_scaled)
+        if model_type in CHUNKED_MODEL_TYPES:
+            self._fit_in_chunks(model, prepared.scaled_rows, y_train, model_config)
+            y_pred = self._predict_in_chunks(model, prepared)
+        elif model_type == 'knn_sampled':
+            rows = self._sample_rows(prepared.n_train, model_config)
+            model.fit(prepared.scaled_rows(rows), y_train[rows])
+            y_pred = self._predict_in_chunks(model, prepared)
+        elif model_type in SCALED_MODEL_TYPES:
+            model.fit(prepared.X_train_scaled, y_train)
+            y_pred = model.predict(prepared.X_test_scaled)
         else:
             model.fit(X_train, y_train)
             y_pred = model.predict(X_test)
         
         # Evaluate
-        accuracy = accuracy_score(y_test, y_pred)
-        
-        # Additional metrics
-        metrics = {
-            'accuracy': float(accuracy),
-            'precision': float(precision_score(y_test, y_pred, average='weighted', zero_division=0)),
-            'recall': float(recall_score(y_test, y_pred, average='weighted', zero_division=0)),
-            'f1_score': float(f1_score(y_test, y_pred, average='weighted', zero_division=0))
-        }
-        
-        # Classification report
-        try:
-            report = classification_report(y_test, y_pred, output_dict=True, zero_division=0)
-        except:
-            report = {}
-        
-        # Confusion matrix
-        cm = confusion_matrix(y_test, y_pred).tolist()
+        accuracy, metrics, report, cm = self._evaluate(y_test, y_pred)
         
         # Save model
-        model_id = f"{model_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        model_path = os.path.join(self.models_folder, f"{model_id}.pkl")
-        
-        with open(model_path, 'wb') as f:
-            pickle.dump({
-                'model': model,
-                'scaler': scaler if model_type in ['logistic_regression', 'knn', 'svm'] else None,
-                'feature_columns': feature_cols,
-                'target_column': target_column,
-                'label_encoders': self.label_encoders,
-                'model_type': model_type
-            }, f)
+        model_id = self._save_model(model_type, {
+            'model': model,
+            'scaler': scaler if model_type in SCALED_MODEL_TYPES else None,
+            'feature_columns': feature_cols,
+            'target_column': target_column,
+            'label_encoders': prepared.label_encoders,
+            'model_type': model_type,
+            'train_size': len(X_train)
+        })
         
         # Store metadata
         self.model_metadata[model_id] = {
             'model_type': model_type,
+            'requested_model_type': model_config.get('requested_model_type', model_type),
             'accuracy': accuracy,
             'metrics': metrics,
             'feature_columns': feature_cols,
@@ -149,6 +293,7 @@ class ModelTrainer:
         return {
             'model_id': model_id,
             'model_type': model_type,
+            'requested_model_type': model_config.get('requested_model_type', model_type),
             'accuracy': accuracy,
             'metrics': metrics,
             'classification_report': report,
@@ -158,29 +303,343 @@ class ModelTrainer:
             'test_size': len(X_test)
         }
     
-    def train_multiple_models(self, df, target_column, feature_selection=None, models_to_train=None):
-        """Train multiple models and compare"""
+    def update_model(self, model_id, df, model_config=None):
+        """Continue training a saved model on new rows only and save the result as a new model.
+        
+        Tree ensembles (random_forest, gradient_boosting) keep their trees
+        and add n_estimators more (warm start) fitted on the new rows;
+        naive_bayes and sgd models take a partial_fit step. The scaler is
+        updated with the new rows' running statistics and unseen categories
+        are appended to the label encoders, so nothing from earlier batches
+        is reprocessed. A test_size share of the new rows is held out to
+        evaluate the updated model (and, for comparison, the previous one).
+        """
+        if model_config is None:
+            model_config = {}
+        
+        model_data = self._load_model(model_id)
+        model_type = model_data.get('model_type', 'unknown')
+        if model_type not in INCREMENTAL_MODEL_TYPES:
+            raise ValueError(f"{model_type} models cannot be trained incrementally; train a new model instead")
+        model = model_data['model']
+        scaler = model_data.get('scaler')
+        feature_cols = model_data.get('feature_columns', [])
+        target_column = model_data.get('target_column')
+        # Models saved before CategoryEncoder existed carry LabelEncoders; they are converted (same codes)
+        label_encoders = {col: as_category_encoder(encoder, stringify=col != target_column)
+                          for col, encoder in model_data.get('label_encoders', {}).items()}
+        
+        if target_column not in df.columns:
+            raise ValueError(f"Missing target column: {target_column}")
+        X = feature_matrix(df, feature_cols, label_encoders, extend=True)
+        y = df[target_column]
+        if target_column in label_encoders:
+            y = label_encoders[target_column].transform(y)
+            if (y == UNSEEN_CODE).any():
+                unseen = pd.unique(df[target_column][y == UNSEEN_CODE])
+                raise ValueError(f"New target classes {list(unseen)} cannot be added incrementally; "
+                                 "train a new model instead")
+        else:
+            y = y.to_numpy()
+        
+        train_index, test_index = train_test_split(
+            np.arange(len(df)), test_size=model_config.get('test_size', 0.2),
+            random_state=model_config.get('random_state', 42),
+            stratify=y if len(pd.unique(y)) > 1 else None
+        )
+        X_train = pd.DataFrame(X[train_index], columns=feature_cols)
+        X_test = pd.DataFrame(X[test_index], columns=feature_cols)
+        y_train, y_test = y[train_index], y[test_index]
+        
+        # The previous model's score on the same held-out rows, before anything changes
+        previous_pred = model.predict(scaler.transform(X_test) if scaler is not None else X_test)
+        previous_accuracy = float(accuracy_score(y_test, previous_pred))
+        
+        if scaler is not None:
+            scaler.partial_fit(X_train)
+            X_train, X_test = scaler.transform(X_train), scaler.transform(X_test)
+        
+        if model_type in ('random_forest', 'gradient_boosting'):
+            # New trees learn the new rows; old trees are kept as they are
+            if not np.array_equal(np.unique(y_train), model.classes_):
+                raise ValueError(f"New rows must include every target class to add {model_type} trees; "
+                                 "train a new model instead")
+            added = model_config.get('n_estimators', 10)
+            model.set_params(warm_start=True, n_estimators=model.n_estimators + added)
+            model.fit(X_train, y_train)
+        else:
+            model.partial_fit(X_train, y_train)
+        y_pred = model.predict(X_test)
+        
+        accuracy, metrics, report, cm = self._evaluate(y_test, y_pred)
+        train_size = model_data.get('train_size', 0) + len(train_index)
+        new_model_id = self._save_model(model_type, {
+            'model': model,
+            'scaler': scaler,
+            'feature_columns': feature_cols,
+            'target_column': target_column,
+            'label_encoders': label_encoders,
+            'model_type': model_type,
+            'train_size': train_size,
+            'parent_model_id': model_id
+        })
+        
+        self.model_metadata[new_model_id] = {
+            'model_type': model_type,
+            'accuracy': accuracy,
+            'metrics': metrics,
+            'feature_columns': feature_cols,
+            'target_column': target_column,
+            'train_size': train_size,
+            'test_size': len(test_index),
+            'parent_model_id': model_id,
+            'created_at': datetime.now().isoformat()
+        }
+        
+        feature_importance = None
+        if hasattr(model, 'feature_importances_'):
+            feature_importance = dict(zip(feature_cols, model.feature_importances_.tolist()))
+        
+        return {
+            'model_id': new_model_id,
+            'model_type': model_type,
+            'parent_model_id': model_id,
+            'accuracy': accuracy,
+            'previous_accuracy': previous_accuracy,
+            'metrics': metrics,
+            'classification_report': report,
+            'confusion_matrix': cm,
+            'feature_importance': feature_importance,
+            'new_rows': len(train_index),
+            'train_size': train_size,
+            'test_size': len(test_index)
+        }
+    
+    def update_in_process(self, model_id, df, model_config=None, timeout=None, on_start=None, on_result=None,
+                          cancel=None, threads=None):
+        """update_model in a worker process and return its result.
+        
+        The worker is stopped after timeout seconds (default: model_timeout)
+        or when cancel is set, and the result then carries the error.
+        on_start(0) and on_result(0, result) report progress like
+        train_models; threads caps the worker's BLAS/OpenMP threads without
+        touching this process.
+        """
+        if timeout is None:
+            timeout = self.model_timeout
+        result = None
+        
+        def done(index, ok, value):
+            nonlocal result
+            if ok:
+                result, metadata = value
+                self.model_metadata[result['model_id']] = metadata
+            else:
+                result = {'parent_model_id': model_id, 'error': value}
+                if value == CANCELLED_MESSAGE:
+                    result['cancelled'] = True
+            if on_result is not None:
+                on_result(index, result)
+        
+        run_in_processes([partial(self._update_isolated, model_id, df, model_config)], 1, timeout,
+                         on_start=on_start, on_done=done, cancel=cancel, threads=threads)
+        return result
+    
+    def _update_isolated(self, model_id, df, model_config):
+        # Runs in a worker process, which receives this trainer and the new rows pickled
+        result = self.update_model(model_id, df, model_config)
+        return result, self.model_metadata[result['model_id']]
+    
+    def train_multiple_models(self, df, target_column, feature_selection=None, models_to_train=None,
+                              workers=None, timeout=None):
+        """Train multiple models and compare (see train_models for how they are run)"""
         if models_to_train is None or models_to_train == ['all']:
-            models_to_train = ['logistic_regression', 'decision_tree', 'random_forest', 
-                             'knn', 'svm', 'gradient_boosting', 'naive_bayes']
+            models_to_train = ALL_MODEL_TYPES
+        results = self.train_models(df, target_column, feature_selection,
+                                    [{'model_type': model_type} for model_type in models_to_train],
+                                    workers=workers, timeout=timeout)
+        return self.compare_results(results)
+    
+    def train_models(self, df, target_column, feature_selection, model_configs, workers=None, timeout=None,
+                     on_start=None, on_result=None, cancel=None, threads=None):
+        """Train one model per config and return their results in config order.
         
-        results = []
+        The dataset is encoded, split and scaled once (test_size and
+        random_state come from the first config) and every model trains on
+        that same split. With more than one worker, or when a cancel event
+        or a thread cap is given, every model is trained in its own process (at most
+        workers at a time); a model still training after timeout seconds,
+        or when cancel is set, is stopped and reported as failed.
+        on_start(index) and on_result(index, result) report progress as
+        models start and finish. threads caps each model's BLAS/OpenMP
+        threads and is its n_jobs, so workers * threads bounds the cores used.
+        """
+        model_configs = [self.scalable_config(config, len(df)) for config in model_configs]
+        if threads is not None:
+            model_configs = [dict(config, n_jobs=config.get('n_jobs', threads)) for config in model_configs]
+        model_types = [config.get('model_type', 'random_forest') for config in model_configs]
+        if workers is None:
+            workers = self.train_workers if self.train_workers is not None else default_workers(len(model_configs))
+        if timeout is None:
+            timeout = self.model_timeout
+        first = model_configs[0] if model_configs else {}
+        
+        # Standardize in place when every model is a scaled one; otherwise keep the raw matrix and let
+        # a model that needs the whole scaled matrix build it (once per worker process, or once in total)
+        scale = 'in_place' if all(model_type in SCALED_MODEL_TYPES for model_type in model_types) else None
+        try:
+            prepared = self.prepare_split(df, target_column, feature_selection,
+                                          test_size=first.get('test_size', 0.2),
+                                          random_state=first.get('random_state', 42), scale=scale)
+        except Exception as e:
+            # Nothing can train on a dataset that cannot be prepared
+            results = [{'model_type': model_type, 'error': str(e)} for model_type in model_types]
+            for index, result in enumerate(results):
+                if on_result is not None:
+                    on_result(index, result)
+            return results
         
-        for model_type in models_to_train:
+        # Thread caps are process-wide, so capped models always train in worker processes
+        if cancel is not None or threads is not None or (workers > 1 and len(model_configs) > 1):
+            return self._train_in_processes(prepared, model_configs, workers, timeout,
+                                            on_start, on_result, cancel, threads)
+        
+        results = []
+        for index, (model_type, model_config) in enumerate(zip(model_types, model_configs)):
+            if on_start is not None:
+                on_start(index)
             try:
                 result = self.train_model(
                     df=df,
                     target_column=target_column,
                     feature_selection=feature_selection,
-                    model_config={'model_type': model_type}
+                    model_config=model_config,
+                    prepared=prepared
                 )
-                results.append(result)
             except Exception as e:
-                results.append({
+                result = {
                     'model_type': model_type,
                     'error': str(e)
-                })
+                }
+            results.append(result)
+            if on_result is not None:
+                on_result(index, result)
+        return results
+    
+    def search_hyperparameters(self, df, target_column, feature_selection=None, model_type='random_forest',
+                               param_grid=None, cv_folds=DEFAULT_FOLDS, factor=DEFAULT_FACTOR, max_candidates=None,
+                               test_size=0.2, random_state=42, workers=None, timeout=None,
+                               on_start=None, on_result=None, cancel=None, threads=None):
+        """Tune one model type by cross-validated successive halving, then train and save the best config.
         
+        Candidates come from param_grid (default: the model type's entry in
+        PARAM_SPACES), or a random max_candidates of them. The search
+        cross-validates on the training rows only; the winner is retrained
+        on the whole training split and evaluated on the held-out test rows
+        like any train_model result. Folds run in worker processes (at most
+        workers at a time, each stopped after timeout seconds).
+        on_start(stage) and on_result(stage, result) report each halving
+        round and then the final fit (stage == number of rounds). threads
+        caps each fit's BLAS/OpenMP threads.
+        """
+        if workers is None:
+            workers = self.train_workers
+        if timeout is None:
+            timeout = self.model_timeout
+        candidates = candidate_grid(model_type, param_grid, max_candidates, random_state)
+        if not candidates:
+            raise ValueError("The parameter grid has no candidates")
+        search = SuccessiveHalvingSearch(self._fit_fold, model_type, candidates,
+                                         scaled=model_type in SCALED_MODEL_TYPES, n_folds=cv_folds,
+                                         factor=factor, random_state=random_state)
+        
+        prepared = self.prepare_split(df, target_column, feature_selection,
+                                      test_size=test_size, random_state=random_state)
+        rounds = []
+        
+        def round_end(stage, summary):
+            rounds.append(summary)
+            if on_result is not None:
+                on_result(stage, summary)
+        
+        leaderboard = search.run(prepared.X[:prepared.n_train], prepared.y_train, workers, timeout,
+                                 on_round_start=on_start, on_round_end=round_end, cancel=cancel, threads=threads)
+        
+        best_model = None
+        best = leaderboard[0]
+        if 'mean_score' in best and not (cancel is not None and cancel.is_set()):
+            # The tuned type is trained as it is, even where the large-dataset policy would swap it
+            model_config = dict({'random_state': random_state}, **best['params'],
+                                model_type=model_type, scalable=False)
+            
+            def final_start(index):
+                if on_start is not None:
+                    on_start(search.rounds)
+            
+            def final_result(index, result):
+                if 'error' not in result:
+                    result['params'] = best['params']
+                    result['cv_score'] = best['mean_score']
+                if on_result is not None:
+                    on_result(search.rounds, result)
+            
+            best_model = self._train_in_processes(prepared, [model_config], 1, timeout,
+                                                  final_start, final_result, cancel, threads)[0]
+        
+        return {
+            'model_type': model_type,
+            'cv_folds': cv_folds,
+            'factor': factor,
+            'candidates': len(candidates),
+            'rounds': rounds,
+            'leaderboard': leaderboard,
+            'best_model': best_model
+        }
+    
+    def scalable_config(self, model_config, n_rows):
+        """model_config with its model type replaced by the scalable variant when the dataset is large.
+        
+        Applies above scalable_row_threshold rows to the types in
+        SCALABLE_VARIANTS, unless the config sets 'scalable': false; the
+        requested type is kept as 'requested_model_type'.
+        """
+        model_type = model_config.get('model_type', 'random_forest')
+        if (not self.scalable_row_threshold or n_rows <= self.scalable_row_threshold
+                or model_type not in SCALABLE_VARIANTS or not model_config.get('scalable', True)):
+            return model_config
+        return dict(model_config, model_type=SCALABLE_VARIANTS[model_type], requested_model_type=model_type)
+    
+    def estimate_memory(self, df, target_column, feature_selection, model_types, concurrent=1):
+        """Bytes a training call on df is expected to need, from the dataset's shape alone.
+        
+        Counts the feature matrix built in the caller and, for each of the
+        concurrent largest fits, the worker process's own copy of it, the
+        scaled copy when the model needs one and the fit's working memory.
+        A rough upper figure for admission control, not a measurement.
+        """
+        if feature_selection:
+            n_features = len(feature_selection)
+        else:
+            n_features = sum(1 for col in df.columns
+                             if col != target_column and is_numeric_feature_dtype(df[col].dtype))
+        model_types = [SCALABLE_VARIANTS.get(model_type, model_type)
+                       if self.scalable_row_threshold and len(df) > self.scalable_row_threshold else model_type
+                       for model_type in model_types]
+        matrix_bytes = len(df) * n_features * self.feature_dtype.itemsize
+        
+        total = matrix_bytes
+        fits = []
+        for model_type in model_types:
+            copies = 1 + MODEL_MEMORY_FACTORS.get(model_type, 1.0)
+            if model_type in SCALED_MODEL_TYPES and model_type not in ROW_SCALED_MODEL_TYPES:
+                copies += 1
+            fits.append(matrix_bytes * copies + FIT_OVERHEAD_BYTES + (SVM_CACHE_BYTES if model_type == 'svm' else 0))
+        fits.sort(reverse=True)
+        return int(total + sum(fits[:max(1, concurrent)]))
+    
+    @staticmethod
+    def compare_results(results):
+        """The train-multiple response: every result, the most accurate model and a comparison"""
         # Sort by accuracy
         successful_results = [r for r in results if 'accuracy' in r]
         if successful_results:
@@ -198,7 +657,121 @@ class ModelTrainer:
             }
         }
     
-    def _create_model(self, model_type, config):
+    def _train_in_processes(self, prepared, model_configs, workers, timeout, on_start, on_result, cancel,
+                            threads=None):
+        """train_model for each config in worker processes, merging their state back as they finish"""
+        tasks = [partial(self._train_isolated, prepared, model_config) for model_config in model_configs]
+        results = [None] * len(model_configs)
+        
+        def done(index, ok, value):
+            model_type = model_configs[index].get('model_type', 'random_forest')
+            if ok:
+                result, metadata = value
+                self.model_metadata[result['model_id']] = metadata
+                self.scalers[model_type] = prepared.scaler
+            else:
+                result = {'model_type': model_type, 'error': value}
+                if value == CANCELLED_MESSAGE:
+                    result['cancelled'] = True
+            results[index] = result
+            if on_result is not None:
+                on_result(index, result)
+        
+        run_in_processes(tasks, workers, timeout, on_start=on_start, on_done=done, cancel=cancel, threads=threads)
+        return results
+    
+    def _train_isolated(self, prepared, model_config):
+        # Runs in a worker process, which receives this trainer and the prepared split pickled
+        result = self.train_model(None, prepared.target_column, model_config=model_config, prepared=prepared)
+        return result, self.model_metadata[result['model_id']]
+    
+    def _fit_in_chunks(self, model, rows_of, y_train, config):
+        """Out-of-core style training: epochs of partial_fit over chunk_rows-row slices in shuffled order.
+        
+        rows_of(rows) returns the (scaled) training rows of a slice, so the
+        whole scaled matrix never has to exist.
+        """
+        classes = np.unique(y_train)
+        starts = np.arange(0, len(y_train), self.chunk_rows)
+        rng = np.random.default_rng(config.get('random_state', 42))
+        for _ in range(config.get('epochs', 5)):
+            for start in rng.permutation(starts):
+                rows = slice(start, min(start + self.chunk_rows, len(y_train)))
+                model.partial_fit(rows_of(rows), y_train[rows], classes=classes)
+    
+    @staticmethod
+    def _sample_rows(n_rows, config):
+        # knn_sampled: neighbours come from a uniform sample of the training rows, bounding fit and query cost
+        sample_rows = min(n_rows, config.get('max_rows', KNN_SAMPLE_ROWS))
+        rng = np.random.default_rng(config.get('random_state', 42))
+        return np.sort(rng.choice(n_rows, size=sample_rows, replace=False))
+    
+    def _fit_fold(self, model_type, config, X_train, y_train):
+        """A model fitted on one cross-validation fold (X_train scaled if need be), exactly as train_model fits it"""
+        model = self._create_model(model_type, config)
+        if model_type in CHUNKED_MODEL_TYPES:
+            self._fit_in_chunks(model, X_train.__getitem__, y_train, config)
+        elif model_type == 'knn_sampled':
+            rows = self._sample_rows(len(y_train), config)
+            model.fit(X_train[rows], y_train[rows])
+        else:
+            model.fit(X_train, y_train)
+        return model
+    
+    def _predict_in_chunks(self, model, prepared):
+        # Test rows follow the training rows in X
+        total = len(prepared.y)
+        return np.concatenate([model.predict(prepared.scaled_rows(slice(start, min(start + self.chunk_rows, total))))
+                               for start in range(prepared.n_train, total, self.chunk_rows)])
+    
+    @staticmethod
+    def _evaluate(y_test, y_pred):
+        """Accuracy, weighted metrics, classification report and confusion matrix on the test rows"""
+        accuracy = accuracy_score(y_test, y_pred)
+        
+        # Additional metrics
+        metrics = {
+            'accuracy': float(accuracy),
+            'precision': float(precision_score(y_test, y_pred, average='weighted', zero_division=0)),
+            'recall': float(recall_score(y_test, y_pred, average='weighted', zero_division=0)),
+            'f1_score': float(f1_score(y_test, y_pred, average='weighted', zero_division=0))
+        }
+        
+        # Classification report
+        try:
+            report = classification_report(y_test, y_pred, output_dict=True, zero_division=0)
+        except:
+            report = {}
+        
+        # Confusion matrix
+        cm = confusion_matrix(y_test, y_pred).tolist()
+        return accuracy, metrics, report, cm
+    
+    def _save_model(self, model_type, model_data):
+        """Pickle a model and what predicting with it needs; returns the new model id.
+        
+        Ids are the model type, the time and a random suffix, and the file
+        is created exclusively, so models saved in the same second (by
+        parallel workers, concurrent jobs or an update right after training)
+        never overwrite each other.
+        """
+        while True:
+            model_id = f"{model_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+            model_path = os.path.join(self.models_folder, f"{model_id}.pkl")
+            try:
+                f = open(model_path, 'xb')
+            except FileExistsError:
+                continue
+            with f:
+                pickle.dump(model_data, f)
+            return model_id
+    
+    def _load_model(self, model_id):
+        # A private copy: update_model changes the model and its encoders in place
+        return self.model_cache.load_fresh(model_id)
+    
+    @staticmethod
+    def _create_model(model_type, config):
         """Create model instance based on type"""
         if model_type == 'logistic_regression':
             return LogisticRegression(
@@ -217,12 +790,14 @@ class ModelTrainer:
                 n_estimators=config.get('n_estimators', 100),
                 max_depth=config.get('max_depth', 5),
                 random_state=config.get('random_state', 42),
-                min_samples_split=config.get('min_samples_split', 2)
+                min_samples_split=config.get('min_samples_split', 2),
+                n_jobs=config.get('n_jobs')
             )
         elif model_type == 'knn':
             return KNeighborsClassifier(
                 n_neighbors=config.get('n_neighbors', 5),
-                weights=config.get('weights', 'uniform')
+                weights=config.get('weights', 'uniform'),
+                n_jobs=config.get('n_jobs')
             )
         elif model_type == 'svm':
             return SVC(
@@ -238,6 +813,33 @@ class ModelTrainer:
             )
         elif model_type == 'naive_bayes':
             return GaussianNB()
+        elif model_type == 'sgd':
+            return SGDClassifier(
+                loss=config.get('loss', 'log_loss'),
+                alpha=config.get('alpha', 0.0001),
+                max_iter=config.get('max_iter', 1000),
+                random_state=config.get('random_state', 42)
+            )
+        elif model_type == 'linear_svm':
+            return SGDClassifier(
+                loss='hinge',
+                alpha=config.get('alpha', 0.0001),
+                max_iter=config.get('max_iter', 1000),
+                random_state=config.get('random_state', 42)
+            )
+        elif model_type == 'hist_gradient_boosting':
+            return HistGradientBoostingClassifier(
+                max_iter=config.get('max_iter', 100),
+                max_depth=config.get('max_depth'),
+                learning_rate=config.get('learning_rate', 0.1),
+                random_state=config.get('random_state', 42)
+            )
+        elif model_type == 'knn_sampled':
+            return KNeighborsClassifier(
+                n_neighbors=config.get('n_neighbors', 5),
+                weights=config.get('weights', 'uniform'),
+                n_jobs=config.get('n_jobs')
+            )
         else:
             raise ValueError(f"Unknown model type: {model_type}")
     
@@ -247,28 +849,18 @@ class ModelTrainer:
             return self.model_metadata[model_id]
         
         # Try to load from file
-        model_path = os.path.join(self.models_folder, f"{model_id}.pkl")
-        if os.path.exists(model_path):
-            with open(model_path, 'rb') as f:
-                model_data = pickle.load(f)
-            
-            return {
-                'model_type': model_data.get('model_type', 'unknown'),
-                'feature_columns': model_data.get('feature_columns', []),
-                'target_column': model_data.get('target_column', 'unknown'),
-                'created_at': 'unknown'
-            }
+        model_data = self.model_cache.get(model_id)
         
-        raise ValueError(f"Model {model_id} not found")
+        return {
+            'model_type': model_data.get('model_type', 'unknown'),
+            'feature_columns': model_data.get('feature_columns', []),
+            'target_column': model_data.get('target_column', 'unknown'),
+            'created_at': 'unknown'
+        }
     
     def get_feature_importance(self, model_id):
         """Get feature importance for a model"""
-        model_path = os.path.join(self.models_folder, f"{model_id}.pkl")
-        if not os.path.exists(model_path):
-            raise ValueError(f"Model {model_id} not found")
-        
-        with open(model_path, 'rb') as f:
-            model_data = pickle.load(f)
+        model_data = self.model_cache.get(model_id)
         
         model = model_data['model']
         feature_columns = model_data.get('feature_columns', [])
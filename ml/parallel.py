@@ -0,0 +1,131 @@
+import os
+import time
+import multiprocessing
+from multiprocessing.connection import wait
+
+from ml.resources import limit_threads
+
+
+def default_workers(task_count):
+    """One worker per task, capped at the number of CPUs"""
+    return max(1, min(task_count, os.cpu_count() or 1))
+
+
+# Imported once by the fork server, so workers start with the main module (which they would otherwise
+# each re-import) and numpy, pandas and scikit-learn already loaded
+PRELOAD_MODULES = ['__main__', 'ml.models']
+
+
+def _context():
+    # Never fork the caller: it is a threaded server, and a child forked while another thread holds
+    # a lock (logging, a cache, the job queue) can deadlock. Workers start from a clean fork server
+    # (or a fresh interpreter), so tasks and the data they carry are pickled to them.
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context('forkserver')
+        ctx.set_forkserver_preload(PRELOAD_MODULES)
+        return ctx
+    return multiprocessing.get_context('spawn')
+
+
+def _run_task(conn, task, threads=None):
+    try:
+        with limit_threads(threads):
+            outcome = (True, task())
+    except Exception as e:
+        outcome = (False, str(e) or type(e).__name__)
+    try:
+        conn.send(outcome)
+    finally:
+        conn.close()
+
+
+CANCELLED_MESSAGE = 'Cancelled'
+CANCEL_POLL_SECONDS = 0.2
+
+
+def run_in_processes(tasks, max_workers=None, timeout=None, on_start=None, on_done=None, cancel=None, threads=None):
+    """Run zero-argument callables in separate processes, at most max_workers at a time.
+    
+    Each task gets its own process so one that exceeds timeout seconds
+    (measured from its own start) can be terminated without touching the
+    others. Returns one (ok, value) pair per task, in task order: value is
+    the task's return value, or an error message if it raised, crashed or
+    timed out. Tasks (with everything they reference) and their return
+    values must be picklable.
+    
+    on_start(index) and on_done(index, ok, value) are called from this
+    thread as tasks start and finish. Setting the cancel event terminates
+    running tasks; they and the tasks not started yet end with
+    (False, CANCELLED_MESSAGE). threads caps each worker's BLAS/OpenMP
+    thread pools, so max_workers * threads bounds the cores in use.
+    """
+    tasks = list(tasks)
+    if max_workers is None:
+        max_workers = default_workers(len(tasks))
+    ctx = _context()
+    outcomes = [None] * len(tasks)
+    pending = list(range(len(tasks)))
+    running = {}  # receiving end of the pipe -> (task index, process, deadline)
+    
+    try:
+        while pending or running:
+            if cancel is not None and cancel.is_set():
+                for receiver, (index, process, _) in list(running.items()):
+                    process.terminate()
+                    process.join()
+                    receiver.close()
+                    del running[receiver]
+                    outcomes[index] = (False, CANCELLED_MESSAGE)
+                    _notify(on_done, index, *outcomes[index])
+                for index in pending:
+                    outcomes[index] = (False, CANCELLED_MESSAGE)
+                    _notify(on_done, index, *outcomes[index])
+                break
+            
+            while pending and len(running) < max_workers:
+                index = pending.pop(0)
+                receiver, sender = ctx.Pipe(duplex=False)
+                process = ctx.Process(target=_run_task, args=(sender, tasks[index], threads), daemon=True)
+                process.start()
+                sender.close()
+                deadline = time.monotonic() + timeout if timeout else None
+                running[receiver] = (index, process, deadline)
+                _notify(on_start, index)
+            
+            deadlines = [deadline for _, _, deadline in running.values() if deadline is not None]
+            wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            if cancel is not None:
+                wait_for = CANCEL_POLL_SECONDS if wait_for is None else min(wait_for, CANCEL_POLL_SECONDS)
+            for receiver in wait(list(running), timeout=wait_for):
+                index, process, _ = running.pop(receiver)
+                try:
+                    outcomes[index] = receiver.recv()
+                except EOFError:
+                    process.join()
+                    outcomes[index] = (False, f"Worker process exited unexpectedly (exit code {process.exitcode})")
+                receiver.close()
+                process.join()
+                _notify(on_done, index, *outcomes[index])
+            
+            now = time.monotonic()
+            for receiver, (index, process, deadline) in list(running.items()):
+                if deadline is not None and now >= deadline:
+                    process.terminate()
+                    process.join()
+                    receiver.close()
+                    del running[receiver]
+                    outcomes[index] = (False, f"Timed out after {timeout}s")
+                    _notify(on_done, index, *outcomes[index])
+    finally:
+        # Never leave workers behind if the caller is interrupted
+        for receiver, (_, process, _) in running.items():
+            process.terminate()
+            process.join()
+            receiver.close()
+    
+    return outcomes
+
+
+def _notify(callback, *args):
+    if callback is not None:
+        callback(*args)
@@ -1,25 +1,21 @@
-import os
-import pickle
 import pandas as pd
 import numpy as np
 
+from ml.model_cache import ModelCache
+from utils.encoding import as_category_encoder, feature_matrix
+
 class ModelPredictor:
-    def __init__(self, models_folder='models'):
+    def __init__(self, models_folder='models', model_cache=None):
         self.models_folder = models_folder
+        # Saved models stay unpickled between requests; pass the trainer's cache to share one budget
+        self.model_cache = model_cache or ModelCache(models_folder)
     
     def predict(self, model_id, input_data):
         """Make prediction for a single input"""
-        model_path = os.path.join(self.models_folder, f"{model_id}.pkl")
-        if not os.path.exists(model_path):
-            raise ValueError(f"Model {model_id} not found")
-        
-        with open(model_path, 'rb') as f:
-            model_data = pickle.load(f)
+        model_data = self.model_cache.get(model_id)
         
         model = model_data['model']
         scaler = model_data.get('scaler')
-        feature_columns = model_data.get('feature_columns', [])
-        label_encoders = model_data.get('label_encoders', {})
         model_type = model_data.get('model_type', 'unknown')
         
         # Prepare input data
@@ -31,17 +27,8 @@ class ModelPredictor:
         else:
             raise ValueError("Input data must be dict or list of dicts")
         
-        # Encode categorical features
-        for col in feature_columns:
-            if col.endswith('_encoded'):
-                original_col = col.replace('_encoded', '')
-                if original_col in input_df.columns and original_col in label_encoders:
-                    input_df[col] = label_encoders[original_col].transform(input_df[original_col].astype(str))
-                elif original_col not in input_df.columns:
-                    raise ValueError(f"Missing feature: {original_col}")
-        
-        # Select features
-        X = input_df[feature_columns]
+        # Encode categorical features and select features
+        X = self._features(model_data, input_df)
         
         # Scale if needed
         if scaler is not None:
@@ -55,12 +42,7 @@ class ModelPredictor:
             prediction_proba = model.predict_proba(X).tolist()
         
         # Decode prediction if needed
-        target_column = model_data.get('target_column', '')
-        if target_column in label_encoders:
-            le = label_encoders[target_column]
-            prediction_labels = le.inverse_transform(prediction)
-        else:
-            prediction_labels = prediction.tolist()
+        prediction_labels = self._decode(model_data, prediction)
         
         result = {
             'prediction': prediction_labels[0] if len(prediction_labels) == 1 else prediction_labels,
@@ -74,28 +56,13 @@ class ModelPredictor:
     
     def predict_batch(self, model_id, df):
         """Make batch predictions"""
-        model_path = os.path.join(self.models_folder, f"{model_id}.pkl")
-        if not os.path.exists(model_path):
-            raise ValueError(f"Model {model_id} not found")
-        
-        with open(model_path, 'rb') as f:
-            model_data = pickle.load(f)
+        model_data = self.model_cache.get(model_id)
         
         model = model_data['model']
         scaler = model_data.get('scaler')
-        feature_columns = model_data.get('feature_columns', [])
-        label_encoders = model_data.get('label_encoders', {})
-        
-        # Encode categorical features
-        df_encoded = df.copy()
-        for col in feature_columns:
-            if col.endswith('_encoded'):
-                original_col = col.replace('_encoded', '')
-                if original_col in df_encoded.columns and original_col in label_encoders:
-                    df_encoded[col] = label_encoders[original_col].transform(df_encoded[original_col].astype(str))
         
-        # Select features
-        X = df_encoded[feature_columns]
+        # Encode categorical features and select features (no copy of the input frame)
+        X = self._features(model_data, df)
         
         # Scale if needed
         if scaler is not None:
@@ -109,12 +76,7 @@ class ModelPredictor:
             prediction_proba = model.predict_proba(X)
         
         # Decode predictions if needed
-        target_column = model_data.get('target_column', '')
-        if target_column in label_encoders:
-            le = label_encoders[target_column]
-            prediction_labels = le.inverse_transform(predictions)
-        else:
-            prediction_labels = predictions.tolist()
+        prediction_labels = self._decode(model_data, predictions)
         
         result = {
             'predictions': prediction_labels.tolist() if hasattr(prediction_labels, 'tolist') else list(prediction_labels),
@@ -125,4 +87,25 @@ class ModelPredictor:
             result['probabilities'] = prediction_proba.tolist()
         
         return result
-
+    
+    @staticmethod
+    def _features(model_data, input_df):
+        """The model's feature frame; every categorical column is encoded in one vectorized call.
+        
+        Categories the model never saw get the reserved UNSEEN_CODE
+        instead of failing the request.
+        """
+        feature_columns = model_data.get('feature_columns', [])
+        target_column = model_data.get('target_column', '')
+        encoders = {col: as_category_encoder(encoder) for col, encoder in model_data.get('label_encoders', {}).items()
+                    if col != target_column}
+        X = feature_matrix(input_df, feature_columns, encoders)
+        return pd.DataFrame(X, columns=feature_columns, copy=False)
+    
+    @staticmethod
+    def _decode(model_data, predictions):
+        target_column = model_data.get('target_column', '')
+        label_encoders = model_data.get('label_encoders', {})
+        if target_column in label_encoders:
+            return as_category_encoder(label_encoders[target_column], stringify=False).inverse_transform(predictions)
+        return predictions.tolist()
@@ -0,0 +1,129 @@
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from threadpoolctl import threadpool_limits
+
+# Read by BLAS/OpenMP runtimes that start after they are set (e.g. in a spawned worker)
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                   'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS')
+WAIT_POLL_SECONDS = 0.5
+
+
+@contextmanager
+def limit_threads(threads):
+    """Cap BLAS/OpenMP thread pools of this process at threads while the block runs (None: no cap).
+    
+    The environment and the thread pools are process-wide, so this is only
+    for single-purpose worker processes, never a threaded server's request
+    or job threads.
+    """
+    if threads is None:
+        yield
+        return
+    previous = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    try:
+        # The variables only reach runtimes that start later; pools already running are resized here
+        with threadpool_limits(limits=threads):
+            yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+class Reservation:
+    """CPUs and memory granted to one job; give it back with ResourceScheduler.release"""
+    
+    def __init__(self, cpus, memory_bytes):
+        self.cpus = cpus
+        self.memory_bytes = memory_bytes
+    
+    def to_dict(self):
+        return {'cpus': self.cpus, 'memory_bytes': self.memory_bytes}
+
+
+class ResourceScheduler:
+    """Host-wide CPU and memory budget that admits training jobs one reservation at a time.
+    
+    A job asks for a number of CPUs and an estimate of the memory its
+    fits will need; acquire blocks until both fit in what running jobs
+    leave free. Requests are admitted strictly in arrival order, so a
+    large job is not starved by a stream of small ones. A request bigger
+    than the whole budget is clamped to it, which means it runs alone.
+    """
+    
+    def __init__(self, max_cpus=None, max_memory_bytes=None):
+        self.max_cpus = max_cpus or os.cpu_count() or 1
+        self.max_memory_bytes = max_memory_bytes
+        self._cpus_used = 0
+        self._memory_used = 0
+        self._running = 0
+        self._waiting = deque()
+        self._condition = threading.Condition()
+    
+    def grant(self, cpus, memory_bytes):
+        """The reservation a request would receive once admitted"""
+        cpus = max(1, min(cpus or self.max_cpus, self.max_cpus))
+        if self.max_memory_bytes is not None:
+            memory_bytes = min(memory_bytes, self.max_memory_bytes)
+        return Reservation(cpus, memory_bytes)
+    
+    def acquire(self, cpus, memory_bytes, cancel=None):
+        """Block until the request fits; returns the Reservation, or None if cancel was set while waiting"""
+        reservation = self.grant(cpus, memory_bytes)
+        with self._condition:
+            self._waiting.append(reservation)
+            try:
+                while not (self._waiting[0] is reservation and self._fits(reservation)):
+                    if cancel is not None and cancel.is_set():
+                        return None
+                    self._condition.wait(WAIT_POLL_SECONDS if cancel is not None else None)
+            finally:
+                self._waiting.remove(reservation)
+                self._condition.notify_all()
+            self._cpus_used += reservation.cpus
+            self._memory_used += reservation.memory_bytes
+            self._running += 1
+        return reservation
+    
+    def release(self, reservation):
+        with self._condition:
+            self._cpus_used -= reservation.cpus
+            self._memory_used -= reservation.memory_bytes
+            self._running -= 1
+            self._condition.notify_all()
+    
+    @contextmanager
+    def reserve(self, cpus, memory_bytes, cancel=None):
+        """acquire/release around a block; yields None (and reserves nothing) if cancelled while waiting"""
+        reservation = self.acquire(cpus, memory_bytes, cancel)
+        try:
+            yield reservation
+        finally:
+            if reservation is not None:
+                self.release(reservation)
+    
+    def stats(self):
+        with self._condition:
+            return {
+                'max_cpus': self.max_cpus,
+                'max_memory_bytes': self.max_memory_bytes,
+                'cpus_used': self._cpus_used,
+                'memory_used_bytes': self._memory_used,
+                'running': self._running,
+                'waiting': len(self._waiting)
+            }
+    
+    def _fits(self, reservation):
+        # Caller holds the condition
+        if self._cpus_used + reservation.cpus > self.max_cpus:
+            return False
+        if self.max_memory_bytes is not None and self._memory_used + reservation.memory_bytes > self.max_memory_bytes:
+            return False
+        return True
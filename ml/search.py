@@ -0,0 +1,176 @@
+import os
+import math
+import tempfile
+import numpy as np
+from functools import partial
+from sklearn.model_selection import ParameterGrid, StratifiedKFold, KFold
+from sklearn.preprocessing import StandardScaler
+from sklearn.metrics import accuracy_score
+
+from ml.parallel import run_in_processes
+
+# Hyperparameters explored by default, per model type (the parameters _create_model reads)
+PARAM_SPACES = {
+    'logistic_regression': {'C': [0.01, 0.1, 1.0, 10.0, 100.0]},
+    'decision_tree': {'max_depth': [3, 5, 8, 12, None], 'min_samples_split': [2, 5, 10]},
+    'random_forest': {'n_estimators': [50, 100, 200], 'max_depth': [5, 10, None], 'min_samples_split': [2, 5]},
+    'knn': {'n_neighbors': [3, 5, 7, 11, 15], 'weights': ['uniform', 'distance']},
+    'svm': {'C': [0.1, 1.0, 10.0], 'kernel': ['rbf', 'linear']},
+    'gradient_boosting': {'n_estimators': [50, 100, 200], 'max_depth': [2, 3, 5]},
+    'naive_bayes': {},
+    'sgd': {'loss': ['log_loss', 'hinge', 'modified_huber'], 'alpha': [0.00001, 0.0001, 0.001, 0.01]},
+    'linear_svm': {'alpha': [0.00001, 0.0001, 0.001, 0.01]},
+    'hist_gradient_boosting': {'learning_rate': [0.05, 0.1, 0.2], 'max_depth': [None, 5, 10], 'max_iter': [100, 200]},
+    'knn_sampled': {'n_neighbors': [3, 5, 7, 11, 15], 'weights': ['uniform', 'distance']}
+}
+DEFAULT_FOLDS = 5
+DEFAULT_FACTOR = 3
+
+
+def candidate_grid(model_type, param_grid=None, max_candidates=None, random_state=42):
+    """Parameter combinations to search: the full grid, or a seeded random subset of max_candidates"""
+    if param_grid is None:
+        if model_type not in PARAM_SPACES:
+            raise ValueError(f"Unknown model type: {model_type}")
+        param_grid = PARAM_SPACES[model_type]
+    candidates = list(ParameterGrid(param_grid))
+    if max_candidates is not None and len(candidates) > max_candidates:
+        rng = np.random.default_rng(random_state)
+        keep = np.sort(rng.choice(len(candidates), size=max_candidates, replace=False))
+        candidates = [candidates[i] for i in keep]
+    return candidates
+
+
+def halving_rounds(n_candidates, factor=DEFAULT_FACTOR):
+    """Number of successive-halving rounds: each keeps the best 1/factor until a few candidates remain"""
+    if n_candidates <= 1:
+        return 1
+    return 1 + int(math.floor(math.log(n_candidates) / math.log(factor) + 1e-9))
+
+
+def _fold_score(fit_model, model_type, params, scaled, X_path, y, train_rows, test_rows):
+    # One cross-validation fit; the scaler is fitted on the fold's own training rows
+    X = np.load(X_path, mmap_mode='r')
+    X_train, X_test = X[train_rows], X[test_rows]
+    if scaled:
+        scaler = StandardScaler()
+        X_train = scaler.fit_transform(X_train)
+        X_test = scaler.transform(X_test)
+    model = fit_model(model_type, params, X_train, y[train_rows])
+    return float(accuracy_score(y[test_rows], model.predict(X_test)))
+
+
+class SuccessiveHalvingSearch:
+    """Cross-validated hyperparameter search with successive halving.
+    
+    Round i scores the surviving candidates by k-fold cross-validation on a
+    growing random subset of the training rows, then keeps the best
+    1/factor of them for the next round; the last round uses every
+    training row. Most candidates are therefore dropped after cheap fits on
+    a small sample. Every (candidate, fold) fit of a round is a separate
+    task run in worker processes, so a round takes about
+    candidates * folds / workers fits of wall time. fit_model(model_type,
+    params, X_train, y_train) returns a fitted model; it must fit exactly
+    as the final training does (row sampling, seeding) so that the ranking
+    holds for the saved model.
+    """
+    
+    def __init__(self, fit_model, model_type, candidates, scaled=False, n_folds=DEFAULT_FOLDS,
+                 factor=DEFAULT_FACTOR, random_state=42):
+        self.fit_model = fit_model
+        self.model_type = model_type
+        self.candidates = candidates
+        self.scaled = scaled
+        self.n_folds = n_folds
+        self.factor = factor
+        self.random_state = random_state
+        self.rounds = halving_rounds(len(candidates), factor)
+    
+    def schedule(self, n_rows, n_classes):
+        """(candidates, rows) for each round"""
+        min_rows = min(n_rows, max(2 * self.n_folds * n_classes, self.n_folds * 10))
+        plan = []
+        for i in range(self.rounds):
+            rows = max(min_rows, int(n_rows / self.factor ** (self.rounds - 1 - i)))
+            plan.append((int(math.ceil(len(self.candidates) / self.factor ** i)), rows))
+        return plan
+    
+    def run(self, X, y, workers=None, timeout=None, on_round_start=None, on_round_end=None, cancel=None,
+            threads=None):
+        """Search on the training matrix X, y; returns the leaderboard, best candidate first.
+        
+        Each entry holds the candidate's params, its fold scores and mean
+        from the last round it reached, and that round's number and row
+        count. Candidates whose fits failed carry an error instead. threads
+        caps each worker's BLAS/OpenMP threads.
+        """
+        entries = [{'params': params, 'round': 0} for params in self.candidates]
+        # Workers map the matrix from one file instead of each receiving a pickled copy of it
+        with tempfile.TemporaryDirectory(prefix='search-') as folder:
+            X_path = os.path.join(folder, 'X.npy')
+            np.save(X_path, X)
+            self._run_rounds(X_path, y, entries, workers, timeout, on_round_start, on_round_end, cancel, threads)
+        
+        leaderboard = sorted(range(len(entries)), key=lambda i: (-entries[i]['round'],
+                                                                 -entries[i].get('mean_score', -np.inf), i))
+        return [dict(entries[i], rank=rank + 1) for rank, i in enumerate(leaderboard)]
+    
+    def _run_rounds(self, X_path, y, entries, workers, timeout, on_round_start, on_round_end, cancel, threads):
+        # Fills in entries round by round
+        rng = np.random.default_rng(self.random_state)
+        order = rng.permutation(len(y))
+        alive = list(range(len(self.candidates)))
+        
+        for round_index, (keep, rows) in enumerate(self.schedule(len(y), len(np.unique(y)))):
+            alive = alive[:keep]
+            if on_round_start is not None:
+                on_round_start(round_index)
+            subset = np.sort(order[:rows])
+            folds = self._folds(y[subset])
+            
+            tasks = []
+            for candidate in alive:
+                for train_rows, test_rows in folds:
+                    # Seeded like the final fit, so candidates are ranked on the model that will be saved
+                    params = dict({'random_state': self.random_state}, **self.candidates[candidate])
+                    tasks.append(partial(_fold_score, self.fit_model, self.model_type, params, self.scaled,
+                                         X_path, y, subset[train_rows], subset[test_rows]))
+            outcomes = run_in_processes(tasks, workers, timeout, cancel=cancel, threads=threads)
+            
+            for position, candidate in enumerate(alive):
+                fold_outcomes = outcomes[position * len(folds):(position + 1) * len(folds)]
+                entry = entries[candidate]
+                entry.update({'round': round_index + 1, 'rows': rows})
+                errors = [value for ok, value in fold_outcomes if not ok]
+                if errors:
+                    for key in ('fold_scores', 'mean_score', 'std_score'):
+                        entry.pop(key, None)
+                    entry['error'] = errors[0]
+                else:
+                    scores = [value for _, value in fold_outcomes]
+                    entry.update({'fold_scores': scores, 'mean_score': float(np.mean(scores)),
+                                  'std_score': float(np.std(scores))})
+            
+            # Best first; failed candidates last, ties resolved by grid order
+            alive.sort(key=lambda candidate: -entries[candidate].get('mean_score', -np.inf))
+            round_summary = {
+                'round': round_index + 1,
+                'candidates': len(alive),
+                'rows': rows,
+                'best_score': entries[alive[0]].get('mean_score'),
+                'best_params': entries[alive[0]]['params']
+            }
+            if on_round_end is not None:
+                on_round_end(round_index, round_summary)
+            if cancel is not None and cancel.is_set():
+                break
+    
+    def _folds(self, y):
+        # Stratified when every class has enough rows for each fold
+        counts = np.unique(y, return_counts=True)[1]
+        n_folds = max(2, min(self.n_folds, len(y)))
+        if len(counts) > 1 and counts.min() >= n_folds:
+            splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=self.random_state)
+        else:
+            splitter = KFold(n_splits=n_folds, shuffle=True, random_state=self.random_state)
+        return list(splitter.split(np.zeros(len(y)), y))
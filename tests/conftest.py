@@ -0,0 +1,38 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The application packages (utils, ml) are imported from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.models import ModelTrainer
+
+
+@pytest.fixture
+def make_frame():
+    def make_frame(n, seed=0, labels=(0, 1), colors=None):
+        """n rows of normal features a, b, c, d and a two-class target.
+        
+        The target is labels[1] where a + b * c plus noise is positive and
+        labels[0] elsewhere; with colors, a 'color' column drawn from them
+        is added as well.
+        """
+        rng = np.random.default_rng(seed)
+        X = rng.normal(size=(n, 4))
+        noise = rng.normal(scale=0.5, size=n)
+        df = pd.DataFrame({'a': X[:, 0], 'b': X[:, 1], 'c': X[:, 2], 'd': X[:, 3]})
+        if colors is not None:
+            df['color'] = rng.choice(colors, n)
+        df['target'] = np.where(X[:, 0] + X[:, 1] * X[:, 2] + noise > 0, labels[1], labels[0])
+        return df
+    return make_frame
+
+
+@pytest.fixture
+def trainer(tmp_path, request):
+    """A ModelTrainer saving into tmp_path; a test module may set TRAINER_OPTIONS to configure it"""
+    options = dict({'train_workers': 1}, **getattr(request.module, 'TRAINER_OPTIONS', {}))
+    return ModelTrainer(str(tmp_path / 'models'), **options)
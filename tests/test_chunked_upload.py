@@ -0,0 +1,153 @@
+import io
+import os
+import hashlib
+import importlib
+
+import pytest
+
+import utils.chunked_upload as chunked_upload
+from utils.chunked_upload import ChunkedUploadManager, UploadNotFoundError, UploadOffsetError, UploadTooLargeError
+
+CONTENT = b"a,b,target\n" + b"".join(b"%d,%d,%d\n" % (i, i * 2, i % 3) for i in range(500))
+
+
+class DroppedStream:
+    """A request body whose connection drops after `size` bytes"""
+    
+    def __init__(self, data, size):
+        self.data = io.BytesIO(data[:size])
+    
+    def read(self, n):
+        block = self.data.read(n)
+        if not block:
+            raise ConnectionError("client went away")
+        return block
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    # Small copy blocks so a dropped connection leaves part of a chunk on disk
+    monkeypatch.setattr(chunked_upload, 'COPY_BLOCK_SIZE', 64)
+    return ChunkedUploadManager(str(tmp_path))
+
+
+def upload_in_chunks(manager, upload_id, data, chunk_size, start=0):
+    for offset in range(start, len(data), chunk_size):
+        manager.append(upload_id, offset, io.BytesIO(data[offset:offset + chunk_size]))
+
+
+def test_chunks_assemble_into_the_original_file(manager, tmp_path):
+    state = manager.init('data.csv', total_size=len(CONTENT))
+    upload_in_chunks(manager, state['upload_id'], CONTENT, 1000)
+    
+    destination = str(tmp_path / 'data.csv')
+    state, digest = manager.finalize(state['upload_id'], destination)
+    
+    assert state['received'] == len(CONTENT)
+    assert digest == hashlib.sha256(CONTENT).hexdigest()
+    with open(destination, 'rb') as f:
+        assert f.read() == CONTENT
+
+
+def test_resume_after_a_dropped_chunk_discards_its_partial_bytes(manager, tmp_path):
+    upload_id = manager.init('data.csv', total_size=len(CONTENT))['upload_id']
+    manager.append(upload_id, 0, io.BytesIO(CONTENT[:1000]))
+    with pytest.raises(ConnectionError):
+        manager.append(upload_id, 1000, DroppedStream(CONTENT[1000:2000], 300))
+    
+    # Only whole chunks count as received; the client resumes from there
+    received = manager.status(upload_id)['received']
+    assert received == 1000
+    upload_in_chunks(manager, upload_id, CONTENT, 1000, start=received)
+    
+    state, digest = manager.finalize(upload_id, str(tmp_path / 'data.csv'))
+    assert digest == hashlib.sha256(CONTENT).hexdigest()
+    with open(tmp_path / 'data.csv', 'rb') as f:
+        assert f.read() == CONTENT
+
+
+def test_resume_after_a_restart_rehashes_from_disk(manager, tmp_path):
+    upload_id = manager.init('data.csv', total_size=len(CONTENT))['upload_id']
+    manager.append(upload_id, 0, io.BytesIO(CONTENT[:1500]))
+    
+    restarted = ChunkedUploadManager(str(tmp_path))
+    received = restarted.status(upload_id)['received']
+    upload_in_chunks(restarted, upload_id, CONTENT, 1000, start=received)
+    
+    _, digest = restarted.finalize(upload_id, str(tmp_path / 'data.csv'))
+    assert digest == hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_wrong_offset_reports_the_expected_one(manager):
+    upload_id = manager.init('data.csv')['upload_id']
+    manager.append(upload_id, 0, io.BytesIO(CONTENT[:100]))
+    
+    with pytest.raises(UploadOffsetError) as error:
+        manager.append(upload_id, 50, io.BytesIO(CONTENT[50:150]))
+    assert error.value.expected_offset == 100
+    assert manager.status(upload_id)['received'] == 100
+
+
+def test_finalize_rejects_an_incomplete_upload(manager, tmp_path):
+    upload_id = manager.init('data.csv', total_size=len(CONTENT))['upload_id']
+    manager.append(upload_id, 0, io.BytesIO(CONTENT[:100]))
+    
+    with pytest.raises(ValueError, match="incomplete"):
+        manager.finalize(upload_id, str(tmp_path / 'data.csv'))
+    assert manager.status(upload_id)['received'] == 100
+
+
+def test_abort_discards_the_session_and_its_data(manager):
+    upload_id = manager.init('data.csv')['upload_id']
+    manager.append(upload_id, 0, io.BytesIO(CONTENT[:100]))
+    
+    manager.abort(upload_id)
+    
+    with pytest.raises(UploadNotFoundError):
+        manager.status(upload_id)
+    with pytest.raises(UploadNotFoundError):
+        manager.append(upload_id, 100, io.BytesIO(CONTENT[100:200]))
+    assert os.listdir(manager.partial_folder) == []
+
+
+def test_chunk_past_the_size_limit_is_rejected(tmp_path):
+    manager = ChunkedUploadManager(str(tmp_path), max_upload_bytes=1000)
+    with pytest.raises(UploadTooLargeError):
+        manager.init('data.csv', total_size=2000)
+    
+    upload_id = manager.init('data.csv')['upload_id']
+    manager.append(upload_id, 0, io.BytesIO(CONTENT[:800]))
+    with pytest.raises(UploadTooLargeError):
+        manager.append(upload_id, 800, io.BytesIO(CONTENT[800:1200]))
+    assert manager.status(upload_id)['received'] == 800
+    assert os.path.getsize(manager._part_path(upload_id)) == 800
+
+
+def test_unknown_or_malformed_upload_ids_are_not_found(manager):
+    with pytest.raises(UploadNotFoundError):
+        manager.status('0' * 32)
+    with pytest.raises(UploadNotFoundError):
+        manager.status('../../etc')
+
+
+@pytest.mark.parametrize('total_size', ['100', -1, 1.5, True])
+def test_init_rejects_a_total_size_that_is_not_a_byte_count(manager, total_size):
+    with pytest.raises(ValueError) as excinfo:
+        manager.init('data.csv', total_size=total_size)
+    assert not isinstance(excinfo.value, UploadTooLargeError)
+
+
+def test_init_endpoint_separates_bad_sizes_from_oversized_ones(tmp_path, monkeypatch):
+    # The app creates its upload and model folders in the working directory on import
+    monkeypatch.chdir(tmp_path)
+    app_module = importlib.import_module('app')
+    monkeypatch.setattr(app_module, 'chunked_uploads', ChunkedUploadManager(str(tmp_path), max_upload_bytes=1000))
+    client = app_module.app.test_client()
+    
+    def init(total_size):
+        return client.post('/api/upload/chunked/init', json={'filename': 'data.csv', 'total_size': total_size})
+    
+    assert init('500').status_code == 400
+    assert init(-1).status_code == 400
+    assert init(2000).status_code == 413
+    assert init(500).status_code == 200
@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data_processor import DataProcessor
+from utils.imputation import BatchImputer
+from utils.outliers import fused_outlier_mask
+
+
+def reference_clean(df, options):
+    """clean_data as it was before the batched rewrite and the fused outlier pass: one column at a time"""
+    cleaning_steps = []
+    df_cleaned = df.copy()
+    
+    threshold = options.get('missing_threshold', 50)
+    if threshold > 0:
+        missing_percent = df_cleaned.isnull().sum() / len(df_cleaned) * 100
+        cols_to_drop = missing_percent[missing_percent > threshold].index.tolist()
+        if cols_to_drop:
+            df_cleaned = df_cleaned.drop(columns=cols_to_drop)
+            cleaning_steps.append(f"Dropped {len(cols_to_drop)} columns with >{threshold}% missing: {cols_to_drop}")
+    
+    strategy = options.get('imputation_strategy', 'median')
+    for col in df_cleaned.select_dtypes(include=[np.number]).columns:
+        if df_cleaned[col].isnull().sum() > 0:
+            try:
+                value = df_cleaned[col].mean() if strategy == 'mean' else df_cleaned[col].median()
+                if pd.isna(value):
+                    value = 0
+                missing_count = df_cleaned[col].isnull().sum()
+                df_cleaned[col] = df_cleaned[col].fillna(value)
+                cleaning_steps.append(f"Imputed {missing_count} missing values in {col} with {strategy}: {value:.2f}")
+            except Exception:
+                missing_count = df_cleaned[col].isnull().sum()
+                df_cleaned[col] = df_cleaned[col].fillna(0)
+                cleaning_steps.append(f"Imputed {missing_count} missing values in {col} with 0 (fallback)")
+    for col in df_cleaned.select_dtypes(include=['object']).columns:
+        if df_cleaned[col].isnull().sum() > 0:
+            mode_result = df_cleaned[col].mode()
+            mode_value = mode_result[0] if not mode_result.empty else 'Unknown'
+            missing_count = df_cleaned[col].isnull().sum()
+            df_cleaned[col] = df_cleaned[col].fillna(mode_value)
+            cleaning_steps.append(f"Imputed {missing_count} missing values in {col} with mode: {mode_value}")
+    
+    if options.get('handle_outliers', False):
+        method = options.get('outlier_method', 'iqr')
+        for col in df_cleaned.select_dtypes(include=[np.number]).columns:
+            if method == 'iqr':
+                Q1 = df_cleaned[col].quantile(0.25)
+                Q3 = df_cleaned[col].quantile(0.75)
+                IQR = Q3 - Q1
+                lower_bound = Q1 - 1.5 * IQR
+                upper_bound = Q3 + 1.5 * IQR
+                outliers = ((df_cleaned[col] < lower_bound) | (df_cleaned[col] > upper_bound)).sum()
+            else:
+                z_scores = np.abs((df_cleaned[col] - df_cleaned[col].mean()) / df_cleaned[col].std())
+                outliers = (z_scores > 3).sum()
+            if outliers > 0 and options.get('outlier_action') == 'remove':
+                if method == 'iqr':
+                    df_cleaned = df_cleaned[(df_cleaned[col] >= lower_bound) & (df_cleaned[col] <= upper_bound)]
+                else:
+                    df_cleaned = df_cleaned[z_scores <= 3]
+                cleaning_steps.append(f"Removed {outliers} outliers from {col}")
+    
+    return df_cleaned, {
+        'original_shape': [int(df.shape[0]), int(df.shape[1])],
+        'cleaned_shape': [int(df_cleaned.shape[0]), int(df_cleaned.shape[1])],
+        'rows_removed': int(df.shape[0] - df_cleaned.shape[0]),
+        'columns_removed': int(df.shape[1] - df_cleaned.shape[1]),
+        'missing_values_before': int(df.isnull().sum().sum()),
+        'missing_values_after': int(df_cleaned.isnull().sum().sum()),
+        'cleaning_steps': cleaning_steps
+    }
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 500
+    df = pd.DataFrame({
+        # Heavy tails, so both outlier methods find some
+        'x': rng.standard_t(3, size=n),
+        'small': rng.normal(size=n).astype(np.float32),
+        'count': rng.integers(0, 20, n),
+        'gappy_count': rng.integers(0, 20, n).astype(float),
+        'city': rng.choice(['oslo', 'rome', 'lima'], n, p=[0.5, 0.3, 0.2]),
+        'mixed': rng.choice(np.array(['a', 1, 2.5], dtype=object), n),
+        'all_missing': np.nan,
+        'mostly_missing': np.where(rng.random(n) < 0.8, np.nan, 1.0)
+    })
+    for col, share in [('x', 0.1), ('small', 0.05), ('gappy_count', 0.2), ('city', 0.15), ('mixed', 0.1)]:
+        df.loc[rng.random(n) < share, col] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'imputation_strategy': 'mean'},
+    {'imputation_strategy': 'mode'},
+    # Keeps the all-missing column, which falls back to 0
+    {'missing_threshold': 0},
+])
+def test_batch_imputation_matches_the_column_loop(frame, options):
+    expected, expected_report = reference_clean(frame, options)
+    
+    cleaned, report = DataProcessor().clean_data(frame, options)
+    
+    assert report == expected_report
+    pd.testing.assert_frame_equal(cleaned, expected)
+
+
+def test_imputer_fills_the_same_without_a_reusable_mask(frame):
+    imputer = BatchImputer().fit(frame)
+    with_mask = imputer.transform(frame.copy())
+    # Other row labels keep transform() from reusing the mask fit() computed
+    shifted = imputer.transform(frame.set_axis(frame.index + 1))
+    
+    pd.testing.assert_frame_equal(shifted, with_mask.set_axis(with_mask.index + 1))
+    assert with_mask['all_missing'].eq(0).all()
+    assert not with_mask.isnull().any().any()
+
+
+@pytest.mark.parametrize('method', ['iqr', 'zscore'])
+def test_sequential_outlier_mode_matches_the_column_loop(frame, method):
+    options = {'handle_outliers': True, 'outlier_action': 'remove', 'outlier_method': method}
+    expected, expected_report = reference_clean(frame, options)
+    
+    cleaned, report = DataProcessor().clean_data(frame, dict(options, outlier_mode='sequential'))
+    
+    assert report == expected_report
+    pd.testing.assert_frame_equal(cleaned, expected)
+
+
+@pytest.mark.parametrize('method', ['iqr', 'zscore'])
+def test_fused_and_sequential_outlier_modes_agree_on_one_column(frame, method):
+    df = frame[['x', 'city']]
+    options = {'handle_outliers': True, 'outlier_action': 'remove', 'outlier_method': method}
+    
+    sequential = DataProcessor().clean_data(df, dict(options, outlier_mode='sequential'))
+    fused = DataProcessor().clean_data(df, dict(options, outlier_mode='fused'))
+    
+    assert fused[1] == sequential[1]
+    assert any(step.startswith('Removed') for step in fused[1]['cleaning_steps'])
+    pd.testing.assert_frame_equal(fused[0], sequential[0])
+
+
+@pytest.mark.parametrize('method', ['iqr', 'zscore'])
+def test_fused_mask_matches_column_filters_on_the_unfiltered_rows(frame, method):
+    numeric = frame[['x', 'small', 'count', 'gappy_count', 'mostly_missing']]
+    keep, counts = fused_outlier_mask(numeric.to_numpy(dtype=np.float64), method)
+    
+    expected_keep = pd.Series(True, index=numeric.index)
+    for col, count in zip(numeric.columns, counts):
+        values = numeric[col].astype(np.float64)
+        if method == 'iqr':
+            q1, q3 = values.quantile(0.25), values.quantile(0.75)
+            lower, upper = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+            inlier = values.between(lower, upper)
+            outliers = ((values < lower) | (values > upper)).sum()
+        else:
+            z_scores = np.abs((values - values.mean()) / values.std())
+            inlier = z_scores <= 3
+            outliers = (z_scores > 3).sum()
+        assert count == outliers
+        if outliers > 0:
+            expected_keep &= inlier
+    
+    assert counts.sum() > 0
+    np.testing.assert_array_equal(keep, expected_keep.to_numpy())
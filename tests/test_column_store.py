@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.column_store import ColumnStore, ColumnStoreWriter
+
+
+def as_typed(values):
+    # 1, 1.0 and True compare equal, so compare types too; missing values all read back as NaN
+    return [(type(value), value) if pd.notna(value) else None for value in values]
+
+
+@pytest.mark.parametrize('chunk_rows', [10, 3, 1])
+def test_dictionary_codes_keep_equal_values_of_different_types_apart(tmp_path, chunk_rows):
+    values = ['a', 1, 1.0, True, None, '1', 0, False, 0.0, 'a', 1.0, True, np.nan, 1]
+    df = pd.DataFrame({'mixed': pd.Series(values, dtype=object), 'n': np.arange(len(values))})
+    
+    writer = ColumnStoreWriter(str(tmp_path / 'store'))
+    for start in range(0, len(df), chunk_rows):
+        writer.append(df.iloc[start:start + chunk_rows])
+    restored = writer.close().read()
+    
+    assert as_typed(restored['mixed']) == as_typed(values)
+
+
+def test_text_and_categorical_columns_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'text': rng.choice(['x', 'y', 'z'], 200).astype(object),
+        'category': pd.Categorical(rng.choice(['low', 'high'], 200), categories=['low', 'high'])
+    })
+    df.loc[::9, 'text'] = None
+    
+    restored = ColumnStore.write(df, str(tmp_path / 'store')).read()
+    
+    pd.testing.assert_frame_equal(restored, df.fillna({'text': np.nan}))
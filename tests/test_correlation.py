@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.correlation import correlation_matrix, strong_pairs, matrix_to_dict, dict_to_matrix
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 5000
+    x = rng.normal(size=n)
+    df = pd.DataFrame({
+        # A small spread on a large offset, which float32 cannot hold unshifted
+        'x': x * 1e-2 + 1e6,
+        'close': x + rng.normal(scale=0.1, size=n),
+        'opposite': -x + rng.normal(scale=0.5, size=n),
+        'noise': rng.normal(size=n),
+        'count': rng.integers(0, 10, n),
+        'constant': 1.0,
+        'sparse': np.where(rng.random(n) < 0.95, np.nan, rng.normal(size=n))
+    })
+    for col, share in [('close', 0.1), ('noise', 0.3)]:
+        df.loc[rng.random(n) < share, col] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('block_rows', [5000, 700])
+def test_matches_dataframe_corr(frame, block_rows):
+    columns = list(frame.columns)
+    
+    corr = correlation_matrix(frame, columns, block_rows=block_rows)
+    
+    np.testing.assert_allclose(corr, frame.corr().to_numpy(), rtol=0, atol=1e-8)
+
+
+def test_float32_stays_within_its_tolerance(frame):
+    columns = list(frame.columns)
+    
+    corr = correlation_matrix(frame, columns, float32=True, block_rows=700)
+    
+    np.testing.assert_allclose(corr, frame.corr().to_numpy(), rtol=0, atol=1e-5)
+
+
+def test_strong_pairs_and_dict_layout_match_pandas(frame):
+    columns = list(frame.columns)
+    corr = correlation_matrix(frame, columns)
+    expected = frame.corr()
+    
+    pairs = strong_pairs(corr, columns)
+    
+    assert [(pair['col1'], pair['col2']) for pair in pairs] == [('x', 'close'), ('x', 'opposite'), ('close', 'opposite')]
+    assert [pair['col1'] for pair in strong_pairs(corr, columns, top_k=1)] == ['x']
+    restored = dict_to_matrix(matrix_to_dict(corr, columns), columns)
+    np.testing.assert_array_equal(restored, corr)
+    assert matrix_to_dict(corr, columns).keys() == expected.to_dict().keys()
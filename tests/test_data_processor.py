@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data_processor import DataProcessor
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 200
+    path = str(tmp_path / 'data.csv')
+    pd.DataFrame({
+        'count': rng.integers(0, 100, n),
+        'score': rng.integers(0, 4, n) / 2,
+        'group': rng.choice(['a', 'b', 'c'], n)
+    }).to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize('frame', ['parsed', 'compacted'])
+def test_sidecar_keeps_parsed_dtypes_and_compaction_happens_on_load(csv_path, frame):
+    processor = DataProcessor(compact_dtypes=True)
+    parsed = pd.read_csv(csv_path)
+    df = processor.load_data(csv_path) if frame == 'compacted' else processor.load_data(csv_path, compact=False)
+    assert processor.build_sidecar(csv_path, df)
+    processor.cache.clear()
+
+    assert processor.open_store(csv_path) is not None
+    pd.testing.assert_series_equal(processor.load_data(csv_path, compact=False).dtypes, parsed.dtypes)
+    compacted = processor.load_data(csv_path)
+    assert compacted['count'].dtype == np.int8
+    assert compacted['score'].dtype == np.float32
+    assert isinstance(compacted['group'].dtype, pd.CategoricalDtype)
+
+
+IN_PLACE_WRITES = {
+    # Values the compacted dtypes (int8, category) can hold, so pandas writes in place rather than upcasting
+    'loc': lambda df: df.loc.__setitem__((0, 'count'), 99),
+    'iloc': lambda df: df.iloc.__setitem__((0, 1), 1000.0),
+    'at': lambda df: df.at.__setitem__((0, 'group'), 'b'),
+    'fillna': lambda df: df.fillna(0, inplace=True),
+}
+
+
+@pytest.fixture
+def gappy_csv_path(csv_path):
+    df = pd.read_csv(csv_path)
+    df.loc[::7, 'score'] = np.nan
+    df.to_csv(csv_path, index=False)
+    return csv_path
+
+
+@pytest.mark.parametrize('compact', [False, True])
+@pytest.mark.parametrize('write', list(IN_PLACE_WRITES))
+def test_in_place_writes_to_a_cached_frame_raise(gappy_csv_path, compact, write):
+    processor = DataProcessor(compact_dtypes=compact)
+    expected = processor.load_data(gappy_csv_path).copy()
+    
+    with pytest.raises(ValueError, match='read-only'):
+        IN_PLACE_WRITES[write](processor.load_data(gappy_csv_path))
+    
+    pd.testing.assert_frame_equal(processor.load_data(gappy_csv_path), expected)
+    # Served from the cache every time, never parsed again
+    assert processor.cache.stats()['misses'] == 1
+
+
+@pytest.mark.parametrize('write', list(IN_PLACE_WRITES))
+def test_frames_are_deep_copies_when_they_cannot_be_frozen(gappy_csv_path, monkeypatch, write):
+    monkeypatch.setattr(DataProcessor, '_backing_arrays', staticmethod(lambda df: None))
+    processor = DataProcessor()
+    expected = processor.load_data(gappy_csv_path).copy()
+    
+    IN_PLACE_WRITES[write](processor.load_data(gappy_csv_path))
+    
+    pd.testing.assert_frame_equal(processor.load_data(gappy_csv_path), expected)
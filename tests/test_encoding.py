@@ -0,0 +1,69 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import LabelEncoder
+
+from ml.models import ModelTrainer
+from ml.predictor import ModelPredictor
+from utils.encoding import CategoryEncoder, UNSEEN_CODE
+
+
+@pytest.mark.parametrize('values', [
+    ['b', 'a', 'c', 'a', np.nan, 'b'],
+    [3, 1, 2, 3, np.nan],
+    ['x', 1, 2.5, np.nan, 'x'],
+])
+def test_codes_match_label_encoder_on_strings(values):
+    series = pd.Series(values, dtype=object)
+    expected = LabelEncoder().fit_transform(series.astype(str))
+    
+    encoder = CategoryEncoder()
+    np.testing.assert_array_equal(encoder.fit_transform(series), expected)
+    np.testing.assert_array_equal(encoder.transform(series), expected)
+
+
+def test_unseen_values_and_extend_keep_existing_codes():
+    encoder = CategoryEncoder().fit(pd.Series(['b', 'a']))
+    assert list(encoder.transform(pd.Series(['a', 'z', 'b']))) == [0, UNSEEN_CODE, 1]
+    
+    assert encoder.extend(pd.Series(['z', 'a'])) == 1
+    assert list(encoder.transform(pd.Series(['a', 'z', 'b']))) == [0, 2, 1]
+    restored = pickle.loads(pickle.dumps(encoder))
+    assert list(restored.transform(pd.Series(['z', 'b']))) == [2, 1]
+
+
+def test_codes_do_not_depend_on_previously_trained_datasets(trainer, make_frame, tmp_path):
+    first = make_frame(300, 0, labels=['x', 'y'], colors=['red', 'green'])
+    second = make_frame(300, 1, labels=['y', 'z'], colors=['blue', 'green', 'purple'])
+    
+    trainer.prepare_split(first, 'target', ['a', 'color'])
+    reused = trainer.prepare_split(second, 'target', ['a', 'color'])
+    fresh = ModelTrainer(str(tmp_path / 'fresh'), train_workers=1).prepare_split(second, 'target', ['a', 'color'])
+    
+    np.testing.assert_array_equal(reused.X, fresh.X)
+    np.testing.assert_array_equal(reused.y, fresh.y)
+    assert list(reused.label_encoders['color'].classes_) == ['blue', 'green', 'purple']
+    assert list(reused.label_encoders['target'].classes_) == ['y', 'z']
+
+
+def test_saved_encoders_belong_to_their_own_model(trainer, make_frame):
+    predictor = ModelPredictor(trainer.models_folder, model_cache=trainer.model_cache)
+    first = make_frame(300, 0, labels=['x', 'y'], colors=['red', 'green'])
+    config = {'model_type': 'decision_tree'}
+    
+    first_id = trainer.train_model(first, 'target', ['a', 'color'], model_config=config)['model_id']
+    before = predictor.predict_batch(first_id, first)['predictions']
+    
+    # A second dataset with other columns and categories trained by the same trainer
+    second = make_frame(300, 1, labels=['z', 'w'], colors=['blue', 'purple']).rename(columns={'color': 'shade'})
+    second_id = trainer.train_model(second, 'target', ['a', 'shade'], model_config=config)['model_id']
+    
+    second_encoders = trainer.model_cache.load_fresh(second_id)['label_encoders']
+    assert set(second_encoders) == {'shade', 'target'}
+    assert list(second_encoders['target'].classes_) == ['w', 'z']
+    first_encoders = trainer.model_cache.load_fresh(first_id)['label_encoders']
+    assert list(first_encoders['color'].classes_) == ['green', 'red']
+    assert predictor.predict_batch(first_id, first)['predictions'] == before
+    assert set(before) <= {'x', 'y'}
@@ -0,0 +1,105 @@
+import time
+import importlib
+import threading
+
+import pytest
+
+from ml.jobs import TrainingJobQueue, QueueFullError, JobNotFoundError, QUEUED, RUNNING, COMPLETED, CANCELLED
+
+TIMEOUT = 10
+
+
+def blocking_work(started, release):
+    """Work that signals it is running, then waits for release (or, without one, for a cancel)"""
+    def work(job):
+        started.set()
+        job.model_started(0)
+        (release or job.cancel_event).wait(TIMEOUT)
+        cancelled = job.cancel_event.is_set()
+        job.model_finished(0, {'cancelled': True} if cancelled else {'score': 1.0})
+        return None if cancelled else {'score': 1.0}
+    return work
+
+
+@pytest.fixture
+def jobs():
+    return TrainingJobQueue(workers=1, max_queued=4)
+
+
+def test_cancelling_a_queued_job_means_it_never_runs(jobs):
+    started, release = threading.Event(), threading.Event()
+    running = jobs.submit('train', ['linear'], blocking_work(started, release))
+    assert started.wait(TIMEOUT)
+    
+    ran = threading.Event()
+    queued = jobs.submit('train', ['linear'], lambda job: ran.set())
+    assert queued.status == QUEUED
+    assert jobs.cancel(queued.id)
+    assert queued.status == CANCELLED
+    assert queued.cancel_event.is_set()
+    
+    release.set()
+    assert running.wait(TIMEOUT) and running.status == COMPLETED
+    # The worker dequeues the cancelled job and skips it
+    jobs._queue.join()
+    assert not ran.is_set()
+    assert queued.status == CANCELLED and queued.started_at is None
+    assert not jobs.cancel(queued.id)
+
+
+def test_cancelling_a_running_job_signals_its_work(jobs):
+    started = threading.Event()
+    job = jobs.submit('train', ['linear'], blocking_work(started, None))
+    assert started.wait(TIMEOUT)
+    assert job.status == RUNNING
+    
+    assert jobs.cancel(job.id)
+    assert job.wait(TIMEOUT)
+    assert job.status == CANCELLED
+    assert job.result is None
+    assert job.to_dict()['models'][0]['status'] == CANCELLED
+    assert not jobs.cancel(job.id)
+
+
+def test_queue_applies_backpressure_and_unknown_jobs_raise():
+    jobs = TrainingJobQueue(workers=1, max_queued=1)
+    started, release = threading.Event(), threading.Event()
+    jobs.submit('train', ['linear'], blocking_work(started, release))
+    assert started.wait(TIMEOUT)
+    jobs.submit('train', ['linear'], lambda job: None)
+    
+    with pytest.raises(QueueFullError):
+        jobs.submit('train', ['linear'], lambda job: None)
+    with pytest.raises(JobNotFoundError):
+        jobs.get('missing')
+    release.set()
+
+
+def test_synchronous_endpoint_returns_409_when_its_job_is_cancelled(tmp_path, monkeypatch):
+    # The app creates its upload and model folders in the working directory on import
+    monkeypatch.chdir(tmp_path)
+    app_module = importlib.import_module('app')
+    jobs = TrainingJobQueue(workers=1, max_queued=4)
+    monkeypatch.setattr(app_module, 'training_jobs', jobs)
+    started, release = threading.Event(), threading.Event()
+    jobs.submit('train', ['linear'], blocking_work(started, release))
+    assert started.wait(TIMEOUT)
+    
+    def cancel_when_queued():
+        for _ in range(TIMEOUT * 100):
+            queued = [job for job in jobs.list() if job['status'] == QUEUED]
+            if queued:
+                jobs.cancel(queued[0]['job_id'])
+                return
+            time.sleep(0.01)
+    
+    canceller = threading.Thread(target=cancel_when_queued)
+    canceller.start()
+    response = app_module.app.test_client().post('/api/models/train', json={
+        'filename': 'data.csv', 'target_column': 'target', 'model_config': {'model_type': 'linear'}
+    })
+    canceller.join()
+    release.set()
+    
+    assert response.status_code == 409
+    assert response.get_json()['cancelled'] is True
@@ -0,0 +1,73 @@
+import os
+import pickle
+
+import pytest
+
+from ml.resources import THREAD_ENV_VARS
+
+# String labels, so the target goes through its label encoder on every update
+LABELS = ('no', 'yes')
+
+
+def model_path(trainer, model_id):
+    return os.path.join(trainer.models_folder, f"{model_id}.pkl")
+
+
+@pytest.mark.parametrize('model_type', ['sgd', 'random_forest'])
+def test_update_right_after_training_saves_a_new_model(trainer, make_frame, model_type):
+    config = {'model_type': model_type, 'n_estimators': 5}
+    parent = trainer.train_model(make_frame(400, 0, labels=LABELS), 'target', model_config=config)
+    with open(model_path(trainer, parent['model_id']), 'rb') as f:
+        parent_bytes = f.read()
+    
+    # Same second as the parent: the ids must still differ
+    update = trainer.update_model(parent['model_id'], make_frame(200, 1, labels=LABELS), {'n_estimators': 5})
+    
+    assert update['model_id'] != parent['model_id']
+    assert update['parent_model_id'] == parent['model_id']
+    assert update['train_size'] == parent['train_size'] + update['new_rows']
+    with open(model_path(trainer, parent['model_id']), 'rb') as f:
+        assert f.read() == parent_bytes
+    with open(model_path(trainer, update['model_id']), 'rb') as f:
+        saved = pickle.load(f)
+    assert saved['parent_model_id'] == parent['model_id']
+    assert trainer.get_model_info(update['model_id'])['parent_model_id'] == parent['model_id']
+
+
+def test_updates_chain_without_changing_earlier_models(trainer, make_frame):
+    parent = trainer.train_model(make_frame(400, 0, labels=LABELS), 'target',
+                                 model_config={'model_type': 'random_forest', 'n_estimators': 5})
+    # A cached copy of the parent must not see the trees added by the update
+    cached = trainer.model_cache.get(parent['model_id'])['model']
+    
+    first = trainer.update_model(parent['model_id'], make_frame(200, 1, labels=LABELS), {'n_estimators': 5})
+    second = trainer.update_model(first['model_id'], make_frame(200, 2, labels=LABELS), {'n_estimators': 5})
+    
+    lineage = [parent['model_id'], first['model_id'], second['model_id']]
+    assert len(set(lineage)) == 3
+    assert second['parent_model_id'] == first['model_id']
+    assert cached.n_estimators == 5
+    sizes = [trainer.model_cache.load_fresh(model_id)['model'].n_estimators for model_id in lineage]
+    assert sizes == [5, 10, 15]
+
+
+def test_models_saved_in_the_same_second_get_distinct_files(trainer):
+    ids = {trainer._save_model('sgd', {'model': None}) for _ in range(50)}
+    
+    assert len(ids) == 50
+    assert all(os.path.exists(model_path(trainer, model_id)) for model_id in ids)
+
+
+def test_update_in_a_worker_process_leaves_this_process_uncapped(trainer, make_frame):
+    parent = trainer.train_model(make_frame(400, 0, labels=LABELS), 'target', model_config={'model_type': 'sgd'})
+    before = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+    events = []
+    
+    update = trainer.update_in_process(parent['model_id'], make_frame(200, 1, labels=LABELS), threads=1,
+                                       on_start=lambda index: events.append('start'),
+                                       on_result=lambda index, result: events.append(result['model_id']))
+    
+    assert events == ['start', update['model_id']]
+    assert update['parent_model_id'] == parent['model_id']
+    assert trainer.get_model_info(update['model_id'])['parent_model_id'] == parent['model_id']
+    assert {name: os.environ.get(name) for name in THREAD_ENV_VARS} == before
@@ -0,0 +1,68 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data_processor import DataProcessor
+from utils.profile_store import ProfileStore
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 500
+    path = str(tmp_path / 'data.csv')
+    pd.DataFrame({
+        'x': rng.normal(size=n),
+        'i': rng.integers(0, 5, n),
+        'c': rng.choice(['a', 'b'], n),
+        'y': rng.normal(size=n)
+    }).to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize('compact', [False, True])
+@pytest.mark.parametrize('sidecar', [False, True])
+def test_column_distributions_match_the_full_profile(csv_path, compact, sidecar):
+    processor = DataProcessor(compact_dtypes=compact)
+    if sidecar:
+        assert processor.build_sidecar(csv_path)
+    full = processor.build_profile(processor.load_data(csv_path))['distributions']
+    
+    partial = processor.build_distributions(csv_path, ['c', 'x', 'missing', 'i'])
+    
+    assert list(partial) == ['c', 'x', 'i']
+    assert all(repr(partial[col]) == repr(full[col]) for col in partial)
+
+
+def test_column_distributions_never_load_the_whole_frame(csv_path, monkeypatch):
+    processor = DataProcessor()
+    processor.build_sidecar(csv_path)
+    
+    def load_data(*args, **kwargs):
+        raise AssertionError("the whole frame was loaded")
+    
+    monkeypatch.setattr(processor, 'load_data', load_data)
+    assert list(processor.build_distributions(csv_path, ['y'])) == ['y']
+
+
+def test_a_stored_profile_has_the_same_shape_fresh_and_reloaded(tmp_path):
+    store = ProfileStore(str(tmp_path), cache_max_bytes=1 << 20)
+    profile = {
+        'distributions': {
+            'flag': {'value_counts': {True: np.int64(3), False: 2}, 'other_count': 0},
+            'code': {'value_counts': {np.int64(7): 4, 1.5: 1}, 'other_count': np.int32(0)},
+            'day': {'value_counts': {pd.Timestamp('2024-01-01'): 2}, 'mean': np.float32(0.5)},
+            'values': np.arange(3)
+        }
+    }
+    
+    fresh = store.put('key', profile)
+    reloaded = ProfileStore(str(tmp_path), cache_max_bytes=1 << 20).get('key')
+    
+    assert fresh == reloaded
+    assert json.dumps(fresh) == json.dumps(reloaded)
+    assert fresh['distributions']['flag']['value_counts'] == {'true': 3, 'false': 2}
+    assert fresh['distributions']['code']['value_counts'] == {'7': 4, '1.5': 1}
+    assert store.get('key') == fresh
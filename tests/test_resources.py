@@ -0,0 +1,89 @@
+import os
+import time
+import threading
+
+from ml.resources import ResourceScheduler, limit_threads, THREAD_ENV_VARS
+
+TIMEOUT = 10
+
+
+def acquire_in_thread(scheduler, cpus, memory_bytes, admitted, cancel=None):
+    def run():
+        admitted.append((cpus, memory_bytes, scheduler.acquire(cpus, memory_bytes, cancel)))
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def wait_for_waiting(scheduler, count):
+    deadline = time.monotonic() + TIMEOUT
+    while scheduler.stats()['waiting'] < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_requests_larger_than_the_budget_are_clamped():
+    scheduler = ResourceScheduler(max_cpus=4, max_memory_bytes=1000)
+    reservation = scheduler.acquire(16, 5000)
+    
+    assert reservation.to_dict() == {'cpus': 4, 'memory_bytes': 1000}
+    assert scheduler.stats()['cpus_used'] == 4
+    scheduler.release(reservation)
+    assert scheduler.stats()['cpus_used'] == 0 and scheduler.stats()['running'] == 0
+
+
+def test_jobs_are_admitted_in_arrival_order():
+    scheduler = ResourceScheduler(max_cpus=4, max_memory_bytes=1000)
+    first = scheduler.acquire(3, 100)
+    admitted = []
+    
+    # The large request waits for the first job; the small one would fit now but must queue behind it
+    large = acquire_in_thread(scheduler, 4, 100, admitted)
+    wait_for_waiting(scheduler, 1)
+    small = acquire_in_thread(scheduler, 1, 100, admitted)
+    wait_for_waiting(scheduler, 2)
+    assert admitted == []
+    
+    scheduler.release(first)
+    large.join(TIMEOUT)
+    assert [entry[:2] for entry in admitted] == [(4, 100)]
+    scheduler.release(admitted[0][2])
+    small.join(TIMEOUT)
+    assert [entry[:2] for entry in admitted] == [(4, 100), (1, 100)]
+
+
+def test_memory_budget_holds_back_a_job_until_memory_is_released():
+    scheduler = ResourceScheduler(max_cpus=8, max_memory_bytes=1000)
+    first = scheduler.acquire(1, 700)
+    admitted = []
+    
+    waiting = acquire_in_thread(scheduler, 1, 500, admitted)
+    wait_for_waiting(scheduler, 1)
+    assert admitted == []
+    scheduler.release(first)
+    waiting.join(TIMEOUT)
+    assert admitted[0][2].memory_bytes == 500
+
+
+def test_cancelling_a_waiting_request_reserves_nothing():
+    scheduler = ResourceScheduler(max_cpus=2)
+    first = scheduler.acquire(2, 0)
+    cancel = threading.Event()
+    admitted = []
+    
+    waiting = acquire_in_thread(scheduler, 1, 0, admitted, cancel)
+    wait_for_waiting(scheduler, 1)
+    cancel.set()
+    waiting.join(TIMEOUT)
+    
+    assert admitted == [(1, 0, None)]
+    assert scheduler.stats()['waiting'] == 0
+    assert scheduler.stats()['cpus_used'] == 2
+    scheduler.release(first)
+
+
+def test_limit_threads_restores_the_environment():
+    before = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+    with limit_threads(2):
+        assert all(os.environ[name] == '2' for name in THREAD_ENV_VARS)
+    assert {name: os.environ.get(name) for name in THREAD_ENV_VARS} == before
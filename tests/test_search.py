@@ -0,0 +1,102 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml.search import SuccessiveHalvingSearch, halving_rounds, candidate_grid, _fold_score
+
+
+TRAINER_OPTIONS = {'train_workers': 4, 'chunk_rows': 64}
+
+
+def test_schedule_keeps_a_third_and_ends_on_every_row():
+    assert halving_rounds(1) == 1
+    assert halving_rounds(9) == 3
+    assert halving_rounds(10) == 3
+    
+    search = SuccessiveHalvingSearch(None, 'decision_tree', [{}] * 9, n_folds=3)
+    plan = search.schedule(900, 2)
+    assert [candidates for candidates, _ in plan] == [9, 3, 1]
+    assert [rows for _, rows in plan] == [100, 300, 900]
+
+
+def test_candidate_grid_subset_is_seeded():
+    full = candidate_grid('random_forest')
+    subset = candidate_grid('random_forest', max_candidates=5, random_state=7)
+    
+    assert len(subset) == 5 and all(params in full for params in subset)
+    assert subset == candidate_grid('random_forest', max_candidates=5, random_state=7)
+    with pytest.raises(ValueError):
+        candidate_grid('unknown')
+
+
+@pytest.mark.parametrize('config', [
+    {'model_type': 'random_forest', 'n_estimators': 10},
+    {'model_type': 'sgd'},
+    {'model_type': 'knn_sampled', 'max_rows': 100},
+])
+def test_fold_fits_match_the_final_fit(trainer, make_frame, config):
+    # A candidate's fold score must describe the model train_model would save with the same params
+    df = make_frame(400)
+    model_type = config['model_type']
+    result = trainer.train_model(df, 'target', model_config=dict(config, random_state=42))
+    saved = trainer.model_cache.load_fresh(result['model_id'])
+    
+    scaled = saved['scaler'] is not None
+    prepared = trainer.prepare_split(df, 'target', scale='in_place' if scaled else None)
+    params = dict({'random_state': 42}, **{key: value for key, value in config.items() if key != 'model_type'})
+    X_train = prepared.X_train_scaled if scaled else prepared.X_train
+    X_test = prepared.X_test_scaled if scaled else prepared.X_test
+    model = trainer._fit_fold(model_type, params, X_train, prepared.y_train)
+    
+    np.testing.assert_array_equal(model.predict(X_test), saved['model'].predict(X_test))
+
+
+def test_search_ranks_candidates_and_saves_the_winner(trainer, make_frame):
+    df = make_frame(600)
+    grid = {'max_depth': [1, 2, 4, None]}
+    rounds = []
+    
+    result = trainer.search_hyperparameters(df, 'target', model_type='decision_tree', param_grid=grid,
+                                            cv_folds=3, on_result=lambda stage, summary: rounds.append(stage))
+    
+    leaderboard = result['leaderboard']
+    assert len(result['rounds']) == halving_rounds(4) == 2
+    assert rounds == [0, 1, 2]
+    assert [entry['rank'] for entry in leaderboard] == [1, 2, 3, 4]
+    # Survivors of the last round rank first, best mean score first
+    finalists = [entry for entry in leaderboard if entry['round'] == 2]
+    assert len(finalists) == 2 and leaderboard[:2] == finalists
+    assert finalists[0]['mean_score'] >= finalists[1]['mean_score']
+    assert finalists[0]['rows'] == len(df) - int(len(df) * 0.2)
+    
+    best = result['best_model']
+    assert best['params'] == leaderboard[0]['params']
+    assert best['cv_score'] == leaderboard[0]['mean_score']
+    assert trainer.model_cache.load_fresh(best['model_id'])['model'].max_depth == best['params']['max_depth']
+
+
+def test_search_scores_match_in_process_fold_scores(trainer, make_frame, tmp_path):
+    prepared = trainer.prepare_split(make_frame(300), 'target')
+    X, y = prepared.X[:prepared.n_train], prepared.y_train
+    search = SuccessiveHalvingSearch(trainer._fit_fold, 'decision_tree', [{'max_depth': 3}], n_folds=3)
+    
+    entry = search.run(X, y, workers=3)[0]
+    
+    X_path = str(tmp_path / 'X.npy')
+    np.save(X_path, X)
+    expected = [_fold_score(trainer._fit_fold, 'decision_tree', {'random_state': 42, 'max_depth': 3}, False,
+                            X_path, y, train_rows, test_rows) for train_rows, test_rows in search._folds(y)]
+    assert entry['fold_scores'] == expected
+
+
+def test_cancelled_search_saves_no_model(trainer, make_frame):
+    cancel = threading.Event()
+    cancel.set()
+    
+    result = trainer.search_hyperparameters(make_frame(300), 'target', model_type='decision_tree',
+                                            param_grid={'max_depth': [2, 3]}, cv_folds=3, cancel=cancel)
+    
+    assert result['best_model'] is None
+    assert all('error' in entry for entry in result['leaderboard'])
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+from utils.sketches import QuantileSketch, HeavyHitters, RunningMoments, RowHashSet
+
+QS = np.linspace(0.01, 0.99, 99)
+
+
+def rank_error(values, estimates, qs):
+    """Largest gap between the requested and the true rank of each estimate"""
+    ranks = np.searchsorted(np.sort(values), estimates) / len(values)
+    return np.abs(ranks - qs).max()
+
+
+def test_quantiles_are_exact_until_the_first_compaction():
+    values = np.random.default_rng(0).normal(size=500)
+    sketch = QuantileSketch(k=1024)
+    sketch.update(values)
+    
+    np.testing.assert_allclose(sketch.quantiles(QS), np.quantile(values, QS))
+
+
+def test_quantile_rank_error_is_bounded_by_the_sketch_size():
+    rng = np.random.default_rng(1)
+    k = 128
+    for seed in range(3):
+        values = rng.lognormal(size=100000)
+        sketch = QuantileSketch(k=k, seed=seed)
+        for chunk in np.array_split(values, 37):
+            sketch.update(chunk)
+        
+        assert sketch.count == len(values)
+        assert rank_error(values, sketch.quantiles(QS), QS) < 4 / k
+        assert sketch.nbytes < 4 * k * 8
+
+
+def test_merged_sketches_keep_the_error_bound():
+    rng = np.random.default_rng(2)
+    parts = [rng.uniform(size=30000) for _ in range(4)]
+    merged = QuantileSketch(k=128)
+    for part in parts:
+        sketch = QuantileSketch(k=128)
+        sketch.update(part)
+        merged.merge(sketch)
+    
+    values = np.concatenate(parts)
+    assert merged.count == len(values)
+    assert rank_error(values, merged.quantiles(QS), QS) < 4 / 128
+
+
+def test_quantiles_ignore_nan_and_empty_sketch_gives_nan():
+    sketch = QuantileSketch()
+    assert np.isnan(sketch.quantile(0.5))
+    
+    sketch.update([1.0, np.nan, 3.0])
+    assert sketch.count == 2
+    assert sketch.quantile(0.5) == 2.0
+
+
+def test_heavy_hitters_counts_are_exact_below_k_distinct_values():
+    values = pd.Series(np.random.default_rng(3).integers(0, 50, size=5000)).astype(str)
+    hitters = HeavyHitters(k=64)
+    for start in range(0, len(values), 700):
+        hitters.update(values[start:start + 700])
+    
+    exact = values.value_counts()
+    pd.testing.assert_series_equal(hitters.counts.sort_index(), exact.sort_index(), check_names=False)
+    assert hitters.mode() == values.mode()[0]
+
+
+def test_heavy_hitters_undercount_by_at_most_n_over_k_plus_one():
+    rng = np.random.default_rng(4)
+    # A Zipf-like column with far more distinct values than counters
+    values = pd.Series(np.minimum(rng.zipf(1.3, size=50000), 10 ** 6))
+    k = 32
+    hitters = HeavyHitters(k=k)
+    for start in range(0, len(values), 5000):
+        hitters.update(values[start:start + 5000])
+    
+    exact = values.value_counts()
+    tracked = exact.reindex(hitters.counts.index)
+    assert len(hitters.counts) <= k
+    assert (hitters.counts <= tracked).all()
+    assert (tracked - hitters.counts <= len(values) / (k + 1)).all()
+    # Every value above the n/(k+1) threshold survives, including the mode
+    frequent = exact[exact > len(values) / (k + 1)].index
+    assert set(frequent) <= set(hitters.counts.index)
+    assert hitters.mode() == exact.idxmax()
+
+
+def test_running_moments_match_numpy():
+    values = np.random.default_rng(5).normal(10, 3, size=10001)
+    moments = RunningMoments()
+    for chunk in np.array_split(values, 13):
+        moments.update(chunk)
+    
+    assert moments.count == len(values)
+    assert np.isclose(moments.mean, values.mean())
+    assert np.isclose(moments.std(), values.std(ddof=1))
+
+
+def test_row_hash_set_flags_first_occurrences_only():
+    hashes = np.random.default_rng(6).integers(0, 2000, size=10000).astype(np.uint64)
+    seen = RowHashSet()
+    is_new = np.concatenate([seen.add(chunk) for chunk in np.array_split(hashes, 9)])
+    
+    np.testing.assert_array_equal(is_new, ~pd.Series(hashes).duplicated().to_numpy())
+    assert len(seen) == len(np.unique(hashes))
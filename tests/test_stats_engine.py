@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.stats_engine import NumericSummary, missing_counts
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 1000
+    df = pd.DataFrame({
+        'x': rng.standard_t(3, size=n) * 10 + 5,
+        'gappy': rng.normal(size=n),
+        'count': rng.integers(-50, 50, n),
+        'constant': 3.0,
+        'one_value': np.nan,
+        'all_missing': np.nan,
+        'label': rng.choice(['a', 'b'], n)
+    })
+    df.loc[rng.random(n) < 0.3, 'gappy'] = np.nan
+    df.loc[7, 'one_value'] = 2.5
+    return df
+
+
+def numeric(df):
+    return df.select_dtypes(include=[np.number])
+
+
+def test_describe_matches_pandas(frame):
+    summary = NumericSummary(numeric(frame))
+    
+    expected = numeric(frame).describe().to_dict()
+    described = summary.describe()
+    
+    assert list(described) == list(expected)
+    for col, stats in expected.items():
+        np.testing.assert_allclose(pd.Series(described[col])[list(stats)], pd.Series(stats),
+                                   rtol=1e-12, atol=0, equal_nan=True, err_msg=col)
+
+
+@pytest.mark.parametrize('q', [0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1])
+def test_quantiles_match_pandas(frame, q):
+    summary = NumericSummary(numeric(frame))
+    
+    np.testing.assert_array_equal(summary.quantile(q), numeric(frame).quantile(q).to_numpy())
+
+
+def test_outliers_and_missing_counts_match_pandas(frame):
+    df = numeric(frame)
+    summary = NumericSummary(df)
+    
+    q1, q3 = df.quantile(0.25), df.quantile(0.75)
+    outliers = ((df < q1 - 1.5 * (q3 - q1)) | (df > q3 + 1.5 * (q3 - q1))).sum()
+    np.testing.assert_array_equal(summary.outliers, outliers.to_numpy())
+    assert summary.outliers[list(df.columns).index('x')] > 0
+    assert set(summary.outlier_report()) == set(outliers[outliers > 0].index)
+    pd.testing.assert_series_equal(missing_counts(frame, summary), frame.isnull().sum())
+
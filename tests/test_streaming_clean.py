@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.column_store import ColumnStore, SchemaConflictError
+from utils.data_processor import DataProcessor
+
+OPTIONS = [
+    {},
+    {'remove_duplicates': True},
+    {'imputation_strategy': 'drop', 'remove_duplicates': True},
+    {'imputation_strategy': 'mean', 'remove_duplicates': True, 'handle_outliers': True, 'outlier_action': 'remove'},
+    {'handle_outliers': True, 'outlier_action': 'remove', 'outlier_method': 'zscore'},
+]
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 600
+    df = pd.DataFrame({
+        'x': rng.normal(size=n),
+        'y': rng.integers(0, 20, n).astype(float),
+        'c': rng.choice(['a', 'b', 'c'], n),
+        'mostly_missing': np.nan
+    })
+    df.loc[rng.choice(n, 40, replace=False), 'x'] = np.nan
+    df.loc[rng.choice(n, 30, replace=False), 'c'] = None
+    df.loc[5, 'x'] = 50
+    # Duplicates that straddle chunk boundaries
+    df = pd.concat([df, df.iloc[:50]], ignore_index=True)
+    path = tmp_path / 'data.csv'
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_streaming_clean_matches_in_memory_clean(csv_path, tmp_path, options):
+    processor = DataProcessor()
+    expected, expected_report = processor.clean_data(pd.read_csv(csv_path), options)
+    
+    output_path = str(tmp_path / 'cleaned')
+    report = processor.clean_data_streaming(csv_path, output_path, options, chunk_rows=97)
+    cleaned = ColumnStore(output_path).read()
+    
+    assert report == expected_report
+    pd.testing.assert_frame_equal(cleaned, expected.reset_index(drop=True))
+
+
+def test_streaming_median_stays_within_the_sketch_error(tmp_path):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({'x': rng.exponential(size=50000)})
+    df.loc[rng.choice(len(df), 5000, replace=False), 'x'] = np.nan
+    path = str(tmp_path / 'large.csv')
+    df.to_csv(path, index=False)
+    
+    processor = DataProcessor()
+    processor.clean_data_streaming(path, str(tmp_path / 'cleaned'), chunk_rows=4000)
+    cleaned = ColumnStore(str(tmp_path / 'cleaned')).read()
+    
+    # The filled value is the sketched median: its rank is within ~1/k of the middle
+    filled = cleaned['x'][df['x'].isna().to_numpy()].unique()
+    assert len(filled) == 1
+    observed = np.sort(df['x'].dropna().to_numpy())
+    rank = np.searchsorted(observed, filled[0]) / len(observed)
+    assert abs(rank - 0.5) < 4 / 1024
+
+
+def test_streaming_clean_rejects_columns_that_change_type(tmp_path):
+    path = str(tmp_path / 'drift.csv')
+    pd.DataFrame({'x': [str(i) for i in range(100)] + ['text'] * 100}).to_csv(path, index=False)
+    
+    with pytest.raises(SchemaConflictError):
+        DataProcessor().clean_data_streaming(path, str(tmp_path / 'cleaned'), chunk_rows=50)
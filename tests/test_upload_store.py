@@ -0,0 +1,64 @@
+import io
+import os
+import hashlib
+
+import pytest
+
+from utils.upload_store import UploadStore, derived_key
+
+FIRST = b"a,b\n1,2\n3,4\n"
+SECOND = b"a,b\n5,6\n"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadStore(str(tmp_path))
+
+
+def test_identical_uploads_share_one_blob(store):
+    digest, blob_path, is_new = store.ingest_stream(io.BytesIO(FIRST), 'data.csv')
+    again = store.ingest_stream(io.BytesIO(FIRST), 'copy.csv')
+    
+    assert digest == hashlib.sha256(FIRST).hexdigest()
+    assert is_new and again == (digest, blob_path, False)
+    assert store.resolve('data.csv') == store.resolve('copy.csv') == blob_path
+    assert store.linked_paths() == {blob_path}
+    # Temporary files never outlive an ingest
+    assert os.listdir(store.tmp_folder) == []
+
+
+def test_reuploading_a_name_moves_the_alias_and_keeps_the_old_blob(store):
+    old_digest, old_path, _ = store.ingest_stream(io.BytesIO(FIRST), 'data.csv')
+    new_digest, new_path, _ = store.ingest_stream(io.BytesIO(SECOND), 'data.csv')
+    
+    assert new_digest != old_digest
+    assert store.resolve('data.csv') == new_path
+    assert store.digest_for('data.csv') == new_digest
+    with open(old_path, 'rb') as f:
+        assert f.read() == FIRST
+
+
+def test_aliases_written_by_another_process_are_seen(store, tmp_path):
+    other = UploadStore(str(tmp_path))
+    store.resolve('data.csv')
+    digest, blob_path, _ = other.ingest_stream(io.BytesIO(FIRST), 'data.csv')
+    
+    assert store.resolve('data.csv') == blob_path
+    assert store.digest_for('data.csv') == digest
+
+
+def test_unknown_names_resolve_to_the_upload_folder(store):
+    assert store.digest_for('legacy.csv') is None
+    assert store.resolve('legacy.csv') == os.path.join(store.upload_folder, 'legacy.csv')
+    # Names are sanitised the same way on every lookup
+    store.ingest_stream(io.BytesIO(FIRST), '../data.csv')
+    assert store.resolve('../data.csv') == store.resolve('data.csv')
+
+
+def test_derived_keys_depend_on_content_kind_and_params_only():
+    digest = hashlib.sha256(FIRST).hexdigest()
+    
+    assert derived_key(digest, 'clean', {'a': 1, 'b': 2}) == derived_key(digest, 'clean', {'b': 2, 'a': 1})
+    assert derived_key(digest, 'clean') == derived_key(digest, 'clean', {})
+    assert derived_key(digest, 'clean') != derived_key(digest, 'profile')
+    assert derived_key(digest, 'clean', {'a': 1}) != derived_key(digest, 'clean', {'a': 2})
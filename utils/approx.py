@@ -0,0 +1,202 @@
+import numpy as np
+from statistics import NormalDist
+
+from utils.correlation import dict_to_matrix
+from utils.stats_engine import NumericSummary, top_values, DEFAULT_HISTOGRAM_BINS, DEFAULT_TOP_K, HISTOGRAM_BINNINGS
+
+DEFAULT_CONFIDENCE = 0.95
+
+
+def sample_positions(total_rows, sample_rows, seed=0):
+    """Sorted positions of a uniform sample of rows drawn without replacement (seeded, so repeatable)"""
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(total_rows, size=min(sample_rows, total_rows), replace=False))
+
+
+class SampleEstimator:
+    """Population estimates with confidence intervals from a uniform row sample.
+    
+    Intervals use the finite population correction, so they shrink to
+    nothing as the sample approaches the whole dataset. Bounds are
+    [low, high] lists; None marks a side the sample cannot bound (the
+    true minimum can always lie below the sample minimum).
+    """
+    
+    def __init__(self, sample_rows, total_rows, confidence=DEFAULT_CONFIDENCE):
+        self.n = sample_rows
+        self.total = total_rows
+        self.confidence = confidence
+        self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+        self.fpc = np.sqrt((total_rows - sample_rows) / (total_rows - 1)) if total_rows > 1 else 0.0
+    
+    def scale(self, count):
+        """Population count estimated from a count in the sample"""
+        return int(round(count / self.n * self.total)) if self.n else 0
+    
+    def count_bounds(self, count):
+        """Wilson score interval for the population count behind a sample count"""
+        if self.n == 0:
+            return [0.0, float(self.total)]
+        p = count / self.n
+        z2 = self.z ** 2 / self.n
+        center = (p + z2 / 2) / (1 + z2)
+        half = self.z / (1 + z2) * np.sqrt(p * (1 - p) / self.n + z2 / (4 * self.n)) * self.fpc
+        return [float(max(0.0, center - half) * self.total), float(min(1.0, center + half) * self.total)]
+    
+    def mean_bounds(self, mean, std, count):
+        if count < 2 or np.isnan(std):
+            return [None, None]
+        half = self.z * std / np.sqrt(count) * self.fpc
+        return [float(mean - half), float(mean + half)]
+    
+    def std_bounds(self, std, count):
+        """Large-sample interval for the standard deviation (assumes roughly normal data)"""
+        if count < 2 or np.isnan(std):
+            return [None, None]
+        half = self.z / np.sqrt(2 * (count - 1)) * self.fpc
+        return [float(std * max(0.0, 1 - half)), float(std * (1 + half))]
+    
+    def quantile_bounds(self, summary, q):
+        """Distribution-free interval for each column's q-quantile from the sample's order statistics"""
+        count = summary.count
+        spread = self.z * np.sqrt(count * q * (1 - q)) * self.fpc
+        lower = np.clip(np.floor(q * (count - 1) - spread), 0, np.maximum(count - 1, 0)).astype(np.int64)
+        upper = np.clip(np.ceil(q * (count - 1) + spread), 0, np.maximum(count - 1, 0)).astype(np.int64)
+        return summary.value_at_rank(lower), summary.value_at_rank(upper)
+    
+    def correlation_bounds(self, corr, pairs):
+        """Fisher z intervals for a correlation matrix, given its pairwise-complete row counts"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            half = self.z / np.sqrt(pairs - 3) * self.fpc
+            z = np.arctanh(np.clip(corr, -1 + 1e-12, 1 - 1e-12))
+            low, high = np.tanh(z - half), np.tanh(z + half)
+        unknown = np.isnan(corr) | (pairs <= 3)
+        low[unknown] = np.nan
+        high[unknown] = np.nan
+        return low, high
+
+
+def _bound(value):
+    return None if value is None or np.isnan(value) else float(value)
+
+
+def approximate_profile(processor, sample, total_rows, basic_info=None, confidence=DEFAULT_CONFIDENCE,
+                        bins=DEFAULT_HISTOGRAM_BINS, top_k=DEFAULT_TOP_K):
+    """build_profile() computed from a uniform sample of a dataset with total_rows rows.
+    
+    Estimates keep the exact-mode layout (counts are scaled to the whole
+    dataset); an 'approximation' entry in the analysis and 'sample_size'
+    and 'error_bounds' entries in each distribution report how far each
+    estimate can be off. basic_info, when known exactly (e.g. from a
+    column store manifest), replaces the sampled estimate.
+    """
+    estimator = SampleEstimator(len(sample), total_rows, confidence)
+    numerical_cols = list(sample.select_dtypes(include=[np.number]).columns)
+    summary = NumericSummary(sample, numerical_cols)
+    
+    analysis = processor.analyze_data(sample, summary)
+    bounds = {}
+    sample_sizes = {}
+    
+    # Basic info: missing counts are estimated unless exact values were given
+    if basic_info is None:
+        info = analysis['basic_info']
+        info['shape']['rows'] = total_rows
+        missing = info['missing_values']
+        bounds['missing_values'] = {col: estimator.count_bounds(count) for col, count in missing.items()}
+        info['missing_values'] = {col: estimator.scale(count) for col, count in missing.items()}
+        info['memory_usage']['bytes'] = estimator.scale(info['memory_usage']['bytes'])
+    else:
+        analysis['basic_info'] = basic_info
+    
+    # Numeric statistics
+    quantile_bounds = {q: estimator.quantile_bounds(summary, q) for q in summary.QUANTILES}
+    statistics_bounds = {}
+    for j, col in enumerate(summary.columns):
+        count = int(summary.count[j])
+        stats = analysis['statistics'][col]
+        sample_sizes[col] = count
+        statistics_bounds[col] = {
+            'count': estimator.count_bounds(count),
+            'mean': estimator.mean_bounds(summary.mean[j], summary.std[j], count),
+            'std': estimator.std_bounds(summary.std[j], count),
+            'min': [None, _bound(summary.min[j])],
+            '25%': [_bound(quantile_bounds[0.25][0][j]), _bound(quantile_bounds[0.25][1][j])],
+            '50%': [_bound(quantile_bounds[0.5][0][j]), _bound(quantile_bounds[0.5][1][j])],
+            '75%': [_bound(quantile_bounds[0.75][0][j]), _bound(quantile_bounds[0.75][1][j])],
+            'max': [_bound(summary.max[j]), None]
+        }
+        stats['count'] = float(estimator.scale(count))
+    bounds['statistics'] = statistics_bounds
+    
+    # Correlations, with Fisher z intervals from each pair's complete-row count
+    if len(numerical_cols) > 1:
+        corr = dict_to_matrix(analysis['correlations'], numerical_cols)
+        valid = sample[numerical_cols].notna().to_numpy(dtype=np.float64)
+        low, high = estimator.correlation_bounds(corr, valid.T @ valid)
+        bounds['correlations'] = {col: {row: [_bound(low[i, j]), _bound(high[i, j])]
+                                        for i, row in enumerate(numerical_cols)}
+                                  for j, col in enumerate(numerical_cols)}
+    
+    # Outlier counts are proportions of the sample
+    bounds['outliers'] = {}
+    for col, report in analysis['outliers'].items():
+        bounds['outliers'][col] = estimator.count_bounds(report['count'])
+        report['count'] = estimator.scale(report['count'])
+    
+    # Categorical counts; the sample only sees a lower bound of the distinct values
+    bounds['categorical'] = {}
+    for col, report in analysis['categorical'].items():
+        counts = report['value_counts']
+        bounds['categorical'][col] = {
+            'unique_count': [report['unique_count'], None],
+            'value_counts': {value: estimator.count_bounds(count) for value, count in counts.items()}
+        }
+        report['value_counts'] = {value: estimator.scale(count) for value, count in counts.items()}
+        sample_sizes[col] = int(sample[col].notna().sum())
+    
+    analysis['approximation'] = {
+        'sample_rows': len(sample),
+        'total_rows': total_rows,
+        'confidence': confidence,
+        'sample_size': sample_sizes,
+        'error_bounds': bounds
+    }
+    
+    # Distributions: histogram and top-k counts are scaled like every other count
+    distributions = {}
+    for col in sample.columns:
+        if col in statistics_bounds:
+            col_bounds = statistics_bounds[col]
+            distribution = summary.distribution(col)
+            distribution['histograms'] = {}
+            for binning in HISTOGRAM_BINNINGS:
+                histogram = summary.histogram(col, bins, binning)
+                histogram['counts'] = [estimator.scale(count) for count in histogram['counts']]
+                distribution['histograms'][binning] = histogram
+            distribution['sample_size'] = sample_sizes[col]
+            distribution['error_bounds'] = {
+                'mean': col_bounds['mean'],
+                'median': col_bounds['50%'],
+                'std': col_bounds['std'],
+                'min': col_bounds['min'],
+                'max': col_bounds['max'],
+                'q25': col_bounds['25%'],
+                'q75': col_bounds['75%']
+            }
+        else:
+            distribution = top_values(sample[col], top_k)
+            counts = distribution['value_counts']
+            distribution['value_counts'] = {value: estimator.scale(count) for value, count in counts.items()}
+            distribution['other_count'] = estimator.scale(distribution['other_count'])
+            distribution['sample_size'] = int(sample[col].notna().sum())
+            distribution['error_bounds'] = {
+                'value_counts': {value: estimator.count_bounds(count) for value, count in counts.items()},
+                'unique_count': [distribution['unique_count'], None]
+            }
+        distributions[col] = distribution
+    
+    return {
+        'analysis': analysis,
+        'distributions': distributions
+    }
@@ -0,0 +1,174 @@
+import os
+import json
+import uuid
+import hashlib
+import threading
+from datetime import datetime
+
+COPY_BLOCK_SIZE = 1024 * 1024  # 1MB
+
+
+class UploadOffsetError(ValueError):
+    """A chunk was sent for an offset other than the next expected byte"""
+    
+    def __init__(self, expected_offset):
+        super().__init__(f"Chunk offset mismatch, expected offset {expected_offset}")
+        self.expected_offset = expected_offset
+
+
+class UploadTooLargeError(ValueError):
+    """The upload would exceed the maximum upload size"""
+
+
+class UploadNotFoundError(LookupError):
+    """No upload session exists with the given id"""
+
+
+class ChunkedUploadManager:
+    """Resumable uploads assembled on disk chunk by chunk.
+    
+    Each session is a partial file plus a small JSON state file under
+    <upload_folder>/.partial, so a client can query the received byte count
+    and resume after a dropped connection (or a server restart). Chunks are
+    copied from the request stream straight to disk in fixed-size blocks
+    and fed to a running SHA-256, so no chunk is ever held in memory whole.
+    """
+    
+    def __init__(self, upload_folder, max_upload_bytes=None):
+        self.partial_folder = os.path.join(upload_folder, '.partial')
+        os.makedirs(self.partial_folder, exist_ok=True)
+        self.max_upload_bytes = max_upload_bytes
+        self._hashers = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+    
+    def init(self, filename, total_size=None):
+        """Start a new upload session (total_size: the expected byte count, if known)"""
+        if total_size is not None and (isinstance(total_size, bool) or not isinstance(total_size, int)
+                                       or total_size < 0):
+            raise ValueError("total_size must be a non-negative integer")
+        if total_size is not None and self.max_upload_bytes and total_size > self.max_upload_bytes:
+            raise UploadTooLargeError(f"File exceeds the maximum upload size of {self.max_upload_bytes} bytes")
+        
+        upload_id = uuid.uuid4().hex
+        state = {
+            'upload_id': upload_id,
+            'filename': filename,
+            'total_size': total_size,
+            'received': 0,
+            'created_at': datetime.now().isoformat()
+        }
+        open(self._part_path(upload_id), 'wb').close()
+        self._save_state(state)
+        with self._lock:
+            self._hashers[upload_id] = (hashlib.sha256(), 0)
+        return state
+    
+    def status(self, upload_id):
+        """Return the session state, including the number of bytes received"""
+        return self._load_state(upload_id)
+    
+    def append(self, upload_id, offset, stream):
+        """Append the bytes of stream at offset, which must equal the received count"""
+        with self._session_lock(upload_id):
+            state = self._load_state(upload_id)
+            if offset != state['received']:
+                raise UploadOffsetError(state['received'])
+            
+            with self._lock:
+                hasher, hashed = self._hashers.get(upload_id, (None, 0))
+            if hasher is not None and hashed != offset:
+                hasher = None
+            
+            written = 0
+            try:
+                with open(self._part_path(upload_id), 'r+b') as f:
+                    # Drop any bytes left over from an interrupted chunk
+                    f.truncate(offset)
+                    f.seek(offset)
+                    while True:
+                        block = stream.read(COPY_BLOCK_SIZE)
+                        if not block:
+                            break
+                        written += len(block)
+                        if self.max_upload_bytes and offset + written > self.max_upload_bytes:
+                            f.truncate(offset)
+                            raise UploadTooLargeError(
+                                f"File exceeds the maximum upload size of {self.max_upload_bytes} bytes")
+                        f.write(block)
+                        if hasher is not None:
+                            hasher.update(block)
+            except BaseException:
+                # The running hash has seen bytes of a chunk that will be resent; finalize rehashes from disk
+                with self._lock:
+                    self._hashers.pop(upload_id, None)
+                raise
+            
+            state['received'] = offset + written
+            self._save_state(state)
+            with self._lock:
+                if hasher is not None:
+                    self._hashers[upload_id] = (hasher, state['received'])
+                else:
+                    self._hashers.pop(upload_id, None)
+            return state
+    
+    def finalize(self, upload_id, destination):
+        """Move the assembled file to destination and return (state, sha256 hex digest)"""
+        with self._session_lock(upload_id):
+            state = self._load_state(upload_id)
+            if state['total_size'] is not None and state['received'] != state['total_size']:
+                raise ValueError(f"Upload incomplete: received {state['received']} of {state['total_size']} bytes")
+            
+            with self._lock:
+                hasher, hashed = self._hashers.pop(upload_id, (None, 0))
+            if hasher is None or hashed != state['received']:
+                # The running hash was lost (e.g. another worker took some chunks); rehash from disk
+                hasher = hash_file(self._part_path(upload_id))
+            
+            os.replace(self._part_path(upload_id), destination)
+            os.remove(self._state_path(upload_id))
+        with self._lock:
+            self._locks.pop(upload_id, None)
+        return state, hasher.hexdigest()
+    
+    def abort(self, upload_id):
+        """Discard a session and its partial data"""
+        with self._session_lock(upload_id):
+            for path in (self._part_path(upload_id), self._state_path(upload_id)):
+                if os.path.exists(path):
+                    os.remove(path)
+        with self._lock:
+            self._hashers.pop(upload_id, None)
+            self._locks.pop(upload_id, None)
+    
+    def _session_lock(self, upload_id):
+        with self._lock:
+            return self._locks.setdefault(upload_id, threading.Lock())
+    
+    def _part_path(self, upload_id):
+        return os.path.join(self.partial_folder, f"{upload_id}.part")
+    
+    def _state_path(self, upload_id):
+        return os.path.join(self.partial_folder, f"{upload_id}.json")
+    
+    def _load_state(self, upload_id):
+        if not upload_id.isalnum() or not os.path.exists(self._state_path(upload_id)):
+            raise UploadNotFoundError(f"Upload {upload_id} not found")
+        with open(self._state_path(upload_id)) as f:
+            return json.load(f)
+    
+    def _save_state(self, state):
+        tmp_path = self._state_path(state['upload_id']) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._state_path(state['upload_id']))
+
+
+def hash_file(filepath, block_size=COPY_BLOCK_SIZE):
+    """Streaming SHA-256 of a file"""
+    hasher = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            hasher.update(block)
+    return hasher
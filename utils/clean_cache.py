@@ -0,0 +1,128 @@
+import os
+import json
+import uuid
+import shutil
+import threading
+
+from utils.column_store import ColumnStore
+
+ENTRY_NAME = 'entry.json'
+
+
+class CleanResultCache:
+    """On-disk cache of cleaned datasets, keyed by source content and cleaning options.
+    
+    Each entry is a column store directory (binary, memory-mappable, no
+    CSV round trip) plus an entry.json holding the cleaning report. The
+    entry file's mtime records the last access, which drives LRU eviction
+    once the cache exceeds its disk quota. Entries are written to a staging
+    directory and renamed into place, so readers never see half an entry.
+    """
+    
+    def __init__(self, folder, max_bytes):
+        self.folder = folder
+        self.staging_folder = os.path.join(folder, '.staging')
+        os.makedirs(self.staging_folder, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def path(self, key):
+        return os.path.join(self.folder, key)
+    
+    def get(self, key):
+        """Return {'path', 'report', 'nbytes'} for a cached result (marking it used) or None"""
+        entry_path = os.path.join(self.path(key), ENTRY_NAME)
+        try:
+            with open(entry_path) as f:
+                entry = json.load(f)
+            os.utime(entry_path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        entry['path'] = self.path(key)
+        return entry
+    
+    def put(self, key, df, report):
+        """Store a cleaned frame and its report (call evict() afterwards to enforce the quota)"""
+        staging_path = self.staging_path()
+        try:
+            ColumnStore.write(df, staging_path)
+        except Exception:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            raise
+        return self.commit(key, staging_path, report)
+    
+    def staging_path(self):
+        """A fresh path to build a column store at before commit() publishes it"""
+        return os.path.join(self.staging_folder, uuid.uuid4().hex)
+    
+    def commit(self, key, staging_path, report):
+        """Publish a column store built at staging_path as the result for key"""
+        try:
+            entry = {'report': report, 'nbytes': _dir_size(staging_path)}
+            with open(os.path.join(staging_path, ENTRY_NAME), 'w') as f:
+                json.dump(entry, f)
+            try:
+                os.rename(staging_path, self.path(key))
+            except OSError:
+                # Another request stored the same result first; both are identical
+                pass
+        finally:
+            shutil.rmtree(staging_path, ignore_errors=True)
+        entry['path'] = self.path(key)
+        return entry
+    
+    def evict(self, pinned=()):
+        """Remove least recently used entries until the cache fits its quota.
+        
+        Paths in pinned (e.g. entries a filename alias points at) are never evicted.
+        """
+        with self._lock:
+            entries = self._entries()
+            total = sum(nbytes for _, _, nbytes in entries)
+            for path, _, nbytes in sorted(entries, key=lambda entry: entry[1]):
+                if total <= self.max_bytes:
+                    break
+                if path in pinned:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                total -= nbytes
+                self.evictions += 1
+    
+    def stats(self):
+        with self._lock:
+            entries = self._entries()
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(entries),
+                'current_bytes': sum(nbytes for _, _, nbytes in entries),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+    
+    def _entries(self):
+        # (path, last access, size) for every complete entry
+        entries = []
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            entry_path = os.path.join(path, ENTRY_NAME)
+            try:
+                with open(entry_path) as f:
+                    nbytes = json.load(f)['nbytes']
+                entries.append((path, os.stat(entry_path).st_mtime_ns, nbytes))
+            except (OSError, ValueError, KeyError):
+                continue
+        return entries
+
+
+def _dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
@@ -0,0 +1,362 @@
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 2  # bump when the stored layout or encoding changes so stale sidecars are never read
+MANIFEST_NAME = 'manifest.json'
+SIDECAR_SUFFIX = '.cols'
+
+
+def sidecar_path(filepath):
+    """Location of the columnar sidecar for an uploaded file"""
+    return filepath + SIDECAR_SUFFIX
+
+
+class ColumnStore:
+    """Binary columnar copy of a dataset: one typed array file per column.
+    
+    Numeric and boolean columns are stored as raw little-endian arrays that
+    are memory-mapped on read, datetimes as int64 nanoseconds, and
+    object/categorical columns as int32 dictionary codes plus a category
+    array. A JSON manifest records the schema, the row count and the
+    size/mtime of the source file the store was converted from.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._manifest = None
+        self._categories = {}
+    
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            with open(os.path.join(self.path, MANIFEST_NAME)) as f:
+                self._manifest = json.load(f)
+        return self._manifest
+    
+    @property
+    def rows(self):
+        return self.manifest['rows']
+    
+    @property
+    def columns(self):
+        return [col['name'] for col in self.manifest['columns']]
+    
+    def exists(self):
+        return os.path.isfile(os.path.join(self.path, MANIFEST_NAME))
+    
+    def is_fresh(self, source_path):
+        """True if the store was converted from the current version of source_path"""
+        if not self.exists():
+            return False
+        try:
+            manifest = self.manifest
+            stat = os.stat(source_path)
+        except (OSError, ValueError):
+            return False
+        source = manifest.get('source') or {}
+        return (manifest.get('version') == FORMAT_VERSION
+                and source.get('size') == stat.st_size
+                and source.get('mtime_ns') == stat.st_mtime_ns)
+    
+    @classmethod
+    def write(cls, df, path, source_path=None):
+        """Convert a DataFrame into a column store at path (replacing any old one)"""
+        writer = ColumnStoreWriter(path, source_path=source_path)
+        try:
+            writer.append(df)
+            return writer.close(attrs=df.attrs)
+        except Exception:
+            writer.abort()
+            raise
+    
+    def read(self, columns=None, nrows=None, start=0):
+        """Load the requested columns (all by default) into a DataFrame.
+        
+        With nrows only the rows from start on are touched, so previews of
+        large datasets never read the rest of the column files.
+        """
+        specs = self._column_specs(columns)
+        data = {spec['name']: self._read_column(spec, nrows, start) for spec in specs}
+        df = pd.DataFrame(data, columns=[spec['name'] for spec in specs])
+        df.attrs.update(self.manifest.get('attrs') or {})
+        return df
+    
+    def chunks(self, chunk_rows, columns=None):
+        """Yield the store as consecutive DataFrames of at most chunk_rows rows"""
+        for start in range(0, self.rows, chunk_rows):
+            yield self.read(columns, nrows=chunk_rows, start=start)
+    
+    def take(self, rows, columns=None):
+        """Load only the given row positions (sorted, for sequential page access) into a DataFrame"""
+        rows = np.asarray(rows, dtype=np.int64)
+        specs = self._column_specs(columns)
+        data = {spec['name']: self._decode(spec, self._map_file(spec, None)[rows]) for spec in specs}
+        df = pd.DataFrame(data, columns=[spec['name'] for spec in specs])
+        df.attrs.update(self.manifest.get('attrs') or {})
+        return df
+    
+    def column(self, name, nrows=None):
+        """Return one column as a Series without copying numeric data.
+        
+        Numeric columns are backed by a read-only memory map, so the data
+        lives in the OS page cache and is shared by every worker process
+        that opens the same store.
+        """
+        spec = self._column_specs([name])[0]
+        return pd.Series(self._read_column(spec, nrows), name=name, copy=False)
+    
+    def _column_specs(self, columns):
+        specs = self.manifest['columns']
+        if columns is None:
+            return specs
+        by_name = {spec['name']: spec for spec in specs}
+        missing = [col for col in columns if col not in by_name]
+        if missing:
+            raise KeyError(f"Columns not found: {missing}")
+        return [by_name[col] for col in columns]
+    
+    def _map_file(self, spec, nrows, start=0):
+        available = max(0, self.rows - start)
+        length = available if nrows is None else max(0, min(int(nrows), available))
+        if length == 0:
+            # Empty files cannot be memory-mapped
+            return np.empty(0, dtype=spec['dtype'])
+        dtype = np.dtype(spec['dtype'])
+        return np.memmap(os.path.join(self.path, spec['file']), dtype=dtype,
+                         mode='r', shape=(length,), offset=start * dtype.itemsize)
+    
+    def _read_column(self, spec, nrows=None, start=0):
+        return self._decode(spec, self._map_file(spec, nrows, start))
+    
+    def _decode(self, spec, values):
+        kind = spec['kind']
+        if kind == 'array':
+            return values
+        if kind == 'datetime':
+            return values.view('datetime64[ns]')
+        # Dictionary-encoded column: code -1 marks a missing value
+        categories = self._categories.get(spec['name'])
+        if categories is None:
+            categories = np.load(os.path.join(self.path, spec['categories']), allow_pickle=True)
+            self._categories[spec['name']] = categories
+        if spec.get('categorical'):
+            return pd.Categorical.from_codes(np.asarray(values), categories=categories)
+        return np.append(categories, np.nan).astype(object).take(values)
+
+
+class SchemaConflictError(ValueError):
+    """A chunk's column type cannot be reconciled with earlier chunks"""
+
+
+class ColumnStoreWriter:
+    """Build a column store incrementally, one DataFrame chunk at a time.
+    
+    Columns are appended to their files as chunks arrive, so converting a
+    file never needs more memory than one chunk. Type drift between chunks
+    is reconciled the way a full pandas parse would resolve it: integers
+    are promoted to float when a later chunk has missing values, and
+    all-missing float chunks are absorbed by text columns. Anything else
+    raises SchemaConflictError so the caller can fall back to a full parse.
+    """
+    
+    def __init__(self, path, source_path=None):
+        self.path = path
+        self.source_path = source_path
+        self.tmp_path = f"{path}.tmp{os.getpid()}"
+        if os.path.exists(self.tmp_path):
+            shutil.rmtree(self.tmp_path)
+        os.makedirs(self.tmp_path)
+        self.rows = 0
+        self.names = None
+        self.columns = []
+    
+    def append(self, df):
+        """Append a chunk whose columns match the first chunk"""
+        if self.names is None:
+            self.names = list(df.columns)
+            self.columns = [_ColumnWriter(self.tmp_path, f"c{i}", name) for i, name in enumerate(self.names)]
+        elif list(df.columns) != self.names:
+            raise SchemaConflictError("Chunk columns do not match the first chunk")
+        
+        for i, column in enumerate(self.columns):
+            column.append(df.iloc[:, i], self.rows)
+        self.rows += len(df)
+    
+    def close(self, attrs=None):
+        """Write the manifest and atomically move the store into place"""
+        manifest = {
+            'version': FORMAT_VERSION,
+            'rows': int(self.rows),
+            'columns': [column.finish() for column in self.columns],
+            'source': _source_info(self.source_path),
+            'attrs': _json_attrs(attrs or {})
+        }
+        with open(os.path.join(self.tmp_path, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f)
+        
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        os.replace(self.tmp_path, self.path)
+        return ColumnStore(self.path)
+    
+    def abort(self):
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+
+class _ColumnWriter:
+    """Append-only writer for a single column file"""
+    
+    def __init__(self, dirpath, stem, name):
+        self.dirpath = dirpath
+        self.stem = stem
+        self.spec = {'name': name, 'file': f"{stem}.bin", 'missing': 0}
+        self.target = os.path.join(dirpath, self.spec['file'])
+        self.kind = None
+        self.dtype = None
+        self.categorical = True
+        self.categories = []
+        self.category_codes = {}
+        open(self.target, 'wb').close()
+    
+    def append(self, series, rows_before):
+        dtype = series.dtype
+        if isinstance(dtype, pd.CategoricalDtype) or dtype == object:
+            kind = 'dictionary'
+        elif dtype.kind in 'biuf':
+            kind = 'array'
+        elif dtype.kind == 'M' and getattr(dtype, 'tz', None) is None:
+            kind = 'datetime'
+        else:
+            raise TypeError(f"Column {series.name!r} has unsupported dtype {dtype}")
+        
+        if self.kind is None:
+            self.kind = kind
+        elif kind != self.kind:
+            kind = self._reconcile(series, kind, rows_before)
+            if kind is None:
+                return
+        
+        if kind == 'dictionary':
+            self._append_codes(series)
+        elif kind == 'datetime':
+            self._write(series.to_numpy('datetime64[ns]').view('<i8'), '<i8')
+            self.spec['missing'] += int(series.isna().sum())
+        else:
+            self._append_array(series.to_numpy())
+    
+    def _reconcile(self, series, kind, rows_before):
+        """Resolve a chunk whose kind differs from earlier chunks; None means handled"""
+        all_missing = bool(series.isna().all())
+        if self.kind == 'dictionary' and kind == 'array' and all_missing:
+            # An all-empty chunk of a text column parses as float NaN
+            self._write(np.full(len(series), -1, dtype='<i4'), '<i4')
+            self.spec['missing'] += len(series)
+            return None
+        if self.kind == 'array' and kind == 'dictionary' and self.spec['missing'] == rows_before:
+            # Every earlier value was missing: the column is really text
+            os.remove(self.target)
+            self.kind, self.dtype = 'dictionary', None
+            self._write(np.full(rows_before, -1, dtype='<i4'), '<i4')
+            return 'dictionary'
+        raise SchemaConflictError(f"Column {series.name!r} changes type between chunks")
+    
+    def _append_array(self, values):
+        values = values.astype(values.dtype.newbyteorder('<'), copy=False)
+        if self.dtype is not None and values.dtype != self.dtype:
+            common = np.promote_types(self.dtype, values.dtype)
+            if common.kind not in 'iuf' or (self.dtype.kind == 'b') != (values.dtype.kind == 'b'):
+                raise SchemaConflictError(f"Column {self.spec['name']!r} changes type between chunks")
+            common = common.newbyteorder('<')
+            if common != self.dtype:
+                # Promote what has been written so far, e.g. int64 -> float64
+                existing = np.fromfile(self.target, dtype=self.dtype).astype(common)
+                existing.tofile(self.target)
+                self.dtype = common
+            values = values.astype(common)
+        if values.dtype.kind == 'f':
+            self.spec['missing'] += int(np.isnan(values).sum())
+        self._write(values, values.dtype)
+    
+    def _append_codes(self, series):
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            local_codes = series.cat.codes.to_numpy()
+            uniques = series.cat.categories
+        else:
+            self.categorical = False
+            local_codes, uniques = _factorize_by_type(series)
+        
+        # Map chunk-local codes to store-wide codes through a hash lookup on the uniques only;
+        # keys carry the type because 1, 1.0 and True are equal (and hash alike) as plain keys
+        mapping = np.empty(len(uniques) + 1, dtype='<i4')
+        for i, value in enumerate(uniques):
+            key = (type(value), value)
+            code = self.category_codes.get(key)
+            if code is None:
+                code = len(self.categories)
+                self.category_codes[key] = code
+                self.categories.append(value)
+            mapping[i] = code
+        mapping[-1] = -1
+        codes = mapping.take(local_codes)
+        self.spec['missing'] += int((codes == -1).sum())
+        self._write(codes, '<i4')
+    
+    def _write(self, values, dtype):
+        self.dtype = np.dtype(dtype)
+        with open(self.target, 'ab') as f:
+            values.tofile(f)
+    
+    def finish(self):
+        """Flush the dictionary and return the manifest entry"""
+        spec = self.spec
+        spec['kind'] = self.kind or 'array'
+        spec['dtype'] = (self.dtype or np.dtype('<f8')).str
+        if spec['kind'] == 'dictionary':
+            spec['categorical'] = self.categorical
+            spec['categories'] = f"{self.stem}.categories.npy"
+            categories = np.empty(len(self.categories), dtype=object)
+            categories[:] = self.categories
+            np.save(os.path.join(self.dirpath, spec['categories']), categories, allow_pickle=True)
+        return spec
+
+
+def _factorize_by_type(series):
+    """pd.factorize for an object column, except that equal values of different types stay apart.
+    
+    pd.factorize merges 1, 1.0 and True into one code, so mixed columns are
+    factorized again on (value code, type code) pairs; text columns, the
+    common case, take the plain path.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    if pd.api.types.infer_dtype(uniques, skipna=True) in ('string', 'empty'):
+        return codes, uniques
+    type_codes, types = pd.factorize(series.map(type))
+    present = np.flatnonzero(codes != -1)
+    pair_codes, _ = pd.factorize(codes[present].astype(np.int64) * len(types) + type_codes[present])
+    # Codes follow first appearance, so the first row with each code holds its value
+    first_rows = present[np.unique(pair_codes, return_index=True)[1]]
+    codes = np.full(len(series), -1, dtype=np.intp)
+    codes[present] = pair_codes
+    return codes, series.to_numpy(dtype=object)[first_rows]
+
+
+def _json_attrs(attrs):
+    """Keep the DataFrame.attrs entries that survive a JSON round trip"""
+    kept = {}
+    for key, value in attrs.items():
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            continue
+        kept[key] = value
+    return kept
+
+
+def _source_info(source_path):
+    if source_path is None:
+        return None
+    stat = os.stat(source_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
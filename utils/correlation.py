@@ -0,0 +1,108 @@
+import numpy as np
+
+STRONG_CORRELATION_THRESHOLD = 0.7
+DEFAULT_BLOCK_ROWS = 65536
+
+
+def correlation_matrix(data, columns, float32=False, block_rows=DEFAULT_BLOCK_ROWS):
+    """Pearson correlation matrix of columns, with pairwise-complete handling of missing values.
+    
+    Equivalent to DataFrame.corr(): each pair uses the rows where both
+    columns are present. Instead of a pairwise loop, every statistic is
+    accumulated over blocks of block_rows rows in a single pass: the cross
+    products are one matrix product per block, and blocks with missing
+    values add three more (pair counts, partial sums and partial sums of
+    squares). Values are shifted by the first block's column means so the
+    sum-of-products form stays accurate. float32 halves the block memory
+    and speeds up the products; values are shifted in float64 before they
+    are rounded to float32, and totals are still accumulated in float64.
+    """
+    dtype = np.float32 if float32 else np.float64
+    arrays = [np.asarray(data[col]) for col in columns]
+    k = len(arrays)
+    rows = len(arrays[0]) if arrays else 0
+    
+    pairs = np.zeros((k, k))
+    sums = np.zeros((k, k))
+    squares = np.zeros((k, k))
+    cross = np.zeros((k, k))
+    shift = None
+    block = np.empty((min(block_rows, rows), k), dtype=dtype, order='F')
+    for start in range(0, rows, block_rows):
+        stop = min(start + block_rows, rows)
+        x = block[:stop - start]
+        if shift is None:
+            shift = _column_means([values[start:stop] for values in arrays])
+        for j, values in enumerate(arrays):
+            # Shifted before the cast, so float32 only has to hold the deviations
+            np.subtract(values[start:stop], shift[j], out=x[:, j], casting='unsafe')
+        valid = ~np.isnan(x)
+        
+        if valid.all():
+            # Every pair sees every row: the counts and sums are the same for all partners
+            pairs += len(x)
+            sums += x.sum(axis=0, dtype=np.float64)[:, None]
+            squares += (x * x).sum(axis=0, dtype=np.float64)[:, None]
+        else:
+            x[~valid] = 0
+            valid = valid.astype(dtype)
+            pairs += valid.T @ valid
+            sums += x.T @ valid
+            squares += (x * x).T @ valid
+        cross += x.T @ x
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # sums[i, j]: sum of column i over the rows where column j is present
+        covariance = cross - sums * sums.T / pairs
+        variance = squares - sums ** 2 / pairs
+        corr = covariance / np.sqrt(variance * variance.T)
+    corr[pairs < 2] = np.nan
+    np.clip(corr, -1.0, 1.0, out=corr)
+    # A column correlates perfectly with itself whenever it varies at all
+    diagonal = np.diag(corr)
+    np.fill_diagonal(corr, np.where(np.isnan(diagonal), np.nan, 1.0))
+    return corr
+
+
+def _column_means(arrays):
+    """NaN-ignoring float64 mean of each array, 0 where an array has no values"""
+    means = np.zeros(len(arrays))
+    for j, values in enumerate(arrays):
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        if valid.any():
+            means[j] = values[valid].mean()
+    return means
+
+
+def strong_pairs(corr, columns, threshold=STRONG_CORRELATION_THRESHOLD, top_k=None):
+    """Column pairs from the upper triangle with |correlation| > threshold.
+    
+    Without top_k pairs come in matrix order (row by row); with top_k only
+    the k strongest are returned, strongest first.
+    """
+    rows, cols = np.triu_indices(len(columns), k=1)
+    values = corr[rows, cols]
+    with np.errstate(invalid='ignore'):
+        selected = np.flatnonzero(np.abs(values) > threshold) if threshold is not None \
+            else np.flatnonzero(~np.isnan(values))
+    if top_k is not None and len(selected) > top_k:
+        strength = np.abs(values[selected])
+        selected = selected[np.argpartition(-strength, top_k - 1)[:top_k]]
+    if top_k is not None:
+        selected = selected[np.argsort(-np.abs(values[selected]), kind='stable')]
+    return [{
+        'col1': columns[rows[i]],
+        'col2': columns[cols[i]],
+        'correlation': float(values[i])
+    } for i in selected]
+
+
+def matrix_to_dict(corr, columns):
+    """The DataFrame.corr().to_dict() layout, built straight from the array"""
+    return {col: dict(zip(columns, corr[:, j].tolist())) for j, col in enumerate(columns)}
+
+
+def dict_to_matrix(corr_dict, columns):
+    """Inverse of matrix_to_dict (e.g. for a matrix read back from a stored profile)"""
+    return np.array([[corr_dict[col][row] for col in columns] for row in columns], dtype=np.float64)
@@ -1,36 +1,331 @@
+import os
+import logging
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.preprocessing import StandardScaler
 import warnings
 warnings.filterwarnings('ignore')
 
+from utils.cache import LRUCache
+from utils.dtypes import CATEGORICAL_DTYPES, is_categorical_dtype
+from utils.encoding import CategoryEncoder, ENCODED_SUFFIX
+from utils.imputation import BatchImputer
+from utils.outliers import fused_outlier_mask
+from utils.streaming_clean import StreamingCleaner
+from utils.stats_engine import (NumericSummary, missing_counts, top_values, DEFAULT_HISTOGRAM_BINS,
+                                DEFAULT_TOP_K, HISTOGRAM_BINNINGS)
+from utils.correlation import correlation_matrix, strong_pairs, matrix_to_dict
+from utils.approx import approximate_profile, sample_positions, DEFAULT_CONFIDENCE
+from utils.column_store import ColumnStore, ColumnStoreWriter, SchemaConflictError, sidecar_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024  # 512MB of parsed DataFrames
+
+# Options clean_data understands, with the values it falls back to
+CLEANING_DEFAULTS = {
+    'missing_threshold': 50,
+    'imputation_strategy': 'median',
+    'remove_duplicates': False,
+    'handle_outliers': False,
+    'outlier_method': 'iqr',
+    'outlier_action': None,
+    'outlier_mode': 'fused'
+}
+
 class DataProcessor:
-    def __init__(self):
+    def __init__(self, cache_max_bytes=DEFAULT_CACHE_MAX_BYTES, compact_dtypes=False,
+                 category_max_ratio=0.5):
         self.label_encoders = {}
         self.scaler = StandardScaler()
+        self.cache = LRUCache(cache_max_bytes, sizeof=self._frame_nbytes)
+        self.compact = compact_dtypes
+        self.category_max_ratio = category_max_ratio
+    
+    def load_data(self, filepath, columns=None, compact=None):
+        """Load data from CSV or Excel file, optionally restricted to some columns"""
+        if compact is None:
+            compact = self.compact
+        
+        # Parsed frames are cached by path, size and mtime so a replaced file is re-read
+        filepath = os.path.abspath(filepath)
+        stat = os.stat(filepath)
+        columns = list(columns) if columns else None
+        key = (filepath, stat.st_size, stat.st_mtime_ns, tuple(columns) if columns else None, compact)
+        
+        df = self.cache.get(key)
+        if df is None:
+            store = self.open_store(filepath)
+            if store is not None:
+                # The columnar sidecar skips CSV type inference and Excel parsing
+                df = store.read(columns)
+            else:
+                df = self._parse_file(filepath, columns)
+            if compact:
+                df = self.compact_dtypes(df)
+            self._freeze(df)
+            self.cache.discard_where(lambda k: k[0] == filepath and k[1:3] != key[1:3])
+            self.cache.put(key, df)
+        
+        if self._backing_arrays(df) is None:
+            # pandas does not lay frames out the way _freeze expects, so the cached arrays are still writable
+            return df.copy()
+        # A shallow copy: callers may add, drop or replace columns without copying any data,
+        # and an in-place write into the read-only cached arrays raises instead of corrupting them
+        return df.copy(deep=False)
+    
+    def build_sidecar(self, filepath, df=None):
+        """Convert an uploaded file into its columnar sidecar once, at upload time.
+        
+        df, if given, must be the file as parsed (load_data(compact=False)):
+        the sidecar keeps the parsed dtypes and load_data compacts on read,
+        so a compacted frame is ignored and the file parsed again.
+        """
+        filepath = os.path.abspath(filepath)
+        if df is None or 'memory_report' in df.attrs:
+            df = self._parse_file(filepath)
+        try:
+            ColumnStore.write(df, sidecar_path(filepath), source_path=filepath)
+        except (TypeError, ValueError, OSError) as e:
+            # The original file stays the source of truth; loading just falls back to parsing
+            logger.warning("Could not build columnar sidecar for %s: %s", filepath, e)
+            return False
+        return True
+    
+    def build_sidecar_chunked(self, filepath, chunk_rows=100000):
+        """Convert a CSV into its sidecar chunk by chunk, never holding the whole file in memory"""
+        filepath = os.path.abspath(filepath)
+        if not filepath.endswith('.csv'):
+            # Excel workbooks cannot be streamed; parse them once in full
+            return self.build_sidecar(filepath)
+        
+        writer = ColumnStoreWriter(sidecar_path(filepath), source_path=filepath)
+        try:
+            for chunk in pd.read_csv(filepath, chunksize=chunk_rows):
+                writer.append(chunk)
+            writer.close()
+        except SchemaConflictError:
+            # Column types drift in a way only a full parse can resolve
+            writer.abort()
+            return self.build_sidecar(filepath)
+        except (TypeError, ValueError, OSError) as e:
+            writer.abort()
+            logger.warning("Could not build columnar sidecar for %s: %s", filepath, e)
+            return False
+        return True
+    
+    def get_store_info(self, store):
+        """get_data_info for a column store, computed from its manifest without loading rows"""
+        dtypes = {}
+        missing = {}
+        numerical_columns = []
+        categorical_columns = []
+        nbytes = 0
+        for spec in store.manifest['columns']:
+            name = spec['name']
+            if spec['kind'] == 'dictionary':
+                dtype = 'category' if spec.get('categorical') else 'object'
+                categorical_columns.append(name)
+            elif spec['kind'] == 'datetime':
+                dtype = 'datetime64[ns]'
+            else:
+                dtype = np.dtype(spec['dtype']).name
+                if dtype != 'bool':
+                    numerical_columns.append(name)
+            dtypes[name] = dtype
+            if 'missing' in spec:
+                missing[name] = int(spec['missing'])
+            else:
+                missing[name] = int(store.column(name).isnull().sum())
+            nbytes += store.rows * np.dtype(spec['dtype']).itemsize
+        
+        rows = store.rows
+        return {
+            'shape': {'rows': rows, 'cols': len(dtypes)},
+            'columns': list(dtypes),
+            'dtypes': dtypes,
+            'missing_values': missing,
+            'missing_percentage': {col: (count / rows * 100 if rows else float('nan')) for col, count in missing.items()},
+            'numerical_columns': numerical_columns,
+            'categorical_columns': categorical_columns,
+            'memory_usage': {'bytes': int(nbytes)}
+        }
+    
+    def open_store(self, filepath):
+        """Return the memory-mapped column store for a file, or None if it has no fresh sidecar"""
+        filepath = os.path.abspath(filepath)
+        if os.path.isdir(filepath):
+            # Cleaned datasets are stored as column stores themselves
+            store = ColumnStore(filepath)
+            return store if store.exists() else None
+        store = ColumnStore(sidecar_path(filepath))
+        return store if store.is_fresh(filepath) else None
     
-    def load_data(self, filepath):
-        """Load data from CSV or Excel file"""
+    def load_preview(self, filepath, nrows=10):
+        """Return the first nrows rows plus the total row count"""
+        store = self.open_store(filepath)
+        if store is not None:
+            # Only the leading pages of each column file are read
+            return store.read(nrows=nrows), store.rows
+        df = self.load_data(filepath)
+        return df.head(nrows), len(df)
+    
+    def load_columns(self, filepath, columns):
+        """Return {column: Series} for the given columns, memory-mapped when the dataset has a sidecar"""
+        columns = list(dict.fromkeys(columns))
+        store = self.open_store(filepath)
+        if store is not None:
+            return {col: store.column(col) for col in columns}
+        if not columns:
+            return {}
+        df = self.load_data(filepath, columns=columns)
+        return {col: df[col] for col in columns}
+    
+    def get_columns(self, filepath):
+        """List the columns of a dataset without parsing its rows"""
+        filepath = os.path.abspath(filepath)
+        store = self.open_store(filepath)
+        if store is not None:
+            return store.columns
         if filepath.endswith('.csv'):
-            df = pd.read_csv(filepath)
+            return list(pd.read_csv(filepath, nrows=0).columns)
+        return list(self.load_data(filepath).columns)
+    
+    def iter_chunks(self, filepath, chunk_rows=100000):
+        """Yield a dataset as DataFrames of at most chunk_rows rows without loading it whole"""
+        store = self.open_store(filepath)
+        if store is not None:
+            yield from store.chunks(chunk_rows)
+        elif filepath.endswith('.csv'):
+            yield from pd.read_csv(filepath, chunksize=chunk_rows)
+        else:
+            # Excel workbooks cannot be streamed
+            yield self._parse_file(filepath)
+    
+    def _parse_file(self, filepath, columns=None):
+        """Parse a CSV or Excel file with pandas"""
+        if filepath.endswith('.csv'):
+            df = pd.read_csv(filepath, usecols=columns)
         elif filepath.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(filepath)
+            df = pd.read_excel(filepath, usecols=columns)
         else:
             raise ValueError("Unsupported file format")
+        # usecols keeps file order; callers expect the order they asked for
+        return df[columns] if columns else df
+    
+    def compact_dtypes(self, df):
+        """Shrink a DataFrame without losing values.
+        
+        Low-cardinality object columns become categoricals, integers are
+        downcast to the narrowest width that holds their range and floats
+        become float32 where every value survives the round trip. The
+        before/after memory usage is recorded in df.attrs['memory_report']
+        and surfaced by get_data_info.
+        """
+        previous = df.attrs.get('memory_report') or {}
+        bytes_before = previous.get('bytes_before', self._frame_nbytes(df))
+        converted = dict(previous.get('converted_columns', {}))
+        
+        compacted = {}
+        for col in df.columns:
+            series = df[col]
+            dtype = series.dtype
+            if dtype == 'object':
+                n_unique = series.nunique(dropna=True)
+                if len(series) > 0 and n_unique / len(series) <= self.category_max_ratio:
+                    compacted[col] = series.astype('category')
+            elif pd.api.types.is_integer_dtype(dtype):
+                downcast = pd.to_numeric(series, downcast='integer')
+                if downcast.dtype != dtype:
+                    compacted[col] = downcast
+            elif pd.api.types.is_float_dtype(dtype) and dtype != np.float32:
+                values = series.to_numpy()
+                narrowed = values.astype(np.float32)
+                with np.errstate(over='ignore', invalid='ignore'):
+                    lossless = np.array_equal(narrowed.astype(values.dtype), values, equal_nan=True)
+                if lossless:
+                    compacted[col] = pd.Series(narrowed, index=series.index, name=col)
+        
+        if compacted:
+            for col, values in compacted.items():
+                converted[col] = f"{df[col].dtype} -> {values.dtype}"
+            df = pd.DataFrame({col: compacted.get(col, df[col]) for col in df.columns}, index=df.index)
+        
+        bytes_after = self._frame_nbytes(df)
+        df.attrs['memory_report'] = {
+            'bytes_before': int(bytes_before),
+            'bytes_after': int(bytes_after),
+            'saved_bytes': int(bytes_before - bytes_after),
+            'saved_percentage': float((bytes_before - bytes_after) / bytes_before * 100) if bytes_before else 0.0,
+            'converted_columns': converted
+        }
         return df
     
-    def get_data_info(self, df):
-        """Get basic information about the dataset"""
+    @staticmethod
+    def _frame_nbytes(df):
+        """Deep memory footprint of a DataFrame, including Python string objects"""
+        return df.memory_usage(index=True, deep=True).sum()
+    
+    @staticmethod
+    def _backing_arrays(df):
+        """The arrays holding df's data, or None if pandas' internals are not laid out as expected"""
+        arrays = getattr(getattr(df, '_mgr', None), 'arrays', None)
+        if not isinstance(arrays, (list, tuple)):
+            return None
+        return arrays
+    
+    @classmethod
+    def _freeze(cls, df):
+        """Mark every array backing df read-only"""
+        for values in cls._backing_arrays(df) or ():
+            # Extension arrays keep their data in ndarrays of their own (codes, values and masks)
+            for array in (values, getattr(values, '_ndarray', None), getattr(values, '_data', None),
+                          getattr(values, '_mask', None)):
+                if isinstance(array, np.ndarray):
+                    array.flags.writeable = False
+    
+    def cache_stats(self):
+        """Hit/miss counters and memory usage of the parsed-data cache"""
+        return self.cache.stats()
+    
+    def get_data_info(self, df, summary=None):
+        """Get basic information about the dataset (summary: a NumericSummary of df, if already computed)"""
+        memory_usage = {'bytes': int(self._frame_nbytes(df))}
+        if 'memory_report' in df.attrs:
+            memory_usage.update(df.attrs['memory_report'])
+        
+        missing = missing_counts(df, summary)
         return {
             'shape': {'rows': len(df), 'cols': len(df.columns)},
             'columns': list(df.columns),
             'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()},
-            'missing_values': df.isnull().sum().to_dict(),
-            'missing_percentage': (df.isnull().sum() / len(df) * 100).to_dict(),
+            'missing_values': missing.to_dict(),
+            'missing_percentage': (missing / len(df) * 100).to_dict(),
             'numerical_columns': list(df.select_dtypes(include=[np.number]).columns),
-            'categorical_columns': list(df.select_dtypes(include=['object']).columns)
+            'categorical_columns': list(df.select_dtypes(include=CATEGORICAL_DTYPES).columns),
+            'memory_usage': memory_usage
         }
     
+    @staticmethod
+    def normalize_cleaning_options(options=None):
+        """Canonical form of cleaning options: equal results get equal options.
+        
+        Defaults are filled in, unknown keys dropped and settings that
+        cannot affect the result (outlier settings when nothing is removed)
+        collapsed, so the result can serve as a cache key.
+        """
+        options = options or {}
+        normalized = {key: options.get(key, default) for key, default in CLEANING_DEFAULTS.items()}
+        normalized['remove_duplicates'] = bool(normalized['remove_duplicates'])
+        if normalized['handle_outliers'] and normalized['outlier_action'] == 'remove':
+            normalized['handle_outliers'] = True
+            normalized['outlier_method'] = 'iqr' if normalized['outlier_method'] == 'iqr' else 'zscore'
+            normalized['outlier_mode'] = 'fused' if normalized['outlier_mode'] == 'fused' else 'sequential'
+        else:
+            # Only removal changes the data; without it the outlier step is a no-op
+            normalized.update(handle_outliers=False, outlier_method=None, outlier_action=None, outlier_mode=None)
+        return normalized
+    
     def clean_data(self, df, options=None):
         """Clean and preprocess data"""
         if options is None:
@@ -49,11 +344,15 @@ class DataProcessor:
         except Exception as e:
             raise ValueError(f"Failed to copy dataframe: {str(e)}")
         
+        # One missing-value pass serves the threshold, the imputer and the report
+        missing_mask = df_cleaned.isnull()
+        missing_per_column = missing_mask.sum()
+        
         # Step 1: Drop columns with high missing percentage
         threshold = options.get('missing_threshold', 50)
         if threshold > 0 and len(df_cleaned) > 0:
             try:
-                missing_percent = (df_cleaned.isnull().sum() / len(df_cleaned) * 100)
+                missing_percent = (missing_per_column / len(df_cleaned) * 100)
                 cols_to_drop = missing_percent[missing_percent > threshold].index.tolist()
                 if cols_to_drop:
                     df_cleaned = df_cleaned.drop(columns=cols_to_drop)
@@ -67,47 +366,15 @@ class DataProcessor:
         if imputation_strategy == 'drop':
             df_cleaned = df_cleaned.dropna()
             cleaning_steps.append("Dropped rows with missing values")
+            still_missing = []
         else:
-            # Impute numerical columns
-            numerical_cols = df_cleaned.select_dtypes(include=[np.number]).columns
-            for col in numerical_cols:
-                if df_cleaned[col].isnull().sum() > 0:
-                    try:
-                        if imputation_strategy == 'median':
-                            value = df_cleaned[col].median()
-                        elif imputation_strategy == 'mean':
-                            value = df_cleaned[col].mean()
-                        else:
-                            value = df_cleaned[col].median()
-                        
-                        # Check if value is NaN (all values are NaN)
-                        if pd.isna(value):
-                            value = 0  # Default to 0 if all values are NaN
-                        
-                        missing_count = df_cleaned[col].isnull().sum()
-                        df_cleaned[col].fillna(value, inplace=True)
-                        cleaning_steps.append(f"Imputed {missing_count} missing values in {col} with {imputation_strategy}: {value:.2f}")
-                    except Exception as e:
-                        # If imputation fails, fill with 0
-                        missing_count = df_cleaned[col].isnull().sum()
-                        df_cleaned[col].fillna(0, inplace=True)
-                        cleaning_steps.append(f"Imputed {missing_count} missing values in {col} with 0 (fallback)")
-            
-            # Impute categorical columns with mode
-            categorical_cols = df_cleaned.select_dtypes(include=['object']).columns
-            for col in categorical_cols:
-                if df_cleaned[col].isnull().sum() > 0:
-                    try:
-                        mode_result = df_cleaned[col].mode()
-                        mode_value = mode_result[0] if not mode_result.empty else 'Unknown'
-                        missing_count = df_cleaned[col].isnull().sum()
-                        df_cleaned[col].fillna(mode_value, inplace=True)
-                        cleaning_steps.append(f"Imputed {missing_count} missing values in {col} with mode: {mode_value}")
-                    except Exception as e:
-                        # If mode fails, fill with 'Unknown'
-                        missing_count = df_cleaned[col].isnull().sum()
-                        df_cleaned[col].fillna('Unknown', inplace=True)
-                        cleaning_steps.append(f"Imputed {missing_count} missing values in {col} with 'Unknown' (fallback)")
+            # Impute every numerical (median/mean) and categorical (mode) column in one vectorized pass
+            imputer = BatchImputer(imputation_strategy).fit(df_cleaned, missing_mask=missing_mask[df_cleaned.columns])
+            df_cleaned = imputer.transform(df_cleaned)
+            cleaning_steps.extend(imputer.steps)
+            # Later steps only remove rows, so only columns the imputer skipped can still have gaps
+            still_missing = [col for col in df_cleaned.columns
+                             if missing_per_column.get(col, 0) > 0 and col not in imputer.fill_values]
         
         # Step 3: Remove duplicates if requested
         if options.get('remove_duplicates', False) and len(df_cleaned) > 0:
@@ -123,26 +390,39 @@ class DataProcessor:
         # Step 4: Handle outliers if requested
         if options.get('handle_outliers', False):
             method = options.get('outlier_method', 'iqr')  # 'iqr' or 'zscore'
+            # 'fused': bounds for all columns from one pass, one combined row filter
+            # 'sequential': filter column by column, each on the already-filtered rows
+            outlier_mode = options.get('outlier_mode', 'fused')
             numerical_cols = df_cleaned.select_dtypes(include=[np.number]).columns
             
-            for col in numerical_cols:
-                if method == 'iqr':
-                    Q1 = df_cleaned[col].quantile(0.25)
-                    Q3 = df_cleaned[col].quantile(0.75)
-                    IQR = Q3 - Q1
-                    lower_bound = Q1 - 1.5 * IQR
-                    upper_bound = Q3 + 1.5 * IQR
-                    outliers = ((df_cleaned[col] < lower_bound) | (df_cleaned[col] > upper_bound)).sum()
-                else:  # zscore
-                    z_scores = np.abs((df_cleaned[col] - df_cleaned[col].mean()) / df_cleaned[col].std())
-                    outliers = (z_scores > 3).sum()
-                
-                if outliers > 0 and options.get('outlier_action') == 'remove':
+            if outlier_mode == 'fused':
+                if options.get('outlier_action') == 'remove' and len(numerical_cols) > 0:
+                    values = df_cleaned[numerical_cols].to_numpy(dtype=np.float64)
+                    keep, counts = fused_outlier_mask(values, method)
+                    for col, outliers in zip(numerical_cols, counts):
+                        if outliers > 0:
+                            cleaning_steps.append(f"Removed {outliers} outliers from {col}")
+                    if not keep.all():
+                        df_cleaned = df_cleaned[keep]
+            else:
+                for col in numerical_cols:
                     if method == 'iqr':
-                        df_cleaned = df_cleaned[(df_cleaned[col] >= lower_bound) & (df_cleaned[col] <= upper_bound)]
-                    else:
-                        df_cleaned = df_cleaned[z_scores <= 3]
-                    cleaning_steps.append(f"Removed {outliers} outliers from {col}")
+                        Q1 = df_cleaned[col].quantile(0.25)
+                        Q3 = df_cleaned[col].quantile(0.75)
+                        IQR = Q3 - Q1
+                        lower_bound = Q1 - 1.5 * IQR
+                        upper_bound = Q3 + 1.5 * IQR
+                        outliers = ((df_cleaned[col] < lower_bound) | (df_cleaned[col] > upper_bound)).sum()
+                    else:  # zscore
+                        z_scores = np.abs((df_cleaned[col] - df_cleaned[col].mean()) / df_cleaned[col].std())
+                        outliers = (z_scores > 3).sum()
+                    
+                    if outliers > 0 and options.get('outlier_action') == 'remove':
+                        if method == 'iqr':
+                            df_cleaned = df_cleaned[(df_cleaned[col] >= lower_bound) & (df_cleaned[col] <= upper_bound)]
+                        else:
+                            df_cleaned = df_cleaned[z_scores <= 3]
+                        cleaning_steps.append(f"Removed {outliers} outliers from {col}")
         
         # Check if dataframe became empty after cleaning
         if df_cleaned.empty:
@@ -158,8 +438,8 @@ class DataProcessor:
                 'cleaned_shape': [int(cleaned_rows), int(cleaned_cols)],
                 'rows_removed': int(original_rows - cleaned_rows),
                 'columns_removed': int(original_cols - cleaned_cols),
-                'missing_values_before': int(df.isnull().sum().sum()),
-                'missing_values_after': int(df_cleaned.isnull().sum().sum()),
+                'missing_values_before': int(missing_per_column.sum()),
+                'missing_values_after': int(df_cleaned[still_missing].isnull().sum().sum()),
                 'cleaning_steps': cleaning_steps
             }
         except Exception as e:
@@ -167,58 +447,47 @@ class DataProcessor:
         
         return df_cleaned, cleaning_report
     
-    def analyze_data(self, df):
-        """Comprehensive data analysis"""
+    def clean_data_streaming(self, filepath, output_path, options=None, chunk_rows=100000):
+        """Clean a dataset chunk by chunk into a column store at output_path.
+        
+        Memory use is bounded by the chunk size instead of the dataset size;
+        returns the same cleaning report as clean_data. Raises
+        SchemaConflictError if column types drift between chunks, in which
+        case only clean_data on the fully parsed frame gives the right answer.
+        """
+        cleaner = StreamingCleaner(options, chunk_rows=chunk_rows)
+        return cleaner.clean(lambda rows: self.iter_chunks(filepath, rows), output_path)
+    
+    def analyze_data(self, df, summary=None):
+        """Comprehensive data analysis (summary: a NumericSummary of df's numeric columns, if already computed)"""
+        # Missing counts, moments, quantiles and outliers of every numeric column in one pass
+        numerical_cols = df.select_dtypes(include=[np.number]).columns
+        if summary is None:
+            summary = NumericSummary(df, numerical_cols)
+        
         analysis = {
-            'basic_info': self.get_data_info(df),
+            'basic_info': self.get_data_info(df, summary),
             'statistics': {},
             'correlations': {},
             'outliers': {}
         }
         
         # Statistical summary
-        numerical_cols = df.select_dtypes(include=[np.number]).columns
         if len(numerical_cols) > 0:
-            analysis['statistics'] = df[numerical_cols].describe().to_dict()
+            analysis['statistics'] = summary.describe()
         
-        # Correlation matrix
+        # Correlation matrix (blocked matrix products, strong pairs from the upper triangle)
         if len(numerical_cols) > 1:
-            corr_matrix = df[numerical_cols].corr()
-            analysis['correlations'] = corr_matrix.to_dict()
-            # Find strong correlations
-            strong_corrs = []
-            for i in range(len(corr_matrix.columns)):
-                for j in range(i+1, len(corr_matrix.columns)):
-                    corr_val = corr_matrix.iloc[i, j]
-                    if abs(corr_val) > 0.7:
-                        strong_corrs.append({
-                            'col1': corr_matrix.columns[i],
-                            'col2': corr_matrix.columns[j],
-                            'correlation': float(corr_val)
-                        })
-            analysis['strong_correlations'] = strong_corrs
-        
-        # Outlier detection
-        for col in numerical_cols:
-            Q1 = df[col].quantile(0.25)
-            Q3 = df[col].quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            outliers = df[(df[col] < lower_bound) | (df[col] > upper_bound)]
-            
-            if len(outliers) > 0:
-                analysis['outliers'][col] = {
-                    'count': len(outliers),
-                    'percentage': len(outliers) / len(df) * 100,
-                    'lower_bound': float(lower_bound),
-                    'upper_bound': float(upper_bound),
-                    'min': float(df[col].min()),
-                    'max': float(df[col].max())
-                }
+            columns = list(numerical_cols)
+            corr_matrix = correlation_matrix(df, columns)
+            analysis['correlations'] = matrix_to_dict(corr_matrix, columns)
+            analysis['strong_correlations'] = strong_pairs(corr_matrix, columns)
+        
+        # Outlier detection (IQR counts come from binary search on the sorted columns)
+        analysis['outliers'] = summary.outlier_report()
         
         # Categorical analysis
-        categorical_cols = df.select_dtypes(include=['object']).columns
+        categorical_cols = df.select_dtypes(include=CATEGORICAL_DTYPES).columns
         analysis['categorical'] = {}
         for col in categorical_cols:
             analysis['categorical'][col] = {
@@ -228,20 +497,87 @@ class DataProcessor:
         
         return analysis
     
+    def build_profile(self, df, bins=DEFAULT_HISTOGRAM_BINS, top_k=DEFAULT_TOP_K):
+        """Everything the analysis and visualization endpoints serve for df, computed together.
+        
+        Returns {'analysis': analyze_data(df), 'distributions': {column:
+        distribution}} in a JSON-serializable form, ready to be persisted.
+        Numeric distributions carry a histogram for every binning, and
+        categorical ones only the top_k values, so the size of the profile
+        does not grow with the number of rows or distinct values.
+        """
+        numerical_cols = df.select_dtypes(include=[np.number]).columns
+        summary = NumericSummary(df, numerical_cols)
+        return {
+            'analysis': self.analyze_data(df, summary),
+            'distributions': self._distributions(df, summary, bins, top_k)
+        }
+    
+    def build_distributions(self, filepath, columns, bins=DEFAULT_HISTOGRAM_BINS, top_k=DEFAULT_TOP_K):
+        """The build_profile() distributions of some columns only; the other columns are never read.
+        
+        Columns are memory-mapped from the sidecar when there is one (and
+        compacted like load_data would); names not in the dataset are skipped.
+        """
+        available = set(self.get_columns(filepath))
+        columns = [col for col in dict.fromkeys(columns) if col in available]
+        df = pd.DataFrame(self.load_columns(filepath, columns), columns=columns)
+        if self.compact:
+            df = self.compact_dtypes(df)
+        summary = NumericSummary(df, df.select_dtypes(include=[np.number]).columns)
+        return self._distributions(df, summary, bins, top_k)
+    
+    @staticmethod
+    def _distributions(df, summary, bins, top_k):
+        distributions = {}
+        for col in df.columns:
+            if col in summary.columns:
+                distributions[col] = summary.distribution(col)
+                distributions[col]['histograms'] = {binning: summary.histogram(col, bins, binning)
+                                                    for binning in HISTOGRAM_BINNINGS}
+            else:
+                distributions[col] = top_values(df[col], top_k)
+        return distributions
+    
+    def build_approx_profile(self, filepath, sample_rows, confidence=DEFAULT_CONFIDENCE,
+                             bins=DEFAULT_HISTOGRAM_BINS, top_k=DEFAULT_TOP_K):
+        """build_profile() estimated from a uniform sample of at most sample_rows rows.
+        
+        With a column store only the sampled rows are read from the memory
+        maps, and the basic info comes exactly from its manifest. Returns
+        None when the sample would cover the whole dataset, where the exact
+        profile costs no more.
+        """
+        store = self.open_store(filepath)
+        if store is not None:
+            total_rows = store.rows
+            if total_rows <= sample_rows:
+                return None
+            sample = store.take(sample_positions(total_rows, sample_rows))
+            basic_info = self.get_store_info(store)
+        else:
+            df = self.load_data(filepath)
+            total_rows = len(df)
+            if total_rows <= sample_rows:
+                return None
+            sample = df.iloc[sample_positions(total_rows, sample_rows)].reset_index(drop=True)
+            basic_info = None
+        return approximate_profile(self, sample, total_rows, basic_info, confidence, bins, top_k)
+    
     def encode_categorical(self, df, columns=None):
-        """Encode categorical variables"""
+        """Encode categorical variables (values unseen by an already fitted encoder get UNSEEN_CODE)"""
         if columns is None:
-            columns = df.select_dtypes(include=['object']).columns
+            columns = df.select_dtypes(include=CATEGORICAL_DTYPES).columns
         
         df_encoded = df.copy()
         
         for col in columns:
-            if col in df.columns and df[col].dtype == 'object':
+            if col in df.columns and is_categorical_dtype(df[col].dtype):
                 if col not in self.label_encoders:
-                    self.label_encoders[col] = LabelEncoder()
-                    df_encoded[col + '_encoded'] = self.label_encoders[col].fit_transform(df[col].astype(str))
+                    self.label_encoders[col] = CategoryEncoder()
+                    df_encoded[col + ENCODED_SUFFIX] = self.label_encoders[col].fit_transform(df[col])
                 else:
-                    df_encoded[col + '_encoded'] = self.label_encoders[col].transform(df[col].astype(str))
+                    df_encoded[col + ENCODED_SUFFIX] = self.label_encoders[col].transform(df[col])
         
         return df_encoded
     
@@ -251,7 +587,7 @@ class DataProcessor:
         
         # Encode categorical if needed
         if encode_categorical:
-            categorical_cols = [col for col in feature_columns if df[col].dtype == 'object']
+            categorical_cols = [col for col in feature_columns if is_categorical_dtype(df[col].dtype)]
             if categorical_cols:
                 df_prepared = self.encode_categorical(df_prepared, categorical_cols)
                 # Update feature columns to use encoded versions
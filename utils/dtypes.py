@@ -0,0 +1,13 @@
+import pandas as pd
+
+# Dtypes treated as categorical everywhere (compaction turns 'object' into 'category')
+CATEGORICAL_DTYPES = ['object', 'category']
+
+def is_categorical_dtype(dtype):
+    """True for string/object columns and compacted categorical columns"""
+    return dtype == 'object' or isinstance(dtype, pd.CategoricalDtype)
+
+def is_numeric_feature_dtype(dtype):
+    """True for int/float columns of any width (downcast columns included), excluding booleans"""
+    return (pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+            and not isinstance(dtype, pd.CategoricalDtype))
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+# Code given to categories the encoder has never seen
+UNSEEN_CODE = -1
+ENCODED_SUFFIX = '_encoded'
+
+
+class CategoryEncoder:
+    """Label encoder shared by cleaning, training and prediction.
+
+    A drop-in for sklearn's LabelEncoder(...).fit_transform(col.astype(str))
+    that produces the same codes (classes_ is sorted the same way) without
+    building a Python string per cell. Each column is factorized by
+    hashing, only its distinct values are turned into strings, and codes
+    come from a single hash lookup of those values. Values never seen
+    while fitting get UNSEEN_CODE instead of raising. With
+    stringify=False, values are used as they are, which suits target
+    labels that have to be decoded back to their original type.
+    """
+
+    def __init__(self, classes=None, stringify=True):
+        self.stringify = stringify
+        self.classes_ = np.asarray([] if classes is None else classes, dtype=object if stringify else None)
+        self._index = None
+
+    def fit(self, values):
+        self.fit_transform(values)
+        return self
+
+    def fit_transform(self, values):
+        codes, keys = self._factorize(values)
+        classes = pd.unique(keys)
+        try:
+            classes = np.sort(classes)
+        except TypeError:
+            # Mixed types that cannot be ordered keep first-seen order
+            pass
+        self._set_classes(classes)
+        return self._lookup(keys)[codes]
+
+    def transform(self, values):
+        """Codes for values in one vectorized pass; unseen values get UNSEEN_CODE"""
+        codes, keys = self._factorize(values)
+        return self._lookup(keys)[codes]
+
+    def extend(self, values):
+        """Append categories not seen before (existing codes never change); returns how many were added"""
+        _, keys = self._factorize(values)
+        new = keys[self._lookup(keys) == UNSEEN_CODE]
+        if len(new):
+            self._set_classes(np.concatenate([self.classes_, new]))
+        return len(new)
+
+    def inverse_transform(self, codes):
+        codes = np.asarray(codes, dtype=np.int64)
+        unseen = codes == UNSEEN_CODE
+        if not unseen.any():
+            return self.classes_[codes]
+        labels = self.classes_.astype(object)[np.where(unseen, 0, codes)]
+        labels[unseen] = None
+        return labels
+
+    def _factorize(self, values):
+        # Missing values form one category of their own, as 'nan' does after astype(str)
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        if self.stringify:
+            keys = np.array([str(value) for value in uniques], dtype=object)
+        else:
+            keys = np.asarray(uniques)
+        return codes, keys
+
+    def _lookup(self, keys):
+        if self._index is None:
+            self._index = pd.Index(self.classes_)
+        return self._index.get_indexer(keys)
+
+    def _set_classes(self, classes):
+        self.classes_ = np.asarray(classes)
+        self._index = None
+
+    def __getstate__(self):
+        # The lookup index is rebuilt on first use after unpickling
+        state = self.__dict__.copy()
+        state['_index'] = None
+        return state
+
+
+def as_category_encoder(encoder, stringify=True):
+    """A CategoryEncoder for encoder; a LabelEncoder from a model saved before this encoder existed is converted"""
+    if isinstance(encoder, CategoryEncoder):
+        return encoder
+    return CategoryEncoder(encoder.classes_, stringify=stringify)
+
+
+def feature_matrix(df, feature_columns, encoders, dtype=np.float64, extend=False):
+    """The feature matrix a saved model expects, built column by column from df.
+
+    Columns named '<col>_encoded' are encoded from df[col] with
+    encoders[col] (which must be CategoryEncoders); extend=True first
+    appends categories the encoders have not seen, otherwise those get
+    UNSEEN_CODE. Raises ValueError naming the first missing column.
+    """
+    X = np.empty((len(df), len(feature_columns)), dtype=dtype, order='F')
+    for j, col in enumerate(feature_columns):
+        original = col[:-len(ENCODED_SUFFIX)] if col.endswith(ENCODED_SUFFIX) else col
+        if original not in df.columns:
+            raise ValueError(f"Missing feature: {original}")
+        if col.endswith(ENCODED_SUFFIX) and original in encoders:
+            encoder = encoders[original]
+            if extend:
+                encoder.extend(df[original])
+            X[:, j] = encoder.transform(df[original])
+        else:
+            X[:, j] = df[original].to_numpy(dtype=dtype, na_value=np.nan)
+    return X
@@ -0,0 +1,155 @@
+import pandas as pd
+import numpy as np
+
+from utils.dtypes import CATEGORICAL_DTYPES
+
+
+class BatchImputer:
+    """Vectorized missing-value imputation for all columns at once.
+    
+    fit() takes a single missing-value pass over the frame and computes
+    every fill value with one frame-level reduction per column group
+    (median/mean for numeric columns, mode for categorical ones);
+    transform() then applies them all in one fillna call. The cleaning
+    steps it reports are the same messages clean_data has always
+    produced, in the same order.
+    """
+    
+    def __init__(self, strategy='median'):
+        self.strategy = strategy
+        self.missing_mask = None
+        self.fill_values = {}
+        self.missing_counts = {}
+        self.steps = []
+    
+    def fit(self, df, missing_mask=None):
+        """Compute fill values; pass missing_mask (df.isnull()) if it is already known"""
+        if missing_mask is None:
+            missing_mask = df.isnull()
+        self.missing_mask = missing_mask
+        missing_counts = missing_mask.sum()
+        
+        numerical_cols = [col for col in df.select_dtypes(include=[np.number]).columns
+                          if missing_counts.get(col, 0) > 0]
+        categorical_cols = [col for col in df.select_dtypes(include=CATEGORICAL_DTYPES).columns
+                            if missing_counts.get(col, 0) > 0]
+        
+        self.fill_values = {}
+        self.missing_counts = {col: missing_counts[col] for col in numerical_cols + categorical_cols}
+        self.steps = []
+        self._fit_numerical(df, numerical_cols)
+        self._fit_categorical(df, categorical_cols)
+        return self
+    
+    def fit_values(self, numerical_values, categorical_values, missing_counts):
+        """Use fill values computed elsewhere (e.g. from streaming sketches)"""
+        self.missing_mask = None
+        self.fill_values = {}
+        self.missing_counts = {}
+        self.steps = []
+        for col, value in numerical_values.items():
+            if missing_counts.get(col, 0) > 0:
+                self._add_numerical(col, value, missing_counts[col])
+        for col, value in categorical_values.items():
+            if missing_counts.get(col, 0) > 0:
+                self._add_categorical(col, value, missing_counts[col])
+        return self
+    
+    def transform(self, df):
+        """Fill every missing value in place (the frame is also returned).
+        
+        Numeric columns are filled as one 2-D array per dtype: a single
+        isnan mask, a broadcast of the fill vector and one assignment back.
+        """
+        fill_values = {col: value for col, value in self.fill_values.items() if col in df.columns}
+        if not fill_values:
+            return df
+        
+        # Reuse the mask from fit() when it describes exactly these rows
+        mask_frame = self.missing_mask
+        if mask_frame is not None and not mask_frame.index.equals(df.index):
+            mask_frame = None
+        
+        numeric_groups = {}
+        object_fill = {}
+        categorical_fill = {}
+        for col, value in fill_values.items():
+            dtype = df[col].dtype
+            if pd.api.types.is_float_dtype(dtype):
+                numeric_groups.setdefault(dtype, []).append(col)
+            elif dtype == object and mask_frame is not None:
+                object_fill[col] = value
+            else:
+                categorical_fill[col] = value
+        
+        for cols in numeric_groups.values():
+            # df[cols] is already a fresh copy, so its array can be filled directly
+            values = df[cols].to_numpy()
+            if not values.flags.writeable:
+                values = values.copy()
+            mask = mask_frame[cols].to_numpy() if mask_frame is not None else np.isnan(values)
+            fill = np.array([fill_values[col] for col in cols], dtype=values.dtype)
+            values[mask] = np.broadcast_to(fill, values.shape)[mask]
+            df.loc[:, cols] = values
+        
+        for col, value in object_fill.items():
+            # Object arrays hold references, so this copy never touches the strings themselves
+            values = df[col].to_numpy(copy=True)
+            values[mask_frame[col].to_numpy()] = value
+            df[col] = values
+        
+        if categorical_fill:
+            # Categoricals only accept fill values that are already categories
+            for col, value in categorical_fill.items():
+                if isinstance(df[col].dtype, pd.CategoricalDtype) and value not in df[col].cat.categories:
+                    df[col] = df[col].cat.add_categories([value])
+            cols = list(categorical_fill)
+            df[cols] = df[cols].fillna(value=categorical_fill)
+        return df
+    
+    def _fit_numerical(self, df, columns):
+        if not columns:
+            return
+        try:
+            if self.strategy == 'mean':
+                values = df[columns].mean()
+            else:
+                values = df[columns].median()
+        except Exception:
+            # If imputation fails, fill with 0
+            for col in columns:
+                self.fill_values[col] = 0
+                self.steps.append(f"Imputed {self.missing_counts[col]} missing values in {col} with 0 (fallback)")
+            return
+        for col in columns:
+            self._add_numerical(col, values[col], self.missing_counts[col])
+    
+    def _add_numerical(self, col, value, missing_count):
+        # Default to 0 if all values are NaN
+        if pd.isna(value):
+            value = 0
+        self.fill_values[col] = value
+        self.missing_counts[col] = missing_count
+        self.steps.append(f"Imputed {missing_count} missing values in {col} with {self.strategy}: {value:.2f}")
+    
+    def _fit_categorical(self, df, columns):
+        if not columns:
+            return
+        try:
+            # DataFrame.mode returns the sorted modes of every column; row 0 is the first mode
+            modes = df[columns].mode(dropna=True)
+            first_modes = modes.iloc[0] if len(modes) else pd.Series(index=columns, dtype=object)
+        except Exception:
+            # If mode fails, fill with 'Unknown'
+            for col in columns:
+                self.fill_values[col] = 'Unknown'
+                self.steps.append(f"Imputed {self.missing_counts[col]} missing values in {col} with 'Unknown' (fallback)")
+            return
+        for col in columns:
+            value = first_modes[col]
+            self._add_categorical(col, 'Unknown' if pd.isna(value) else value, self.missing_counts[col])
+    
+    def _add_categorical(self, col, value, missing_count):
+        self.fill_values[col] = value
+        self.missing_counts[col] = missing_count
+        self.steps.append(f"Imputed {missing_count} missing values in {col} with mode: {value}")
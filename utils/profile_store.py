@@ -0,0 +1,95 @@
+import os
+import json
+import threading
+import numpy as np
+
+from utils.cache import LRUCache
+
+PROFILE_VERSION = 2  # bump when the profile layout changes so stale files are never served
+
+
+class ProfileStore:
+    """Persistent analysis profiles, one JSON file per dataset content.
+    
+    A profile holds everything /api/data/analysis, /api/visualize/correlation
+    and /api/visualize/distribution return for a dataset, so it is computed
+    once and every later call is a file read (or an in-memory hit). Keys
+    are derived from the dataset's content hash, so a changed file simply
+    gets a new key and old profiles are never served for it. Recently used
+    profiles are also kept parsed in memory, bounded by their file size.
+    """
+    
+    def __init__(self, folder, cache_max_bytes):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.cache = LRUCache(cache_max_bytes, sizeof=lambda entry: entry[1])
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def path(self, key):
+        return os.path.join(self.folder, f"{key}.json")
+    
+    def get(self, key):
+        """The stored profile for key, or None"""
+        entry = self.cache.get(key)
+        if entry is None:
+            try:
+                with open(self.path(key)) as f:
+                    profile = json.load(f)
+                    entry = (profile, os.fstat(f.fileno()).st_size)
+            except (OSError, ValueError):
+                with self._lock:
+                    self.misses += 1
+                return None
+            self.cache.put(key, entry)
+        with self._lock:
+            self.hits += 1
+        return entry[0]
+    
+    def put(self, key, profile):
+        """Persist a profile and return it exactly as get() will later (JSON types, string keys).
+        
+        Concurrent writers of the same key store identical content.
+        """
+        text = json.dumps(_plain(profile))
+        # The reloaded form, so a fresh profile and a cached one have the same shape
+        profile = json.loads(text)
+        tmp_path = f"{self.path(key)}.{threading.get_ident()}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+            nbytes = f.tell()
+        os.replace(tmp_path, self.path(key))
+        self.cache.put(key, (profile, nbytes))
+        return profile
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+        stats['memory'] = self.cache.stats()
+        return stats
+
+
+def _plain(value):
+    """value with numpy scalars and arrays as Python objects and unusual keys (e.g. timestamps) as strings"""
+    if isinstance(value, dict):
+        return {_plain_key(key): _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_plain(item) for item in value]
+    if isinstance(value, np.generic):
+        return _plain(value.item())
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _plain_key(key):
+    # JSON turns str, int, float, bool and None keys into strings itself
+    if isinstance(key, np.generic):
+        key = key.item()
+    return key if key is None or isinstance(key, (str, int, float, bool)) else str(key)
@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+
+
+class QuantileSketch:
+    """Mergeable KLL-style quantile sketch for a stream of floats.
+    
+    Values are kept in levels where an item on level i stands for 2**i
+    inputs. When a level outgrows its capacity it is sorted and every other
+    item is promoted to the next level, so memory stays around 3*k items
+    while the rank error stays around 1/k. Until the first compaction the
+    sketch holds every value and its quantiles are exact. Compaction uses a
+    seeded generator, so the same stream always gives the same answer.
+    """
+    
+    def __init__(self, k=1024, seed=0):
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+    
+    def update(self, values):
+        """Add an array of values; NaNs are ignored"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+    
+    def merge(self, other):
+        """Fold another sketch into this one"""
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+    
+    def quantiles(self, qs):
+        """Quantiles with pandas' default linear interpolation (NaN when empty)"""
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        if self.count == 0:
+            return np.full(len(qs), np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** i, dtype=np.int64)
+                                  for i, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items = items[order]
+        # Item j covers ranks cum[j] - weight[j] .. cum[j] - 1
+        cum = np.cumsum(weights[order])
+        
+        ranks = qs * (self.count - 1)
+        lower = np.floor(ranks).astype(np.int64)
+        upper = np.minimum(lower + 1, self.count - 1)
+        lower_values = items[np.searchsorted(cum, lower, side='right')]
+        upper_values = items[np.searchsorted(cum, upper, side='right')]
+        return lower_values + (ranks - lower) * (upper_values - lower_values)
+    
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+    
+    def _capacity(self, level):
+        # Lower levels get geometrically smaller buffers, the top level k items
+        depth = len(self.levels) - 1 - level
+        return max(2, int(self.k * (2 / 3) ** depth))
+    
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                items = np.sort(items)
+                # An odd item out stays behind so the total weight is preserved exactly
+                keep = items[len(items) - len(items) % 2:]
+                items = items[:len(items) - len(items) % 2]
+                promoted = items[self._rng.integers(2)::2]
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = keep
+            level += 1
+    
+    @property
+    def nbytes(self):
+        return sum(level.nbytes for level in self.levels)
+
+
+class HeavyHitters:
+    """Misra-Gries frequent-items summary with at most k counters.
+    
+    Counts are exact while a column has at most k distinct values; beyond
+    that every value occurring more than n/(k+1) times is still tracked,
+    so the most frequent value (the mode) survives whenever it is frequent.
+    """
+    
+    def __init__(self, k=1024):
+        self.k = k
+        self.counts = pd.Series(dtype=np.int64)
+    
+    def update(self, values):
+        """Add a Series of values; missing values are ignored"""
+        counts = values.value_counts(dropna=True)
+        counts = counts[counts > 0]
+        if len(counts) == 0:
+            return
+        if isinstance(counts.index, pd.CategoricalIndex):
+            counts.index = counts.index.astype(object)
+        combined = self.counts.add(counts, fill_value=0) if len(self.counts) else counts
+        if len(combined) > self.k:
+            # Subtract the (k+1)-th largest count from all counters and drop the non-positive ones
+            threshold = combined.nlargest(self.k + 1).iloc[-1]
+            combined = combined[combined > threshold] - threshold
+        self.counts = combined.astype(np.int64)
+    
+    def mode(self):
+        """Most frequent value; ties resolve to the smallest value, as DataFrame.mode sorts its result"""
+        if len(self.counts) == 0:
+            return np.nan
+        candidates = list(self.counts.index[self.counts == self.counts.max()])
+        try:
+            return sorted(candidates)[0]
+        except TypeError:
+            return candidates[0]
+
+
+class RunningMoments:
+    """Count, mean and variance of a stream of floats, merged chunk by chunk (Chan et al.)"""
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+    
+    def update(self, values):
+        """Add an array of values; NaNs are ignored"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        n = len(values)
+        if n == 0:
+            return
+        mean = values.mean()
+        m2 = ((values - mean) ** 2).sum()
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.count * n / total
+        self.count = total
+    
+    def std(self, ddof=1):
+        if self.count <= ddof:
+            return np.nan
+        return float(np.sqrt(self.m2 / (self.count - ddof)))
+
+
+class RowHashSet:
+    """Set of 64-bit row hashes kept as a few sorted arrays (8 bytes per distinct row).
+    
+    New hashes form a sorted run; runs are merged whenever the newest is at
+    least half the size of the one before it, so there are O(log n) runs
+    and membership tests are a binary search per run.
+    """
+    
+    def __init__(self):
+        self.runs = []
+    
+    def add(self, hashes):
+        """Insert hashes and return a mask of the ones not seen before (first occurrence only)"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        is_new = ~pd.Series(hashes).duplicated().to_numpy()
+        for run in self.runs:
+            positions = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            is_new &= run[positions] != hashes
+        
+        if is_new.any():
+            self.runs.append(np.sort(hashes[is_new]))
+            while len(self.runs) > 1 and len(self.runs[-2]) <= 2 * len(self.runs[-1]):
+                newest = self.runs.pop()
+                self.runs[-1] = np.sort(np.concatenate([self.runs[-1], newest]))
+        return is_new
+    
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+    
+    @property
+    def nbytes(self):
+        return sum(run.nbytes for run in self.runs)
@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+from utils.outliers import IQR_MULTIPLIER
+
+DEFAULT_HISTOGRAM_BINS = 20
+DEFAULT_TOP_K = 50
+HISTOGRAM_BINNINGS = ('fixed', 'quantile')
+
+
+class NumericSummary:
+    """Statistics for a set of numeric columns, computed together in one pass.
+    
+    The columns are copied once into a column-major float64 matrix. Counts,
+    sums and squared deviations are column reductions over that matrix;
+    it is then sorted in place, once, and min/max, every quantile and the
+    IQR outlier counts are read off the sorted columns by index lookups
+    and binary search. Results match pandas (describe, quantile, mean, std)
+    for float64 and integer columns.
+    """
+    
+    QUANTILES = (0.25, 0.5, 0.75)
+    
+    def __init__(self, data, columns=None):
+        if columns is None:
+            columns = list(data.columns)
+        self.columns = list(columns)
+        self.rows = len(data[self.columns[0]]) if self.columns else 0
+        
+        matrix = np.empty((self.rows, len(self.columns)), dtype=np.float64, order='F')
+        for j, col in enumerate(self.columns):
+            matrix[:, j] = np.asarray(data[col], dtype=np.float64)
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            missing_mask = np.isnan(matrix)
+            self.missing = missing_mask.sum(axis=0)
+            self.count = self.rows - self.missing
+            # Summing a zero-filled contiguous column is exactly what pandas' nanops do
+            filled = np.where(missing_mask, 0.0, matrix)
+            self.mean = filled.sum(axis=0) / self.count
+            np.subtract(matrix, self.mean, out=filled)
+            np.square(filled, out=filled)
+            filled[missing_mask] = 0.0
+            self.std = np.sqrt(filled.sum(axis=0) / (self.count - 1))
+            self.std[self.count <= 1] = np.nan
+        del filled, missing_mask
+        
+        # NaNs sort to the end, so the valid values of column j are sorted[:count[j], j]
+        matrix.sort(axis=0)
+        self._sorted = matrix
+        self.min = self.value_at_rank(np.zeros(len(self.columns), dtype=np.int64))
+        self.max = self.value_at_rank(self.count - 1)
+        self.quantiles = {q: self.quantile(q) for q in self.QUANTILES}
+        
+        q1, q3 = self.quantiles[0.25], self.quantiles[0.75]
+        self.lower_bound = q1 - IQR_MULTIPLIER * (q3 - q1)
+        self.upper_bound = q3 + IQR_MULTIPLIER * (q3 - q1)
+        self.outliers = np.zeros(len(self.columns), dtype=np.int64)
+        for j in range(len(self.columns)):
+            valid = self._sorted[:self.count[j], j]
+            below = np.searchsorted(valid, self.lower_bound[j], side='left')
+            above = self.count[j] - np.searchsorted(valid, self.upper_bound[j], side='right')
+            self.outliers[j] = below + above
+    
+    def quantile(self, q):
+        """Per-column quantile with linear interpolation (as Series.quantile / np.percentile)"""
+        position = q * (self.count - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, self.count - 1)
+        t = position - lower
+        a = self.value_at_rank(lower)
+        b = self.value_at_rank(upper)
+        # numpy's lerp: interpolate from whichever end is closer, which keeps results monotonic
+        with np.errstate(invalid='ignore'):
+            return np.where(t >= 0.5, b - (b - a) * (1 - t), a + (b - a) * t)
+    
+    def value_at_rank(self, index):
+        """Per-column value at 0-based rank index[j] among column j's valid values"""
+        values = np.full(len(self.columns), np.nan)
+        valid = self.count > 0
+        columns = np.flatnonzero(valid)
+        values[valid] = self._sorted[index[valid], columns]
+        return values
+    
+    def describe(self):
+        """The DataFrame.describe().to_dict() layout"""
+        return {col: {
+            'count': float(self.count[j]),
+            'mean': float(self.mean[j]),
+            'std': float(self.std[j]),
+            'min': float(self.min[j]),
+            '25%': float(self.quantiles[0.25][j]),
+            '50%': float(self.quantiles[0.5][j]),
+            '75%': float(self.quantiles[0.75][j]),
+            'max': float(self.max[j])
+        } for j, col in enumerate(self.columns)}
+    
+    def outlier_report(self):
+        """IQR outlier summary for the columns that have outliers"""
+        return {col: {
+            'count': int(self.outliers[j]),
+            'percentage': int(self.outliers[j]) / self.rows * 100,
+            'lower_bound': float(self.lower_bound[j]),
+            'upper_bound': float(self.upper_bound[j]),
+            'min': float(self.min[j]),
+            'max': float(self.max[j])
+        } for j, col in enumerate(self.columns) if self.outliers[j] > 0}
+    
+    def distribution(self, col):
+        """Summary served by /api/visualize/distribution for a numeric column"""
+        j = self.columns.index(col)
+        return {
+            'mean': float(self.mean[j]),
+            'median': float(self.quantiles[0.5][j]),
+            'std': float(self.std[j]),
+            'min': float(self.min[j]),
+            'max': float(self.max[j]),
+            'q25': float(self.quantiles[0.25][j]),
+            'q75': float(self.quantiles[0.75][j])
+        }
+    
+    def histogram(self, col, bins=DEFAULT_HISTOGRAM_BINS, binning='fixed'):
+        """Bin edges and counts for a numeric column, as np.histogram (last bin closed).
+        
+        'fixed' bins split [min, max] evenly; 'quantile' bins hold about the
+        same number of values each (tied edges are merged). Counts are read
+        off the sorted column with one binary search per edge.
+        """
+        j = self.columns.index(col)
+        valid = self._sorted[:self.count[j], j]
+        if len(valid) == 0:
+            return {'binning': binning, 'edges': [], 'counts': []}
+        if binning == 'quantile':
+            edges = np.unique(np.quantile(valid, np.linspace(0, 1, bins + 1)))
+        else:
+            edges = np.linspace(valid[0], valid[-1], bins + 1)
+        if edges[0] == edges[-1]:
+            # A constant column gets one unit-wide bin around its value, like np.histogram
+            edges = np.array([edges[0] - 0.5, edges[0] + 0.5])
+        boundaries = np.concatenate([[0], np.searchsorted(valid, edges[1:-1], side='left'), [len(valid)]])
+        return {
+            'binning': binning,
+            'edges': edges.tolist(),
+            'counts': np.diff(boundaries).tolist()
+        }
+
+
+def top_values(series, k=DEFAULT_TOP_K):
+    """The k most frequent values of a column plus the count of everything else.
+    
+    The payload stays bounded however many distinct values the column has.
+    """
+    counts = series.value_counts()
+    top = counts.head(k)
+    return {
+        'value_counts': top.to_dict(),
+        'other_count': int(counts.sum() - top.sum()),
+        'unique_count': int((counts > 0).sum())
+    }
+
+
+def missing_counts(df, summary=None):
+    """Missing values per column; numeric columns already in summary are not scanned again"""
+    known = {}
+    if summary is not None:
+        known = {col: int(summary.missing[j]) for j, col in enumerate(summary.columns)}
+    rest = [col for col in df.columns if col not in known]
+    counts = df[rest].isnull().sum() if rest else pd.Series(dtype=np.int64)
+    return pd.Series([known[col] if col in known else counts[col] for col in df.columns],
+                     index=df.columns, dtype=np.int64)
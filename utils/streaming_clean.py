@@ -0,0 +1,243 @@
+import shutil
+import numpy as np
+import pandas as pd
+
+from utils.column_store import ColumnStoreWriter, SchemaConflictError
+from utils.imputation import BatchImputer
+from utils.outliers import IQR_MULTIPLIER, classify_outliers
+from utils.sketches import QuantileSketch, HeavyHitters, RunningMoments, RowHashSet
+
+
+class StreamingCleaner:
+    """Out-of-core version of DataProcessor.clean_data for datasets larger than memory.
+    
+    Pass 1 reads the source chunk by chunk and keeps only per-column
+    summaries: missing counts, a quantile sketch and running moments for
+    numeric columns and a heavy-hitters summary for text columns. Pass 2
+    re-reads the source, drops columns, imputes (or drops) missing values,
+    removes duplicates through a set of 64-bit row hashes and appends each
+    chunk to a column store. Outlier removal then filters that binary
+    store in two cheap passes (count, then filter) using bounds sketched
+    while it was written. Peak memory is one chunk plus the summaries and
+    8 bytes per distinct row when deduplicating.
+    
+    The report has the same structure and messages as clean_data. Medians
+    and IQR bounds come from sketches, so on columns too large for the
+    sketch to hold exactly they are approximate (rank error ~1/k); outlier
+    removal always uses the fused mode.
+    """
+    
+    def __init__(self, options=None, chunk_rows=100000, sketch_size=1024):
+        self.options = options or {}
+        self.chunk_rows = chunk_rows
+        self.sketch_size = sketch_size
+    
+    def clean(self, read_chunks, output_path):
+        """Clean the dataset read_chunks(self.chunk_rows) yields and write it to a column store at output_path.
+        
+        read_chunks(chunk_rows) must return a fresh iterator of DataFrame
+        chunks on every call. Returns the cleaning report.
+        """
+        options = self.options
+        profile = self._profile(read_chunks)
+        total_rows = profile['rows']
+        if total_rows == 0:
+            raise ValueError("DataFrame is empty or None")
+        columns = list(profile['kinds'])
+        missing_counts = pd.Series(profile['missing'], index=columns, dtype=np.int64)
+        cleaning_steps = []
+        
+        # Step 1: Drop columns with high missing percentage
+        threshold = options.get('missing_threshold', 50)
+        kept = columns
+        if threshold > 0:
+            missing_percent = missing_counts / total_rows * 100
+            cols_to_drop = missing_percent[missing_percent > threshold].index.tolist()
+            if cols_to_drop:
+                kept = [col for col in columns if col not in cols_to_drop]
+                cleaning_steps.append(f"Dropped {len(cols_to_drop)} columns with >{threshold}% missing: {cols_to_drop}")
+        
+        # Step 2: fill values from the pass-1 summaries
+        imputation_strategy = options.get('imputation_strategy', 'median')
+        imputer = None
+        if imputation_strategy != 'drop':
+            numerical_values = {}
+            categorical_values = {}
+            for col in kept:
+                if profile['kinds'][col] == 'numeric':
+                    if imputation_strategy == 'mean':
+                        numerical_values[col] = profile['moments'][col].mean if profile['moments'][col].count else np.nan
+                    else:
+                        numerical_values[col] = profile['quantiles'][col].quantile(0.5)
+                elif profile['kinds'][col] == 'categorical':
+                    mode = profile['modes'][col].mode()
+                    categorical_values[col] = 'Unknown' if pd.isna(mode) else mode
+            imputer = BatchImputer(imputation_strategy).fit_values(
+                numerical_values, categorical_values, missing_counts.to_dict())
+            cleaning_steps.extend(imputer.steps)
+            still_missing = [col for col in kept if missing_counts[col] > 0 and col not in imputer.fill_values]
+        else:
+            still_missing = []
+        
+        remove_duplicates = options.get('remove_duplicates', False)
+        remove_outliers = options.get('handle_outliers', False) and options.get('outlier_action') == 'remove'
+        numerical_cols = [col for col in kept if profile['kinds'][col] == 'numeric']
+        method = options.get('outlier_method', 'iqr')
+        
+        # Pass 2: apply the decisions chunk by chunk
+        stage_path = f"{output_path}.stage" if remove_outliers and numerical_cols else output_path
+        writer = ColumnStoreWriter(stage_path)
+        seen = RowHashSet() if remove_duplicates else None
+        outlier_quantiles = {col: QuantileSketch(self.sketch_size) for col in numerical_cols}
+        outlier_moments = {col: RunningMoments() for col in numerical_cols}
+        rows_after_dropna = 0
+        rows_written = 0
+        missing_after = 0
+        try:
+            for chunk in read_chunks(self.chunk_rows):
+                chunk = self._conform(chunk[kept], profile)
+                if imputer is None:
+                    chunk = chunk.dropna()
+                    rows_after_dropna += len(chunk)
+                else:
+                    chunk = imputer.transform(chunk)
+                if seen is not None:
+                    chunk = chunk[seen.add(pd.util.hash_pandas_object(chunk, index=False).to_numpy())]
+                if stage_path != output_path:
+                    for col in numerical_cols:
+                        values = chunk[col].to_numpy(dtype=np.float64)
+                        outlier_quantiles[col].update(values)
+                        outlier_moments[col].update(values)
+                rows_written += len(chunk)
+                missing_after += int(chunk[still_missing].isnull().sum().sum())
+                writer.append(chunk)
+            store = writer.close()
+        except Exception:
+            writer.abort()
+            raise
+        
+        if imputer is None:
+            cleaning_steps.append("Dropped rows with missing values")
+        if seen is not None:
+            rows_before_dedup = rows_after_dropna if imputer is None else total_rows
+            duplicates_removed = rows_before_dedup - rows_written
+            if duplicates_removed > 0:
+                cleaning_steps.append(f"Removed {duplicates_removed} duplicate rows")
+        
+        # Step 4: fused outlier removal over the binary staging store
+        if stage_path != output_path:
+            try:
+                if method == 'iqr':
+                    q1, q3 = np.array([outlier_quantiles[col].quantiles([0.25, 0.75]) for col in numerical_cols]).T
+                    bounds = (q1 - IQR_MULTIPLIER * (q3 - q1), q3 + IQR_MULTIPLIER * (q3 - q1))
+                else:
+                    bounds = (np.array([outlier_moments[col].mean for col in numerical_cols]),
+                              np.array([outlier_moments[col].std() for col in numerical_cols]))
+                counts = np.zeros(len(numerical_cols), dtype=np.int64)
+                for chunk in store.chunks(self.chunk_rows, columns=numerical_cols):
+                    is_outlier, _ = classify_outliers(chunk.to_numpy(dtype=np.float64), method, bounds)
+                    counts += is_outlier.sum(axis=0)
+                for col, outliers in zip(numerical_cols, counts):
+                    if outliers > 0:
+                        cleaning_steps.append(f"Removed {outliers} outliers from {col}")
+                
+                has_outliers = counts > 0
+                writer = ColumnStoreWriter(output_path)
+                rows_written = 0
+                missing_after = 0
+                try:
+                    for chunk in store.chunks(self.chunk_rows):
+                        if has_outliers.any():
+                            values = chunk[numerical_cols].to_numpy(dtype=np.float64)
+                            _, is_inlier = classify_outliers(values, method, bounds)
+                            chunk = chunk[is_inlier[:, has_outliers].all(axis=1)]
+                        rows_written += len(chunk)
+                        missing_after += int(chunk[still_missing].isnull().sum().sum())
+                        writer.append(chunk)
+                    writer.close()
+                except Exception:
+                    writer.abort()
+                    raise
+            finally:
+                shutil.rmtree(stage_path, ignore_errors=True)
+        
+        if rows_written == 0:
+            shutil.rmtree(output_path, ignore_errors=True)
+            raise ValueError("After cleaning, the dataset is empty. Please adjust cleaning options (e.g., lower missing threshold, change imputation strategy).")
+        
+        return {
+            'original_shape': [int(total_rows), len(columns)],
+            'cleaned_shape': [int(rows_written), len(kept)],
+            'rows_removed': int(total_rows - rows_written),
+            'columns_removed': int(len(columns) - len(kept)),
+            'missing_values_before': int(missing_counts.sum()),
+            'missing_values_after': int(missing_after),
+            'cleaning_steps': cleaning_steps
+        }
+    
+    def _profile(self, read_chunks):
+        """Pass 1: row count, per-column kind, missing counts and fill-value summaries"""
+        rows = 0
+        kinds = {}
+        floats = set()
+        missing = {}
+        quantiles = {}
+        moments = {}
+        modes = {}
+        for chunk in read_chunks(self.chunk_rows):
+            rows += len(chunk)
+            chunk_missing = chunk.isnull().sum()
+            for col in chunk.columns:
+                series = chunk[col]
+                missing[col] = missing.get(col, 0) + int(chunk_missing[col])
+                kind = _column_kind(series)
+                if kind is None:
+                    # An all-missing chunk says nothing about the column's type
+                    kinds.setdefault(col, None)
+                    if series.dtype.kind == 'f':
+                        floats.add(col)
+                    continue
+                if kinds.get(col) not in (None, kind):
+                    raise SchemaConflictError(f"Column {col!r} changes type between chunks")
+                kinds[col] = kind
+                if kind == 'numeric':
+                    if series.dtype.kind == 'f':
+                        floats.add(col)
+                    values = series.to_numpy(dtype=np.float64)
+                    quantiles.setdefault(col, QuantileSketch(self.sketch_size)).update(values)
+                    moments.setdefault(col, RunningMoments()).update(values)
+                elif kind == 'categorical':
+                    modes.setdefault(col, HeavyHitters(self.sketch_size)).update(series)
+        
+        for col, kind in kinds.items():
+            if kind is None:
+                # Entirely empty column: pandas parses it as float
+                kinds[col] = 'numeric'
+                quantiles[col] = QuantileSketch(self.sketch_size)
+                moments[col] = RunningMoments()
+        return {'rows': rows, 'kinds': kinds, 'floats': floats, 'missing': missing,
+                'quantiles': quantiles, 'moments': moments, 'modes': modes}
+    
+    @staticmethod
+    def _conform(chunk, profile):
+        """Give every chunk the dtypes a full parse would have produced"""
+        for col in chunk.columns:
+            kind = profile['kinds'][col]
+            dtype = chunk[col].dtype
+            if kind == 'numeric' and col in profile['floats'] and dtype.kind != 'f':
+                chunk[col] = chunk[col].astype(np.float64)
+            elif kind == 'categorical' and dtype.kind == 'f':
+                chunk[col] = chunk[col].astype(object)
+        return chunk
+
+
+def _column_kind(series):
+    """'numeric', 'categorical', 'other', or None for an all-missing float chunk"""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype) or dtype == object:
+        return 'categorical'
+    if dtype.kind == 'f' and series.isna().all():
+        return None
+    if dtype.kind in 'iuf':
+        return 'numeric'
+    return 'other'
@@ -0,0 +1,139 @@
+import os
+import json
+import uuid
+import hashlib
+import threading
+from werkzeug.utils import secure_filename
+
+COPY_BLOCK_SIZE = 1024 * 1024  # 1MB
+
+
+class UploadStore:
+    """Content-addressed storage for uploaded datasets.
+    
+    Every upload is stored once as blobs/<sha256>.<ext>; user-facing
+    filenames are aliases that point at a blob. Re-uploading identical
+    bytes only moves the alias, and two different files uploaded under
+    the same name no longer overwrite each other: the alias moves to the
+    new blob while the old blob (and anything cached for it) stays valid.
+    Because a blob path never changes content, it is a stable key for
+    caches and derived artifacts.
+    """
+    
+    def __init__(self, upload_folder):
+        self.upload_folder = upload_folder
+        self.blob_folder = os.path.join(upload_folder, 'blobs')
+        self.tmp_folder = os.path.join(upload_folder, '.tmp')
+        os.makedirs(self.blob_folder, exist_ok=True)
+        os.makedirs(self.tmp_folder, exist_ok=True)
+        self.alias_path = os.path.join(self.blob_folder, 'aliases.json')
+        self._aliases = {}
+        self._aliases_mtime = None
+        self._lock = threading.Lock()
+    
+    def tmp_path(self):
+        """A fresh temporary path inside the upload folder (same filesystem as the blobs)"""
+        return os.path.join(self.tmp_folder, uuid.uuid4().hex)
+    
+    def ingest_stream(self, stream, filename):
+        """Store an upload stream, hashing it while it is written.
+        
+        Returns (digest, blob_path, is_new).
+        """
+        tmp_path = self.tmp_path()
+        hasher = hashlib.sha256()
+        with open(tmp_path, 'wb') as f:
+            for block in iter(lambda: stream.read(COPY_BLOCK_SIZE), b''):
+                hasher.update(block)
+                f.write(block)
+        return self.ingest_file(tmp_path, filename, hasher.hexdigest())
+    
+    def ingest_file(self, path, filename, digest, extension=None):
+        """Move an already-hashed file into the store and point filename at it.
+        
+        The blob keeps the extension of its actual format, which may differ
+        from the alias (e.g. a cleaned Excel upload is stored as CSV).
+        """
+        filename = secure_filename(filename)
+        if extension is None:
+            extension = filename.rsplit('.', 1)[1].lower() if '.' in filename else 'bin'
+        blob_name = f"{digest}.{extension}"
+        blob_path = os.path.join(self.blob_folder, blob_name)
+        is_new = not os.path.exists(blob_path)
+        if is_new:
+            os.replace(path, blob_path)
+        else:
+            # Identical content is already stored: keep the existing blob (and its mtime)
+            os.remove(path)
+        self.link(filename, blob_name)
+        return digest, blob_path, is_new
+    
+    def link(self, filename, blob_name):
+        """Point filename at an entry that already exists under the blob folder"""
+        with self._lock:
+            aliases = self._read_aliases()
+            aliases[secure_filename(filename)] = blob_name
+            self._write_aliases(aliases)
+    
+    def linked_paths(self):
+        """Paths of every blob some filename currently points at"""
+        with self._lock:
+            blob_names = set(self._read_aliases().values())
+        return {os.path.join(self.blob_folder, blob_name) for blob_name in blob_names}
+    
+    def digest_for(self, filename):
+        """Content hash behind a filename, or None for files stored outside the blob store"""
+        with self._lock:
+            blob_name = self._read_aliases().get(secure_filename(filename))
+        return blob_name.split('.', 1)[0] if blob_name else None
+    
+    def resolve(self, filename):
+        """Path of the file currently published under filename"""
+        filename = secure_filename(filename)
+        with self._lock:
+            blob_name = self._read_aliases().get(filename)
+        if blob_name is not None:
+            return os.path.join(self.blob_folder, blob_name)
+        # Files written before the blob store existed live directly in the upload folder
+        return os.path.join(self.upload_folder, filename)
+    
+    def load_info(self, key):
+        """Cached get_data_info result saved under key, if any"""
+        info_path = os.path.join(self.blob_folder, f"{key}.info.json")
+        if not os.path.exists(info_path):
+            return None
+        with open(info_path) as f:
+            return json.load(f)
+    
+    def save_info(self, key, info):
+        info_path = os.path.join(self.blob_folder, f"{key}.info.json")
+        tmp_path = self.tmp_path()
+        with open(tmp_path, 'w') as f:
+            json.dump(info, f)
+        os.replace(tmp_path, info_path)
+    
+    def _read_aliases(self):
+        # Reload when another worker process has rewritten the index
+        try:
+            mtime = os.stat(self.alias_path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if mtime != self._aliases_mtime:
+            with open(self.alias_path) as f:
+                self._aliases = json.load(f)
+            self._aliases_mtime = mtime
+        return dict(self._aliases)
+    
+    def _write_aliases(self, aliases):
+        tmp_path = self.tmp_path()
+        with open(tmp_path, 'w') as f:
+            json.dump(aliases, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.alias_path)
+        self._aliases = aliases
+        self._aliases_mtime = os.stat(self.alias_path).st_mtime_ns
+
+
+def derived_key(digest, kind, params=None):
+    """Stable cache key for an artifact derived from a blob (e.g. a cleaned dataset)"""
+    payload = json.dumps({'digest': digest, 'kind': kind, 'params': params or {}}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()